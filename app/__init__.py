@@ -39,9 +39,19 @@ def create_app() -> Flask:
     app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['BCRYPT_LOG_ROUNDS'] = int(os.getenv('BCRYPT_LOG_ROUNDS', 12)) # custo do hash das senhas
 
     # configura o SocketIO
     # socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
+    app.config['SOCKETIO_ASYNC_MODE'] = 'eventlet' # também define se o psycopg2 precisa ser cooperativo (init_engine)
+
+    # pool de conexões, timeouts e modo pgbouncer (variáveis DB_*)
+    from .database import configure_engine, init_engine
+    configure_engine(app)
+
+    # mede a espera por conexões do pool (exposta em /metrics)
+    from .metrics import metrics
+    metrics.configure_pool(app)
 
     # inicializa as extensões com a aplicação
     db.init_app(app)
@@ -49,6 +59,10 @@ def create_app() -> Flask:
     bcrypt.init_app(app)
     login_manager.init_app(app)
 
+    # executa o bcrypt no pool de threads nativas, sem bloquear o hub do eventlet
+    from .passwords import password_hasher
+    password_hasher.init_app(app)
+
     oauth.init_app(app)
     
     # configura o OAuth para o Google
@@ -67,15 +81,48 @@ def create_app() -> Flask:
         # importa os modelos para que o SQLAlchemy possa reconhecê-los
         from .models import User # importa o modelo User para o login_manager
 
+        # timeout por transação (pgbouncer) e psycopg2 cooperativo com o eventlet
+        init_engine(app, db.engine)
+
+        # métricas de http, socket.io e do pool de conexões
+        metrics.init_app(app)
+
+        # contagem e tempo das consultas por requisição (opcional, SQL_INSTRUMENTATION=1)
+        from .instrumentation import sql_instrumentation
+        sql_instrumentation.init_app(app)
+
+        # cache dos contadores do dashboard (invalidado pelos eventos da sessão)
+        from .counters import ticket_counters
+        ticket_counters.init_app(app)
+
+        # registro em memória dos dados de referência (status, prioridades, setores e assuntos)
+        from .registry import registry
+        registry.init_app(app)
+
+        # gravação em lote das mensagens do chat (opcional, CHAT_WRITE_BEHIND=1)
+        from .message_writer import message_writer
+        message_writer.init_app(app)
+
+        # atribuição automática dos tickets novos (opcional, ROUTING_STRATEGY)
+        from .routing import routing
+        routing.init_app(app)
+
+        # cache do usuário autenticado e dos seus setores
+        from .identity import identity_cache
+        identity_cache.init_app(app)
+
         # registra o carregador de usuário para o login_manager
         @login_manager.user_loader
         def load_user(user_id):
-            return User.query.get(int(user_id))
+            return identity_cache.load(int(user_id))
 
         # importa e registra os blueprints
         from .routes import main
         app.register_blueprint(main.main)
 
+        from .routes import metrics as metrics_routes
+        app.register_blueprint(metrics_routes.metrics)
+
         from .routes.dashboard import dashboard
         app.register_blueprint(dashboard.dashboard, url_prefix='/dashboard')
 
@@ -113,8 +160,16 @@ def create_app() -> Flask:
         app.cli.add_command(commands.seed_subjects)
         app.cli.add_command(commands.seed_statuses)
         app.cli.add_command(commands.seed_priorities)
+        app.cli.add_command(commands.seed_load)
+        app.cli.add_command(commands.explain_dashboard)
+        app.cli.add_command(commands.export_tickets)
+        app.cli.add_command(commands.import_tickets)
+        app.cli.add_command(commands.socketio_broker)
 
         # importa os eventos do SocketIO
-        socketio.init_app(app, cors_allowed_origins="*", async_mode='eventlet')
+        ## a fila de mensagens (SOCKETIO_MESSAGE_QUEUE) permite rodar vários workers
+        from .socket_bus import socketio_options
+        socketio.init_app(app, cors_allowed_origins="*", async_mode=app.config['SOCKETIO_ASYNC_MODE'],
+                          **socketio_options(app))
 
         return app
\ No newline at end of file
@@ -0,0 +1,104 @@
+from datetime import datetime
+from sqlalchemy import select, update
+from app import db
+from app.models import Ticket
+from app.registry import registry, most_urgent_first, STATUS_IN_PROGRESS
+from app.counters import ticket_counters, SECTOR_OPEN_STATUSES
+from app.routing import routing
+
+# tentativas do claim_next quando outro atendente pega o mesmo ticket (só acontece sem SKIP LOCKED, no SQLite)
+CLAIM_ATTEMPTS = 3
+
+def _assigned_values(user_id: int) -> dict:
+    now = datetime.utcnow()
+    return {
+        'assignee_id': user_id,
+        'assigned_at': now,
+        'updated_at': now,
+        'status_id': registry.status_id(STATUS_IN_PROGRESS),
+    }
+
+def _assigned(user_id: int, row) -> None:
+    # o UPDATE direto não passa pelos eventos da sessão que mantêm os contadores e a carga do roteamento
+    ticket_counters.invalidate({('user', user_id), ('user', row.creator_id), ('sector', row.sector_id)})
+    if routing.enabled:
+        routing.adjust({user_id: routing.weight(row.priority_id)})
+
+def assign_ticket(ticket_id: int, user_id: int) -> bool:
+    """Atribui um ticket sem responsável ao usuário, numa única instrução.
+
+    O UPDATE só altera o ticket se ele ainda estiver sem responsável
+    (`WHERE assignee_id IS NULL`); quando dois atendentes tentam ao mesmo
+    tempo, o banco serializa as duas instruções e apenas a primeira altera a
+    linha.
+
+    Args:
+        ticket_id (int): O id do ticket.
+        user_id (int): O id do novo responsável.
+
+    Returns:
+        bool: True se o ticket foi atribuído, False se ele já tinha responsável (ou não existe).
+    """
+    row = db.session.execute(
+        update(Ticket)
+        .where(Ticket.id == ticket_id, Ticket.assignee_id.is_(None))
+        .values(_assigned_values(user_id))
+        .returning(Ticket.creator_id, Ticket.sector_id, Ticket.priority_id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    db.session.commit()
+
+    if row is None:
+        return False
+    _assigned(user_id, row)
+    return True
+
+def next_ticket_query(sector_ids):
+    """Consulta do próximo ticket da fila dos setores: sem responsável, aberto ou aguardando,
+    de prioridade mais urgente e, entre eles, o mais antigo."""
+    return (
+        select(Ticket.id)
+        .where(Ticket.sector_id.in_(sector_ids),
+               Ticket.assignee_id.is_(None),
+               Ticket.status_id.in_(registry.status_ids(SECTOR_OPEN_STATUSES)))
+        .order_by(most_urgent_first(Ticket.priority_id), Ticket.created_at, Ticket.id)
+        .limit(1)
+    )
+
+def claim_next(user):
+    """Atribui ao usuário o próximo ticket da fila dos seus setores.
+
+    No PostgreSQL a escolha usa `FOR UPDATE SKIP LOCKED`: atendentes que pedem
+    um ticket ao mesmo tempo recebem tickets diferentes, sem esperar pelos
+    bloqueios uns dos outros. A condição `assignee_id IS NULL` do UPDATE
+    garante, nos demais bancos, que um ticket já pego não seja sobrescrito
+    (nesse caso a escolha é refeita).
+
+    Args:
+        user (User): O atendente.
+
+    Returns:
+        int | None: O id do ticket atribuído, ou None se a fila estiver vazia.
+    """
+    sector_ids = user.sector_ids
+    if not sector_ids:
+        return None
+
+    candidate = next_ticket_query(sector_ids).with_for_update(skip_locked=True).correlate(None).scalar_subquery()
+    for _ in range(CLAIM_ATTEMPTS):
+        row = db.session.execute(
+            update(Ticket)
+            .where(Ticket.id == candidate, Ticket.assignee_id.is_(None))
+            .values(_assigned_values(user.id))
+            .returning(Ticket.id, Ticket.creator_id, Ticket.sector_id, Ticket.priority_id)
+            .execution_options(synchronize_session=False)
+        ).first()
+        db.session.commit()
+
+        if row is not None:
+            _assigned(user.id, row)
+            return row.id
+        # fila vazia, ou o ticket escolhido foi pego por outro atendente entre a escolha e o UPDATE
+        if db.session.scalar(next_ticket_query(sector_ids)) is None:
+            return None
+    return None
@@ -0,0 +1,172 @@
+from datetime import datetime
+from sqlalchemy import case, exists, select, update
+from app import db
+from app.models import Ticket
+from app.models import subject_sectors
+from app.models import user_sectors
+from app.registry import registry, STATUS_IN_PROGRESS, STATUS_RESOLVED, STATUS_CLOSED
+from app.counters import ticket_counters
+from app.routing import routing
+
+# tickets aceitos por operação (o IN (...) e a resposta crescem com a lista)
+BULK_MAX_IDS = 1000
+
+# resultados por id
+BULK_UPDATED = 'updated'
+BULK_NOT_FOUND = 'not_found'
+BULK_FORBIDDEN = 'forbidden'
+BULK_SKIPPED = 'skipped'
+
+class BulkError(ValueError):
+    """Operação em lote inválida (ação desconhecida, parâmetro ausente ou sem permissão)."""
+
+def _member_of_ticket_sector(user_id: int):
+    """Condição SQL: o usuário pertence ao setor do ticket."""
+    return exists().where(user_sectors.c.user_id == user_id, user_sectors.c.sector_id == Ticket.sector_id)
+
+def _assign(params: dict, user, only_unassigned: bool) -> tuple:
+    assignee_id = params.get('user_id')
+    if not isinstance(assignee_id, int):
+        raise BulkError('user_id: obrigatório')
+    now = datetime.utcnow()
+    values = {
+        'assignee_id': assignee_id,
+        'assigned_at': now,
+        'updated_at': now,
+        'status_id': registry.status_id(STATUS_IN_PROGRESS),
+    }
+    # o responsável precisa ser membro do setor de cada ticket
+    conditions = [_member_of_ticket_sector(assignee_id)]
+    if only_unassigned:
+        conditions.append(Ticket.assignee_id.is_(None))
+    return values, conditions, {('user', assignee_id)}
+
+def _status(params: dict, user) -> tuple:
+    status = registry.status(params.get('status_id')) if isinstance(params.get('status_id'), int) else None
+    if status is None:
+        raise BulkError('status_id: status inexistente')
+    now = datetime.utcnow()
+    closed = status.name in (STATUS_RESOLVED, STATUS_CLOSED)
+    values = {
+        'status_id': status.id,
+        'updated_at': now,
+        # mantém a data de fechamento de quem já estava fechado
+        'closed_at': case((Ticket.closed_at.is_(None), now), else_=Ticket.closed_at) if closed else None,
+    }
+    return values, [Ticket.status_id != status.id], set()
+
+def _priority(params: dict, user) -> tuple:
+    priority = registry.priority(params.get('priority_id')) if isinstance(params.get('priority_id'), int) else None
+    if priority is None:
+        raise BulkError('priority_id: prioridade inexistente')
+    values = {'priority_id': priority.id, 'updated_at': datetime.utcnow()}
+    return values, [Ticket.priority_id != priority.id], set()
+
+def _move(params: dict, user) -> tuple:
+    sector = registry.sector(params.get('sector_id')) if isinstance(params.get('sector_id'), int) else None
+    if sector is None:
+        raise BulkError('sector_id: setor inexistente')
+    if not user.is_admin and sector.id not in user.sector_ids:
+        raise BulkError('sector_id: sem permissão para mover tickets para este setor')
+
+    values = {'sector_id': sector.id, 'updated_at': datetime.utcnow()}
+    conditions = [Ticket.sector_id != sector.id]
+    subject_id = params.get('subject_id')
+    if subject_id is not None:
+        subject = registry.subject(subject_id) if isinstance(subject_id, int) else None
+        if subject is None or sector.id not in subject.sector_ids:
+            raise BulkError('subject_id: assunto inexistente ou de outro setor')
+        values['subject_id'] = subject.id
+    else:
+        # sem um novo assunto, só move os tickets cujo assunto também pertence ao setor de destino
+        conditions.append(exists().where(subject_sectors.c.subject_id == Ticket.subject_id,
+                                         subject_sectors.c.sector_id == sector.id))
+    return values, conditions, {('sector', sector.id)}
+
+BULK_ACTIONS = {
+    'assign': lambda params, user: _assign(params, user, only_unassigned=True),
+    'reassign': lambda params, user: _assign(params, user, only_unassigned=False),
+    'status': _status,
+    'priority': _priority,
+    'move': _move,
+}
+
+def bulk_update(ticket_ids, action: str, params: dict, user) -> dict:
+    """Aplica uma ação a vários tickets com um único UPDATE ... WHERE id IN (...).
+
+    As permissões fazem parte do WHERE: quem não é administrador só altera
+    tickets dos próprios setores. As condições da ação (ticket ainda sem
+    responsável, responsável membro do setor, assunto válido no setor de
+    destino...) também, de modo que tickets alterados por outra pessoa no meio
+    tempo não são sobrescritos. Ações:
+
+    - assign: atribui a `user_id` os tickets ainda sem responsável;
+    - reassign: atribui a `user_id`, com ou sem responsável anterior;
+    - status: muda para `status_id` (Resolvido/Fechado preenchem closed_at);
+    - priority: muda para `priority_id`;
+    - move: move para `sector_id` (e `subject_id`, opcional).
+
+    Args:
+        ticket_ids (list): Os ids dos tickets (até BULK_MAX_IDS).
+        action (str): Uma das chaves de BULK_ACTIONS.
+        params (dict): Os parâmetros da ação.
+        user (User): O usuário que executa a operação.
+
+    Returns:
+        dict: O resultado de cada id: 'updated', 'not_found', 'forbidden' ou
+              'skipped' (a condição da ação não se aplica ao ticket).
+
+    Raises:
+        BulkError: Se a ação ou os parâmetros forem inválidos.
+    """
+    if action not in BULK_ACTIONS:
+        raise BulkError(f'action: ação desconhecida "{action}"')
+    if not isinstance(ticket_ids, list) or not all(isinstance(ticket_id, int) for ticket_id in ticket_ids):
+        raise BulkError('ids: informe uma lista de ids')
+    ticket_ids = list(dict.fromkeys(ticket_ids))
+    if not ticket_ids:
+        raise BulkError('ids: informe ao menos um id')
+    if len(ticket_ids) > BULK_MAX_IDS:
+        raise BulkError(f'ids: no máximo {BULK_MAX_IDS} tickets por operação')
+
+    values, conditions, counter_keys = BULK_ACTIONS[action](params, user)
+    allowed_sectors = None if user.is_admin else set(user.sector_ids)
+    access = [] if allowed_sectors is None else [Ticket.sector_id.in_(allowed_sectors)]
+
+    # valores anteriores, usados para explicar os ids não alterados e invalidar os contadores
+    before = {row.id: row for row in db.session.execute(
+        select(Ticket.id, Ticket.sector_id, Ticket.creator_id, Ticket.assignee_id)
+        .where(Ticket.id.in_(ticket_ids))
+    )}
+
+    updated = set(db.session.scalars(
+        update(Ticket)
+        .where(Ticket.id.in_(ticket_ids), *access, *conditions)
+        .values(values)
+        .returning(Ticket.id)
+        .execution_options(synchronize_session=False)
+    ).all())
+    db.session.commit()
+
+    # o UPDATE em lote não passa pelos eventos da sessão que mantêm os contadores
+    for ticket_id in updated:
+        row = before.get(ticket_id)
+        if row is not None:
+            counter_keys.update({('sector', row.sector_id), ('user', row.creator_id)})
+            if row.assignee_id is not None:
+                counter_keys.add(('user', row.assignee_id))
+    if updated:
+        ticket_counters.invalidate(counter_keys)
+        routing.invalidate()
+
+    results = {}
+    for ticket_id in ticket_ids:
+        if ticket_id in updated:
+            results[ticket_id] = BULK_UPDATED
+        elif ticket_id not in before:
+            results[ticket_id] = BULK_NOT_FOUND
+        elif allowed_sectors is not None and before[ticket_id].sector_id not in allowed_sectors:
+            results[ticket_id] = BULK_FORBIDDEN
+        else:
+            results[ticket_id] = BULK_SKIPPED
+    return results
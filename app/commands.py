@@ -1,13 +1,21 @@
 import click
+import csv
+import io
 import random
+import re
+import time
+from datetime import datetime
 from . import db
 from flask.cli import with_appcontext
 from faker import Faker
+from sqlalchemy import func, select
 from .models import User
 from .models import Sector
 from .models import Subject
 from .models import Status
 from .models import Priority
+from .models import Ticket
+from .messages import message_page_query
 
 @click.command(name='create-admin')
 @with_appcontext
@@ -233,7 +241,9 @@ def seed_statuses() -> None:
 def seed_priorities() -> None:
     """Cria uma lista de prioridades iniciais se elas não existirem."""
 
-    # Lista de prioridades iniciais com cores associadas
+    # Lista de prioridades iniciais com cores associadas, da menos para a mais urgente:
+    # a ordem de criação (ids crescentes) define a urgência usada na fila e no roteamento
+    # (ver most_urgent_first e registry.priority_rank em app/registry.py)
     initial_priorities = [
         ("Baixa", "#28A745"),
         ("Média", "#FFC107"),
@@ -252,3 +262,368 @@ def seed_priorities() -> None:
     db.session.commit()
     print("Povoamento das prioridades concluído com sucesso.")
 
+# pesos dos status e prioridades nos tickets gerados por seed-load (nomes ausentes recebem peso 1)
+LOAD_STATUS_WEIGHTS = {
+    'Aberto': 15, 'Aguardando': 10, 'Em Progresso': 15, 'Editado': 5, 'Resolvido': 35, 'Fechado': 20,
+}
+LOAD_PRIORITY_WEIGHTS = {'Baixa': 40, 'Média': 35, 'Alta': 20, 'Urgente': 5}
+
+def _bulk_insert(table, columns, rows) -> None:
+    """Insere um lote de linhas: COPY no PostgreSQL, executemany nos demais bancos."""
+    if not rows:
+        return
+
+    if db.engine.dialect.name == 'postgresql':
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        preparer = db.engine.dialect.identifier_preparer
+        statement = (f"COPY {preparer.format_table(table)} ({', '.join(preparer.quote(c) for c in columns)}) "
+                     f"FROM STDIN WITH (FORMAT csv)")
+        with db.session.connection().connection.cursor() as cursor:
+            cursor.copy_expert(statement, buffer)
+        return
+
+    db.session.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+def _new_ids(model, after_id: int) -> list:
+    """Retorna, em ordem, os ids criados depois de `after_id` (os lotes são inseridos em ordem)."""
+    return list(db.session.scalars(select(model.id).where(model.id > after_id).order_by(model.id)))
+
+@click.command(name='seed-load')
+@click.option('--users', 'user_count', type=int, default=1000, show_default=True, help='Usuários a criar.')
+@click.option('--tickets', 'ticket_count', type=int, default=100000, show_default=True, help='Tickets a criar.')
+@click.option('--messages', 'message_count', type=int, default=500000, show_default=True, help='Mensagens a criar.')
+@click.option('--batch-size', type=int, default=10000, show_default=True, help='Linhas por lote de inserção.')
+@click.option('--days', type=int, default=365, show_default=True, help='Período (em dias) das datas de criação.')
+@click.option('--seed', type=int, default=None, help='Semente do gerador, para repetir a mesma massa de dados.')
+@with_appcontext
+def seed_load(user_count, ticket_count, message_count, batch_size, days, seed) -> None:
+    """Gera uma massa de dados sintética (usuários, tickets e mensagens) para testes de carga.
+
+    As linhas são inseridas em lotes (COPY no PostgreSQL) e todos os usuários
+    recebem a senha 'fake', com um único hash calculado. Os setores concentram
+    os tickets de forma desigual (o primeiro setor recebe mais), os status e as
+    prioridades seguem LOAD_STATUS_WEIGHTS e LOAD_PRIORITY_WEIGHTS, e poucos
+    tickets concentram a maior parte das mensagens.
+    """
+    from datetime import timedelta
+    from .models import TicketMessage, user_sectors
+    from .passwords import password_hasher
+    from .counters import ticket_counters
+    from .registry import registry, STATUS_OPEN, STATUS_WAITING, STATUS_RESOLVED, STATUS_CLOSED
+
+    rng = random.Random(seed)
+    fake = Faker('pt_BR')
+    if seed is not None:
+        fake.seed_instance(seed)
+
+    sectors = registry.sectors()
+    statuses = registry.statuses()
+    priorities = registry.priorities()
+    if not sectors or not statuses or not priorities:
+        print("Erro: execute 'flask seed-subjects', 'flask seed-statuses' e 'flask seed-priorities' primeiro.")
+        return
+    subjects_by_sector = {sector.id: registry.subjects_for_sector(sector.id) for sector in sectors}
+    sectors = [sector for sector in sectors if subjects_by_sector[sector.id]]
+
+    started = time.monotonic()
+    now = datetime.utcnow()
+    tag = f'{rng.getrandbits(32):08x}'
+
+    # vocabulário gerado uma vez e reutilizado (o Faker é lento para milhões de linhas)
+    first_names = [fake.first_name() for _ in range(200)]
+    last_names = [fake.last_name() for _ in range(200)]
+    sentences = [fake.sentence(nb_words=rng.randint(4, 14)) for _ in range(1000)]
+    password_hash = password_hasher.hash('fake')
+
+    # ------------------------------
+    # usuários e setores
+    # ------------------------------
+    print(f"Criando {user_count} usuários...")
+    last_user_id = db.session.scalar(select(func.max(User.id))) or 0
+    user_columns = ['username', 'first_name', 'last_name', 'email', 'password_hash', 'admin']
+    for offset in range(0, user_count, batch_size):
+        rows = []
+        for i in range(offset, min(offset + batch_size, user_count)):
+            username = f'load_{tag}_{i}'
+            rows.append((username, rng.choice(first_names), rng.choice(last_names),
+                         f'{username}@fakemail.com', password_hash, False))
+        _bulk_insert(User.__table__, user_columns, rows)
+
+    user_ids = _new_ids(User, last_user_id)
+    members = {sector.id: [] for sector in sectors}
+    membership = []
+    for user_id in user_ids:
+        for sector in rng.sample(sectors, rng.randint(1, min(3, len(sectors)))):
+            members[sector.id].append(user_id)
+            membership.append((user_id, sector.id))
+    for offset in range(0, len(membership), batch_size):
+        _bulk_insert(user_sectors, ['user_id', 'sector_id'], membership[offset:offset + batch_size])
+    db.session.commit()
+
+    if not user_ids:
+        print("Nenhum usuário criado; tickets e mensagens precisam de usuários.")
+        return
+
+    # ------------------------------
+    # tickets
+    # ------------------------------
+    print(f"Criando {ticket_count} tickets...")
+    # o primeiro setor recebe mais tickets que o segundo, e assim por diante (1/n)
+    sector_weights = [1 / (rank + 1) for rank in range(len(sectors))]
+    status_weights = [LOAD_STATUS_WEIGHTS.get(status.name, 1) for status in statuses]
+    priority_weights = [LOAD_PRIORITY_WEIGHTS.get(priority.name, 1) for priority in priorities]
+    unassigned = set(registry.status_ids([STATUS_OPEN, STATUS_WAITING]))
+    closed = set(registry.status_ids([STATUS_RESOLVED, STATUS_CLOSED]))
+
+    last_ticket_id = db.session.scalar(select(func.max(Ticket.id))) or 0
+    ticket_columns = ['title', 'description', 'created_at', 'assigned_at', 'updated_at', 'closed_at',
+                      'creator_id', 'assignee_id', 'sector_id', 'subject_id', 'status_id', 'priority_id']
+    # participantes e data de cada ticket, usados para gerar as mensagens
+    ticket_meta = []
+    for offset in range(0, ticket_count, batch_size):
+        size = min(batch_size, ticket_count - offset)
+        rows = []
+        for sector, status, priority in zip(rng.choices(sectors, sector_weights, k=size),
+                                            rng.choices(statuses, status_weights, k=size),
+                                            rng.choices(priorities, priority_weights, k=size)):
+            subject = rng.choice(subjects_by_sector[sector.id])
+            created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+            creator_id = rng.choice(user_ids)
+            assignee_id = assigned_at = closed_at = None
+            if status.id not in unassigned:
+                assignee_id = rng.choice(members[sector.id] or user_ids)
+                assigned_at = created_at + timedelta(minutes=rng.randint(1, 2880))
+            if status.id in closed:
+                closed_at = (assigned_at or created_at) + timedelta(minutes=rng.randint(10, 10080))
+            updated_at = closed_at or assigned_at or created_at
+
+            rows.append((f'{subject.name}: {rng.choice(sentences)}'[:100], rng.choice(sentences),
+                         created_at, assigned_at, updated_at, closed_at,
+                         creator_id, assignee_id, sector.id, subject.id, status.id, priority.id))
+            ticket_meta.append((creator_id, assignee_id, created_at))
+        _bulk_insert(Ticket.__table__, ticket_columns, rows)
+        db.session.commit()
+        print(f"  {offset + size} tickets")
+
+    ticket_ids = _new_ids(Ticket, last_ticket_id)
+
+    # ------------------------------
+    # mensagens
+    # ------------------------------
+    print(f"Criando {message_count} mensagens...")
+    message_columns = ['message', 'created_at', 'ticket_id', 'author_id']
+    for offset in range(0, message_count if ticket_ids else 0, batch_size):
+        size = min(batch_size, message_count - offset)
+        rows = []
+        for _ in range(size):
+            # distribuição de cauda longa: poucos tickets concentram a maioria das mensagens
+            index = int(len(ticket_ids) * rng.random() ** 3)
+            creator_id, assignee_id, created_at = ticket_meta[index]
+            author_id = assignee_id if assignee_id and rng.random() < 0.5 else creator_id
+            rows.append((rng.choice(sentences), created_at + timedelta(seconds=rng.randint(60, 30 * 86400)),
+                         ticket_ids[index], author_id))
+        _bulk_insert(TicketMessage.__table__, message_columns, rows)
+        db.session.commit()
+        print(f"  {offset + size} mensagens")
+
+    # as inserções em lote não passam pelos eventos da sessão: os workers em execução
+    # esvaziam os contadores quando percebem a nova versão
+    ticket_counters.invalidate_everywhere(db.session)
+    db.session.commit()
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text('ANALYZE "user", user_sectors, ticket, ticket_message'))
+        db.session.commit()
+
+    print(f"Massa de dados criada em {time.monotonic() - started:.1f}s "
+          f"({len(user_ids)} usuários, {len(ticket_ids)} tickets, {message_count if ticket_ids else 0} mensagens). "
+          f"Senha dos usuários: 'fake'.")
+
+
+# varreduras completas (sem índice) nas tabelas grandes, consideradas regressão de plano
+SEQUENTIAL_SCAN_PATTERNS = [
+    re.compile(r'Seq Scan on (ticket|ticket_message)\b'),   # postgresql
+    re.compile(r'^SCAN (ticket|ticket_message)( AS \w+)?$'),  # sqlite
+]
+
+def _explain(statement, analyze: bool) -> list:
+    """Executa EXPLAIN sobre uma instrução e retorna as linhas do plano."""
+    dialect = db.engine.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+    if dialect.name == 'postgresql':
+        prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if analyze else 'EXPLAIN '
+        rows = db.session.connection().exec_driver_sql(prefix + sql).all()
+        return [row[0] for row in rows]
+
+    if dialect.name == 'sqlite':
+        rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + sql).all()
+        return [row[-1] for row in rows]
+
+    rows = db.session.connection().exec_driver_sql('EXPLAIN ' + sql).all()
+    return [' | '.join(str(value) for value in row) for row in rows]
+
+@click.command(name='explain-dashboard')
+@click.option('--user-id', type=int, default=None, help='Usuário usado nos filtros (padrão: o primeiro usuário).')
+@click.option('--ticket-id', type=int, default=None, help='Ticket usado na consulta de mensagens (padrão: o primeiro ticket).')
+@click.option('--analyze', is_flag=True, help='Usa EXPLAIN ANALYZE no PostgreSQL (executa as consultas).')
+@click.option('--strict', is_flag=True, help='Falha se alguma consulta fizer varredura sequencial em ticket ou ticket_message.')
+@with_appcontext
+def explain_dashboard(user_id, ticket_id, analyze, strict) -> None:
+    """Mostra o plano de execução de cada consulta do dashboard e do chat.
+
+    Com --strict, as varreduras sequenciais são desencorajadas no PostgreSQL
+    (enable_seqscan = off), de modo que uma varredura restante indica que
+    nenhum índice atende à consulta, e o comando termina com código 1.
+    """
+    from .queries import TICKET_LIST, user_ticket_filters, sector_ticket_filters
+    from .counters import OPEN_EXCLUDED_STATUSES, WORKING_STATUSES, SECTOR_OPEN_STATUSES
+    from .registry import registry
+
+    user = db.session.get(User, user_id) if user_id else User.query.order_by(User.id).first()
+    if not user:
+        print("Erro: nenhum usuário encontrado.")
+        raise SystemExit(1)
+
+    if ticket_id is None:
+        ticket_id = db.session.scalar(select(func.min(Ticket.id))) or 0
+
+    sector_ids = [sector.id for sector in user.sectors] or [0]
+    open_status_ids = registry.status_ids(OPEN_EXCLUDED_STATUSES, exclude=True) or [0]
+    working_status_ids = registry.status_ids(WORKING_STATUSES) or [0]
+    sector_status_ids = registry.status_ids(SECTOR_OPEN_STATUSES) or [0]
+
+    # as mesmas consultas emitidas pelas views
+    statements = {}
+    for sort_name in TICKET_LIST.sorts:
+        keys = [(sort_name, 'asc')]
+        statements[f'user_tickets[{sort_name}]'] = TICKET_LIST.page_query(
+            user_ticket_filters(user.id), keys).statement
+        statements[f'sector_user_tickets[{sort_name}]'] = TICKET_LIST.page_query(
+            sector_ticket_filters(sector_ids, sector_status_ids), keys).statement
+
+    statements['count[open_user_tickets]'] = select(func.count()).select_from(Ticket).where(
+        Ticket.creator_id == user.id, Ticket.status_id.in_(open_status_ids))
+    statements['count[assigned_user_tickets]'] = select(func.count()).select_from(Ticket).where(
+        Ticket.assignee_id == user.id, Ticket.status_id.in_(working_status_ids))
+    statements['count[sector_user_tickets]'] = select(func.count()).select_from(Ticket).where(
+        Ticket.sector_id.in_(sector_ids), Ticket.status_id.in_(sector_status_ids))
+    statements['ticket_messages'] = message_page_query(ticket_id)
+
+    if strict and db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+
+    regressions = []
+    try:
+        for name, statement in statements.items():
+            plan = _explain(statement, analyze)
+            print(f"== {name}")
+            for line in plan:
+                print(f"   {line}")
+                if any(pattern.search(line.strip()) for pattern in SEQUENTIAL_SCAN_PATTERNS):
+                    regressions.append(name)
+    finally:
+        db.session.rollback()
+
+    if regressions:
+        print(f"Varredura sequencial em: {', '.join(sorted(set(regressions)))}")
+        if strict:
+            raise SystemExit(1)
+    else:
+        print("Nenhuma varredura sequencial em ticket/ticket_message.")
+
+@click.command(name='socketio-broker')
+@click.option('--path', default=None, help='Caminho do socket Unix (padrão: o de SOCKETIO_MESSAGE_QUEUE=local://...).')
+@with_appcontext
+def socketio_broker(path) -> None:
+    """Inicia o broker local que distribui os eventos do Socket.IO entre os workers.
+
+    Use junto com SOCKETIO_MESSAGE_QUEUE=local:///caminho/do/socket quando não
+    houver PostgreSQL ou outro serviço de mensagens disponível.
+    """
+    from urllib.parse import urlparse
+    from flask import current_app
+    from .socket_bus import run_local_broker
+
+    if path is None:
+        url = current_app.config.get('SOCKETIO_MESSAGE_QUEUE', '')
+        if not url.startswith('local://'):
+            raise click.UsageError("Informe --path ou configure SOCKETIO_MESSAGE_QUEUE=local:///caminho/do/socket.")
+        path = urlparse(url).path
+
+    print(f"Broker do Socket.IO escutando em {path}")
+    try:
+        run_local_broker(path)
+    except KeyboardInterrupt:
+        print("Broker encerrado.")
+
+@click.command(name='export-tickets')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default='csv', show_default=True, help='Formato do arquivo.')
+@click.option('--output', type=click.File('w', encoding='utf-8', lazy=True), default='-', help='Arquivo de saída (padrão: saída padrão).')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Tickets criados a partir desta data (AAAA-MM-DD).')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Tickets criados até esta data, inclusive (AAAA-MM-DD).')
+@click.option('--sector', 'sector_ids', type=int, multiple=True, help='Id de setor (pode repetir; padrão: todos).')
+@click.option('--messages', 'include_messages', is_flag=True, help='Inclui as conversas dos tickets.')
+@click.option('--chunk-size', type=int, default=1000, show_default=True, help='Tickets lidos do banco por vez.')
+@with_appcontext
+def export_tickets(fmt, output, start, end, sector_ids, include_messages, chunk_size) -> None:
+    """Exporta os tickets em CSV ou JSONL, lendo o banco em lotes (memória constante)."""
+    from .exports import export_filters, export_tickets as generate_export
+
+    filters = export_filters(
+        start=start.date() if start else None,
+        end=end.date() if end else None,
+        sector_ids=list(sector_ids),
+    )
+    for chunk in generate_export(fmt, filters, include_messages, chunk_size):
+        output.write(chunk)
+
+@click.command(name='import-tickets')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default=None, help='Formato do arquivo (padrão: pela extensão).')
+@click.option('--chunk-size', type=int, default=1000, show_default=True, help='Registros validados e inseridos por transação.')
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False, writable=True), default=None, help='Grava os registros recusados (registro, erro) neste CSV.')
+@click.option('--checkpoint', 'key', default=None, help='Chave do checkpoint (padrão: o sha1 do arquivo).')
+@click.option('--restart', is_flag=True, help='Ignora o checkpoint e importa desde o início.')
+@with_appcontext
+def import_tickets(path, fmt, chunk_size, errors_path, key, restart) -> None:
+    """Importa tickets (e mensagens) de um CSV ou JSONL no formato de export-tickets.
+
+    Os registros são validados e inseridos em lotes, e o progresso fica gravado
+    no banco: rodar o comando de novo com o mesmo arquivo continua de onde a
+    importação anterior parou.
+    """
+    from .imports import import_tickets as run_import
+
+    if fmt is None:
+        fmt = 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+    errors_file = open(errors_path, 'w', encoding='utf-8', newline='') if errors_path else None
+    errors_writer = csv.writer(errors_file) if errors_file else None
+    if errors_writer:
+        errors_writer.writerow(['row', 'error'])
+
+    def on_error(row, errors):
+        if errors_writer:
+            errors_writer.writerows((row, error) for error in errors)
+
+    started = time.monotonic()
+    try:
+        with open(path, 'rb') as stream:
+            report = run_import(stream, fmt, key=key, chunk_size=chunk_size, restart=restart, on_error=on_error)
+    except (UnicodeDecodeError, csv.Error) as error:
+        print(f"Erro ao ler o arquivo: {error}. Os lotes já confirmados ficam no checkpoint.")
+        raise SystemExit(1)
+    finally:
+        if errors_file:
+            errors_file.close()
+
+    if report.resumed_from:
+        print(f"Continuando do registro {report.resumed_from + 1} (checkpoint {report.key}).")
+    for row, errors in report.errors[:20]:
+        print(f"  registro {row}: {'; '.join(errors)}")
+    if report.failed > 20:
+        print(f"  ... e mais {report.failed - 20} registros recusados" + (f" (veja {errors_path})." if errors_path else "."))
+    print(f"Importação concluída em {time.monotonic() - started:.1f}s: {report.imported} tickets e "
+          f"{report.messages} mensagens importados, {report.failed} registros recusados.")
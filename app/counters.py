@@ -0,0 +1,227 @@
+import os
+import threading
+import time
+from sqlalchemy import event, case, func, inspect, insert, select, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Ticket
+from app.models import Status
+from app.models import ReferenceVersion
+from app.registry import registry
+from app.registry import STATUS_OPEN, STATUS_WAITING, STATUS_IN_PROGRESS, STATUS_EDITED, STATUS_RESOLVED
+
+# status considerados em cada card do dashboard
+OPEN_EXCLUDED_STATUSES = [STATUS_RESOLVED]
+WORKING_STATUSES = [STATUS_IN_PROGRESS, STATUS_EDITED]
+SECTOR_OPEN_STATUSES = [STATUS_OPEN, STATUS_WAITING]
+
+# atributos do ticket que alteram algum contador
+COUNTED_ATTRIBUTES = ('status_id', 'assignee_id', 'sector_id', 'creator_id')
+
+# atributos que identificam as chaves do cache ('user' ou 'sector') afetadas pelo ticket;
+# o status não é uma chave: quando muda, afeta as chaves atuais do usuário e do setor
+COUNTER_KEYS = {'creator_id': 'user', 'assignee_id': 'user', 'sector_id': 'sector'}
+
+# linha de ReferenceVersion incrementada quando todos os processos devem esvaziar os contadores
+COUNTERS_VERSION_ID = 2
+
+class TicketCounters:
+    """Cache em processo dos contadores exibidos nos cards do dashboard.
+
+    Os valores são calculados sob demanda e guardados por usuário e por setor.
+    Alterações em tickets feitas pela sessão do SQLAlchemy invalidam apenas as
+    chaves afetadas, após o commit. O TTL limita o tempo em que outros processos
+    (workers do gunicorn) podem exibir um valor desatualizado. Alterações em
+    lote (importações, `seed-load`) chamam `invalidate_everywhere`, que
+    incrementa uma versão no banco; cada processo a verifica no máximo a cada
+    `check_interval` segundos e esvazia o seu cache quando ela muda.
+    """
+
+    def __init__(self, ttl: float = 30, check_interval: float = 5):
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._values = {}
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """Lê o TTL e o intervalo de verificação da versão da configuração da aplicação."""
+        app.config.setdefault('TICKET_COUNTERS_TTL', float(os.getenv('TICKET_COUNTERS_TTL', self.ttl)))
+        app.config.setdefault('TICKET_COUNTERS_CHECK_INTERVAL',
+                              float(os.getenv('TICKET_COUNTERS_CHECK_INTERVAL', self.check_interval)))
+        self.ttl = app.config['TICKET_COUNTERS_TTL']
+        self.check_interval = app.config['TICKET_COUNTERS_CHECK_INTERVAL']
+
+    def _check_version(self) -> None:
+        """Esvazia o cache se outro processo incrementou a versão dos contadores."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        version = db.session.scalar(
+            select(ReferenceVersion.version).where(ReferenceVersion.id == COUNTERS_VERSION_ID)) or 0
+        with self._lock:
+            if version != self._version:
+                self._values.clear()
+                self._version = version
+            self._checked_at = now
+
+    def _get(self, key):
+        self._check_version()
+        with self._lock:
+            entry = self._values.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _set(self, key, value) -> None:
+        with self._lock:
+            self._values[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, keys) -> None:
+        """Remove as chaves informadas do cache."""
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+    def clear(self) -> None:
+        """Esvazia todo o cache deste processo."""
+        with self._lock:
+            self._values.clear()
+            self._checked_at = 0.0
+
+    def invalidate_everywhere(self, session) -> None:
+        """Esvazia os contadores de todos os processos após o commit da transação atual da sessão.
+
+        Para alterações que não passam pelos eventos da sessão (inserções e
+        atualizações em lote): a versão é incrementada na mesma transação, e
+        os demais processos a percebem na próxima verificação.
+        """
+        connection = session.connection()
+        result = connection.execute(
+            update(ReferenceVersion).where(ReferenceVersion.id == COUNTERS_VERSION_ID)
+            .values(version=ReferenceVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(ReferenceVersion).values(id=COUNTERS_VERSION_ID, version=1))
+        # este processo esvazia o cache no commit (ver _invalidate_ticket_counters)
+        session.info.setdefault('ticket_counter_keys', set()).add('*')
+
+    def user_counts(self, user_id: int) -> dict:
+        """Retorna os contadores de um usuário.
+
+        Args:
+            user_id (int): O id do usuário.
+
+        Returns:
+            dict: 'open' (tickets abertos criados pelo usuário) e
+                  'assigned' (tickets em andamento atribuídos a ele).
+        """
+        key = ('user', user_id)
+        counts = self._get(key)
+        if counts is not None:
+            return counts
+
+        open_ids = registry.status_ids(OPEN_EXCLUDED_STATUSES, exclude=True)
+        working_ids = registry.status_ids(WORKING_STATUSES)
+
+        # os dois contadores numa única consulta
+        row = db.session.execute(
+            select(
+                func.coalesce(func.sum(case(
+                    ((Ticket.creator_id == user_id) & Ticket.status_id.in_(open_ids), 1), else_=0)), 0),
+                func.coalesce(func.sum(case(
+                    ((Ticket.assignee_id == user_id) & Ticket.status_id.in_(working_ids), 1), else_=0)), 0),
+            ).where((Ticket.creator_id == user_id) | (Ticket.assignee_id == user_id))
+        ).one()
+
+        counts = {'open': int(row[0]), 'assigned': int(row[1])}
+        self._set(key, counts)
+        return counts
+
+    def sector_count(self, sector_ids) -> int:
+        """Retorna a quantidade de tickets abertos ou aguardando nos setores informados.
+
+        Args:
+            sector_ids (list): Os ids dos setores.
+
+        Returns:
+            int: A soma dos contadores dos setores.
+        """
+        counts = {}
+        missing = []
+        for sector_id in sector_ids:
+            value = self._get(('sector', sector_id))
+            if value is None:
+                missing.append(sector_id)
+            else:
+                counts[sector_id] = value
+
+        # calcula os setores que faltam numa única consulta agrupada
+        if missing:
+            status_ids = registry.status_ids(SECTOR_OPEN_STATUSES)
+            rows = db.session.execute(
+                select(Ticket.sector_id, func.count())
+                .where(Ticket.sector_id.in_(missing), Ticket.status_id.in_(status_ids))
+                .group_by(Ticket.sector_id)
+            ).all()
+            found = dict(rows)
+            for sector_id in missing:
+                counts[sector_id] = found.get(sector_id, 0)
+                self._set(('sector', sector_id), counts[sector_id])
+
+        return sum(counts.values())
+
+ticket_counters = TicketCounters()
+
+def _affected_keys(ticket, changed: bool) -> set:
+    """Chaves do cache afetadas por um ticket inserido, alterado ou excluído.
+
+    Args:
+        ticket (Ticket): O ticket presente no flush.
+        changed (bool): True para tickets inseridos ou excluídos; para os alterados,
+            as chaves só são afetadas se algum atributo contado mudou.
+    """
+    state = inspect(ticket)
+    histories = [(name, state.attrs[name].history) for name in COUNTED_ATTRIBUTES]
+    if not changed and not any(history.has_changes() for _, history in histories):
+        return set()
+
+    # valores antigos e novos: um ticket movido afeta os dois setores/usuários
+    keys = set()
+    for name, history in histories:
+        kind = COUNTER_KEYS.get(name)
+        if kind is None:
+            continue
+        for value in history.sum():
+            if value is not None:
+                keys.add((kind, value))
+    return keys
+
+@event.listens_for(Session, 'after_flush')
+def _collect_ticket_changes(session, flush_context) -> None:
+    pending = session.info.setdefault('ticket_counter_keys', set())
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Ticket):
+            pending.update(_affected_keys(obj, changed=True))
+    for obj in session.dirty:
+        if isinstance(obj, Ticket):
+            pending.update(_affected_keys(obj, changed=False))
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Status):
+            # status renomeados ou removidos mudam os ids considerados em cada card
+            pending.add('*')
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_ticket_counters(session) -> None:
+    pending = session.info.pop('ticket_counter_keys', None)
+    if not pending:
+        return
+    if '*' in pending:
+        ticket_counters.clear()
+    else:
+        ticket_counters.invalidate(pending)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_ticket_changes(session, previous_transaction) -> None:
+    session.info.pop('ticket_counter_keys', None)
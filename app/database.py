@@ -0,0 +1,110 @@
+import logging
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+logger = logging.getLogger(__name__)
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+def _env_flag(name: str, default: bool) -> bool:
+    return os.getenv(name, '1' if default else '0') == '1'
+
+def configure_engine(app) -> None:
+    """Monta SQLALCHEMY_ENGINE_OPTIONS a partir das variáveis de ambiente (antes de `db.init_app`).
+
+    Variáveis:
+        DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT: dimensionamento do pool (QueuePool).
+        DB_POOL_PRE_PING: testa a conexão antes de usá-la (padrão: 1).
+        DB_POOL_RECYCLE: recicla conexões mais antigas que N segundos (padrão: 1800).
+        DB_STATEMENT_TIMEOUT_MS: statement_timeout do PostgreSQL (padrão: 0, desligado).
+        DB_PGBOUNCER: modo para PgBouncer com pool por transação (padrão: 0).
+
+    No modo PgBouncer o pool fica a cargo dele: o SQLAlchemy abre e fecha uma
+    conexão por uso (NullPool) e o statement_timeout é aplicado com SET LOCAL em
+    cada transação, já que o PgBouncer não repassa opções de inicialização. O
+    LISTEN/NOTIFY do Socket.IO não funciona através dele e precisa de uma url
+    direta (SOCKETIO_DATABASE_URL, verificada em `socket_bus.socketio_options`).
+    """
+    app.config.setdefault('DB_PGBOUNCER', _env_flag('DB_PGBOUNCER', False))
+    app.config.setdefault('DB_STATEMENT_TIMEOUT_MS', _env_int('DB_STATEMENT_TIMEOUT_MS', 0))
+
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    backend = url.get_backend_name()
+
+    # sqlite em memória usa um pool próprio, sem estas opções
+    if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+        return
+
+    if backend == 'postgresql' and app.config['DB_PGBOUNCER']:
+        options.setdefault('poolclass', NullPool)
+        return
+
+    options.setdefault('pool_size', _env_int('DB_POOL_SIZE', 5))
+    options.setdefault('max_overflow', _env_int('DB_MAX_OVERFLOW', 10))
+    options.setdefault('pool_timeout', _env_int('DB_POOL_TIMEOUT', 30))
+    options.setdefault('pool_pre_ping', _env_flag('DB_POOL_PRE_PING', True))
+    options.setdefault('pool_recycle', _env_int('DB_POOL_RECYCLE', 1800))
+
+    timeout = app.config['DB_STATEMENT_TIMEOUT_MS']
+    if backend == 'postgresql' and timeout:
+        connect_args = options.setdefault('connect_args', {})
+        connect_args['options'] = f"{connect_args.get('options', '')} -c statement_timeout={timeout}".strip()
+
+def init_engine(app, engine) -> None:
+    """Ajustes que dependem do engine já criado (chamado dentro do contexto da aplicação)."""
+    timeout = app.config['DB_STATEMENT_TIMEOUT_MS']
+    if engine.dialect.name == 'postgresql' and app.config['DB_PGBOUNCER'] and timeout:
+        @event.listens_for(engine, 'begin')
+        def _set_statement_timeout(conn):
+            conn.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout)}')
+
+    if engine.dialect.name == 'postgresql' and engine.dialect.driver == 'psycopg2':
+        green_psycopg2(app.config.get('SOCKETIO_ASYNC_MODE'))
+
+def green_psycopg2(async_mode: str) -> bool:
+    """Faz o psycopg2 ceder o hub do eventlet enquanto espera o banco.
+
+    O psycopg2 é uma extensão em C: sem isso, cada consulta bloqueia todas as
+    green threads do processo até a resposta do banco. É aplicado sempre que o
+    modo assíncrono é o eventlet, mesmo que o monkey patch ainda não tenha sido
+    feito quando a aplicação é criada (como no `run.py`); nesse caso um aviso
+    lembra que o restante da E/S bloqueante continua bloqueando o hub.
+
+    Returns:
+        bool: True se o psycopg2 ficou cooperativo.
+
+    Raises:
+        RuntimeError: Se o modo for o eventlet e ele não estiver instalado.
+    """
+    if async_mode != 'eventlet':
+        return False
+    try:
+        from eventlet.patcher import is_monkey_patched
+    except ImportError:
+        raise RuntimeError('async_mode eventlet sem o eventlet instalado: o psycopg2 bloquearia o servidor')
+    if not is_monkey_patched('socket'):
+        logger.warning('eventlet sem monkey patch: o psycopg2 foi tornado cooperativo, mas o restante '
+                       'da E/S bloqueante continua bloqueando o hub (use o worker eventlet do gunicorn '
+                       'ou eventlet.monkey_patch() antes de importar a aplicação)')
+
+    from eventlet.hubs import trampoline
+    from psycopg2 import OperationalError, extensions
+
+    def eventlet_wait_callback(conn, timeout=-1):
+        while True:
+            state = conn.poll()
+            if state == extensions.POLL_OK:
+                break
+            elif state == extensions.POLL_READ:
+                trampoline(conn.fileno(), read=True)
+            elif state == extensions.POLL_WRITE:
+                trampoline(conn.fileno(), write=True)
+            else:
+                raise OperationalError(f'Bad result from poll: {state!r}')
+
+    extensions.set_wait_callback(eventlet_wait_callback)
+    return True
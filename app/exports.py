@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from app import db
+from app.models import Ticket
+from app.models import TicketMessage
+from app.models import User
+from app.models import Sector
+from app.models import Subject
+from app.models import Status
+from app.models import Priority
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+# linhas lidas do cursor do banco (e enviadas ao cliente) por vez
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    'id', 'title', 'description', 'sector', 'subject', 'status', 'priority', 'creator', 'assignee',
+    'created_at', 'assigned_at', 'updated_at', 'closed_at',
+]
+
+def export_filters(start: date = None, end: date = None, sector_ids=()) -> list:
+    """Filtros da exportação: período de criação (datas inclusivas) e setores."""
+    filters = []
+    if start is not None:
+        filters.append(Ticket.created_at >= datetime.combine(start, datetime.min.time()))
+    if end is not None:
+        filters.append(Ticket.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    if sector_ids:
+        filters.append(Ticket.sector_id.in_(sector_ids))
+    return filters
+
+def export_query(filters=()):
+    """Monta a consulta das linhas exportadas, com os nomes no lugar dos ids, em ordem de id."""
+    creator = aliased(User)
+    assignee = aliased(User)
+    return (
+        select(
+            Ticket.id, Ticket.title, Ticket.description,
+            Sector.name.label('sector'), Subject.name.label('subject'),
+            Status.name.label('status'), Priority.name.label('priority'),
+            creator.username.label('creator'), assignee.username.label('assignee'),
+            Ticket.created_at, Ticket.assigned_at, Ticket.updated_at, Ticket.closed_at,
+        )
+        .join(Sector, Sector.id == Ticket.sector_id)
+        .join(Subject, Subject.id == Ticket.subject_id)
+        .join(Status, Status.id == Ticket.status_id)
+        .join(Priority, Priority.id == Ticket.priority_id)
+        .join(creator, creator.id == Ticket.creator_id)
+        .outerjoin(assignee, assignee.id == Ticket.assignee_id)
+        .where(*filters)
+        .order_by(Ticket.id)
+    )
+
+def _thread(ticket_ids) -> dict:
+    """Mensagens dos tickets informados (um lote), agrupadas por ticket em ordem cronológica."""
+    threads = {ticket_id: [] for ticket_id in ticket_ids}
+    rows = db.session.execute(
+        select(TicketMessage.ticket_id, TicketMessage.id, User.username, TicketMessage.message,
+               TicketMessage.created_at)
+        .join(User, User.id == TicketMessage.author_id)
+        .where(TicketMessage.ticket_id.in_(ticket_ids))
+        .order_by(TicketMessage.ticket_id, TicketMessage.id)
+    )
+    for ticket_id, message_id, author, message, created_at in rows:
+        threads[ticket_id].append({
+            'id': message_id,
+            'author': author,
+            'message': message,
+            'created_at': created_at.isoformat() if created_at else None,
+        })
+    return threads
+
+def _record(row) -> dict:
+    record = dict(row._mapping)
+    for key in ('created_at', 'assigned_at', 'updated_at', 'closed_at'):
+        record[key] = record[key].isoformat() if record[key] else None
+    return record
+
+def export_tickets(fmt: str = 'csv', filters=(), include_messages: bool = False, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Gera a exportação em pedaços de texto, um por lote de `chunk_size` tickets.
+
+    As linhas vêm de um cursor do lado do servidor (yield_per), então a memória
+    usada não depende do total exportado. Com `include_messages`, as mensagens
+    de cada lote são lidas numa única consulta e vão na coluna/campo `messages`
+    (no CSV, como uma lista JSON).
+
+    Args:
+        fmt (str): 'csv' ou 'jsonl'.
+        filters (list, optional): Filtros de `export_filters`.
+        include_messages (bool, optional): Inclui as conversas dos tickets.
+        chunk_size (int, optional): Tickets por lote.
+
+    Yields:
+        str: Um pedaço do arquivo exportado.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'Formato de exportação inválido: {fmt}')
+
+    columns = EXPORT_COLUMNS + (['messages'] if include_messages else [])
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns) if fmt == 'csv' else None
+    if writer:
+        writer.writeheader()
+
+    result = db.session.execute(export_query(filters).execution_options(yield_per=chunk_size))
+    for rows in result.partitions():
+        records = [_record(row) for row in rows]
+        if include_messages:
+            threads = _thread([record['id'] for record in records])
+            for record in records:
+                record['messages'] = threads[record['id']]
+
+        for record in records:
+            if writer:
+                if include_messages:
+                    record['messages'] = json.dumps(record['messages'], ensure_ascii=False)
+                writer.writerow(record)
+            else:
+                buffer.write(json.dumps(record, ensure_ascii=False))
+                buffer.write('\n')
+
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # sem tickets, o csv ainda tem o cabeçalho
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app import db
+from app.models import User
+from app.models import Sector
+from app.models import user_sectors
+
+class IdentityCache:
+    """Cache em processo do usuário autenticado, usado pelo `user_loader`.
+
+    Guarda as colunas do usuário e os ids dos seus setores por alguns segundos,
+    evitando as duas consultas (usuário e setores) a cada requisição. Na leitura
+    o usuário é reconstruído e associado à sessão sem consultar o banco
+    (`merge(load=False)`). Alterações em usuários ou nos membros de um setor
+    feitas pela sessão descartam as entradas afetadas após o commit; o TTL
+    limita o tempo em que os outros processos podem usar dados antigos.
+    """
+
+    def __init__(self, ttl: float = 15):
+        self.ttl = ttl
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """Lê o TTL da configuração da aplicação."""
+        app.config.setdefault('USER_CACHE_TTL', float(os.getenv('USER_CACHE_TTL', self.ttl)))
+        self.ttl = app.config['USER_CACHE_TTL']
+
+    def invalidate(self, user_ids) -> None:
+        """Remove os usuários informados do cache."""
+        with self._lock:
+            for user_id in user_ids:
+                self._values.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Esvazia todo o cache."""
+        with self._lock:
+            self._values.clear()
+
+    def load(self, user_id: int):
+        """Retorna o usuário com os ids dos setores já carregados, ou None se não existir."""
+        with self._lock:
+            entry = self._values.get(user_id)
+
+        if entry is None or entry[0] <= time.monotonic():
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            sector_ids = tuple(db.session.scalars(
+                select(user_sectors.c.sector_id).where(user_sectors.c.user_id == user_id)))
+            values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+            with self._lock:
+                self._values[user_id] = (time.monotonic() + self.ttl, values, sector_ids)
+            user._sector_ids = sector_ids
+            return user
+
+        _, values, sector_ids = entry
+        # reconstrói a instância como se tivesse vindo de uma consulta e a associa à sessão
+        user = User(**values)
+        make_transient_to_detached(user)
+        user = db.session.merge(user, load=False)
+        user._sector_ids = sector_ids
+        return user
+
+identity_cache = IdentityCache()
+
+@event.listens_for(Session, 'after_flush')
+def _collect_user_changes(session, flush_context) -> None:
+    pending = session.info.setdefault('identity_cache_keys', set())
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            pending.add(obj.id)
+        elif isinstance(obj, Sector):
+            # os membros do setor removido não estão carregados
+            pending.add('*')
+    for obj in session.dirty:
+        if isinstance(obj, User) and session.is_modified(obj):
+            pending.add(obj.id)
+        elif isinstance(obj, Sector):
+            # membros adicionados ou removidos pela relação Sector.users
+            history = inspect(obj).attrs.users.history
+            pending.update(user.id for user in [*history.added, *history.deleted])
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_identities(session) -> None:
+    pending = session.info.pop('identity_cache_keys', None)
+    if not pending:
+        return
+    if '*' in pending:
+        identity_cache.clear()
+    else:
+        identity_cache.invalidate(pending)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_user_changes(session, previous_transaction) -> None:
+    session.info.pop('identity_cache_keys', None)
@@ -0,0 +1,311 @@
+import csv
+import hashlib
+import io
+import json
+from datetime import datetime
+from sqlalchemy import insert, select
+from app import db
+from app.models import Ticket
+from app.models import TicketMessage
+from app.models import User
+from app.models import ImportCheckpoint
+from app.registry import registry, STATUS_OPEN
+from app.exports import EXPORT_FORMATS
+
+IMPORT_FORMATS = EXPORT_FORMATS
+
+# registros validados e inseridos (numa transação) por vez
+IMPORT_CHUNK_SIZE = 1000
+
+# erros guardados no relatório devolvido (os demais são apenas contados)
+IMPORT_REPORT_LIMIT = 500
+
+TITLE_MAX_LENGTH = Ticket.title.property.columns[0].type.length
+
+class ImportReport:
+    """Resultado de uma importação.
+
+    Attributes:
+        key (str): A chave do checkpoint (o sha1 do arquivo, se não informada).
+        resumed_from (int): Registros já processados numa execução anterior (pulados).
+        position (int): Registros lidos do arquivo, incluindo os pulados.
+        imported (int): Tickets gravados nesta execução.
+        messages (int): Mensagens gravadas nesta execução.
+        failed (int): Registros recusados nesta execução.
+        errors (list): Até IMPORT_REPORT_LIMIT pares (registro, lista de mensagens de erro).
+    """
+
+    def __init__(self, key: str, resumed_from: int = 0):
+        self.key = key
+        self.resumed_from = resumed_from
+        self.position = resumed_from
+        self.imported = 0
+        self.messages = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row: int, errors: list) -> None:
+        self.failed += 1
+        if len(self.errors) < IMPORT_REPORT_LIMIT:
+            self.errors.append((row, errors))
+
+    def to_dict(self) -> dict:
+        return {
+            'key': self.key,
+            'resumed_from': self.resumed_from,
+            'position': self.position,
+            'imported': self.imported,
+            'messages': self.messages,
+            'failed': self.failed,
+            'errors': [{'row': row, 'errors': errors} for row, errors in self.errors],
+        }
+
+class ImportLookups:
+    """Mapas nome -> id usados para resolver os registros, montados uma única vez por importação."""
+
+    def __init__(self):
+        self.sectors = {sector.name: sector.id for sector in registry.sectors()}
+        self.subjects = {subject.name: subject for subject in registry.subjects()}
+        self.statuses = {status.name: status.id for status in registry.statuses()}
+        self.priorities = {priority.name: priority.id for priority in registry.priorities()}
+        self.users = dict(db.session.execute(select(User.username, User.id)).all())
+
+    def _name(self, record: dict, field: str, mapping: dict, errors: list, required: bool = True):
+        name = _text(record.get(field))
+        if not name:
+            if required:
+                errors.append(f'{field}: obrigatório')
+            return None
+        value = mapping.get(name)
+        if value is None:
+            errors.append(f'{field}: "{name}" não encontrado')
+        return value
+
+    def resolve(self, record: dict) -> tuple:
+        """Valida um registro e o converte nas colunas de Ticket e nas suas mensagens.
+
+        Returns:
+            tuple: (valores do ticket, lista de mensagens, lista de erros).
+        """
+        errors = []
+
+        title = _text(record.get('title'))
+        if not title:
+            errors.append('title: obrigatório')
+        elif len(title) > TITLE_MAX_LENGTH:
+            errors.append(f'title: mais de {TITLE_MAX_LENGTH} caracteres')
+        description = _text(record.get('description'))
+        if not description:
+            errors.append('description: obrigatório')
+
+        sector_id = self._name(record, 'sector', self.sectors, errors)
+        subject = self._name(record, 'subject', self.subjects, errors)
+        if sector_id is not None and subject is not None and sector_id not in subject.sector_ids:
+            errors.append(f'subject: "{subject.name}" não pertence ao setor "{_text(record.get("sector"))}"')
+        priority_id = self._name(record, 'priority', self.priorities, errors)
+        status_id = self._name(record, 'status', self.statuses, errors, required=False)
+        creator_id = self._name(record, 'creator', self.users, errors)
+        assignee_id = self._name(record, 'assignee', self.users, errors, required=False)
+
+        dates = {}
+        for field in ('created_at', 'assigned_at', 'updated_at', 'closed_at'):
+            dates[field] = _datetime(record.get(field), field, errors)
+
+        messages = _messages(record.get('messages'), self.users, errors)
+
+        if errors:
+            return None, None, errors
+
+        created_at = dates['created_at'] or datetime.utcnow()
+        values = {
+            'title': title,
+            'description': description,
+            'created_at': created_at,
+            'assigned_at': dates['assigned_at'],
+            'updated_at': dates['updated_at'] or created_at,
+            'closed_at': dates['closed_at'],
+            'creator_id': creator_id,
+            'assignee_id': assignee_id,
+            'sector_id': sector_id,
+            'subject_id': subject.id,
+            'status_id': status_id or registry.status_id(STATUS_OPEN),
+            'priority_id': priority_id,
+        }
+        for message in messages:
+            message['created_at'] = message['created_at'] or created_at
+        return values, messages, []
+
+def _text(value) -> str:
+    return '' if value is None else str(value).strip()
+
+def _datetime(value, field: str, errors: list):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        return datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        errors.append(f'{field}: data inválida "{value}"')
+        return None
+
+def _messages(value, users: dict, errors: list) -> list:
+    """Converte as mensagens de um registro (lista no JSONL, lista JSON no CSV, como na exportação)."""
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            errors.append('messages: JSON inválido')
+            return []
+    if not isinstance(value, list):
+        errors.append('messages: deve ser uma lista')
+        return []
+
+    messages = []
+    for index, item in enumerate(value, start=1):
+        if not isinstance(item, dict):
+            errors.append(f'messages[{index}]: deve ser um objeto')
+            continue
+        text = _text(item.get('message'))
+        if not text:
+            errors.append(f'messages[{index}].message: obrigatório')
+        author = _text(item.get('author'))
+        author_id = users.get(author)
+        if author_id is None:
+            errors.append(f'messages[{index}].author: "{author}" não encontrado')
+        created_at = _datetime(item.get('created_at'), f'messages[{index}].created_at', errors)
+        messages.append({'message': text, 'author_id': author_id, 'created_at': created_at})
+    return messages
+
+def file_key(stream) -> str:
+    """Chave do checkpoint de um arquivo: o sha1 do conteúdo (lido em blocos; o arquivo volta ao início)."""
+    digest = hashlib.sha1()
+    for block in iter(lambda: stream.read(1 << 20), b''):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def read_records(stream, fmt: str):
+    """Lê os registros de um arquivo binário CSV ou JSONL, um por vez.
+
+    Yields:
+        tuple: (número do registro, a partir de 1; dicionário, ou None se a linha for inválida).
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        for number, record in enumerate(csv.DictReader(text), start=1):
+            yield number, record
+        return
+
+    number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield number, record if isinstance(record, dict) else None
+
+def _insert_chunk(rows: list) -> int:
+    """Insere os tickets válidos de um lote e as suas mensagens; retorna o número de mensagens."""
+    if not rows:
+        return 0
+    # um INSERT ... VALUES com várias linhas por vez; os ids voltam na ordem dos registros
+    ticket_ids = db.session.scalars(
+        insert(Ticket).returning(Ticket.id, sort_by_parameter_order=True),
+        [values for values, _ in rows],
+    ).all()
+    messages = [dict(message, ticket_id=ticket_id)
+                for ticket_id, (_, ticket_messages) in zip(ticket_ids, rows)
+                for message in ticket_messages]
+    if messages:
+        db.session.execute(insert(TicketMessage), messages)
+    return len(messages)
+
+def import_tickets(stream, fmt: str, key: str = None, chunk_size: int = IMPORT_CHUNK_SIZE,
+                   restart: bool = False, on_error=None) -> ImportReport:
+    """Importa tickets (e, opcionalmente, as suas mensagens) de um arquivo CSV ou JSONL.
+
+    As colunas são as da exportação: setor, assunto, status, prioridade e usuários
+    vêm pelo nome e são resolvidos por `ImportLookups`. Cada lote de `chunk_size`
+    registros é validado, inserido e confirmado junto com o checkpoint da
+    importação; se ela for interrompida, a próxima execução com a mesma chave
+    continua do primeiro registro que não foi confirmado. Registros inválidos são
+    pulados e relatados, sem impedir os demais.
+
+    Args:
+        stream: O arquivo, aberto em modo binário.
+        fmt (str): 'csv' ou 'jsonl'.
+        key (str, optional): Chave do checkpoint (padrão: o sha1 do arquivo).
+        chunk_size (int, optional): Registros por lote.
+        restart (bool, optional): Ignora o checkpoint e importa desde o início.
+        on_error (callable, optional): Chamada com (registro, erros) para cada registro recusado.
+
+    Returns:
+        ImportReport: O resultado da importação.
+    """
+    from app.counters import ticket_counters
+    from app.routing import routing
+
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f'Formato de importação inválido: {fmt}')
+    if key is None:
+        key = file_key(stream)
+
+    checkpoint = db.session.scalar(select(ImportCheckpoint).where(ImportCheckpoint.key == key))
+    if checkpoint is None:
+        checkpoint = ImportCheckpoint(key=key, position=0, imported=0, failed=0)
+        db.session.add(checkpoint)
+    elif restart:
+        checkpoint.position = checkpoint.imported = checkpoint.failed = 0
+
+    report = ImportReport(key, resumed_from=checkpoint.position)
+    previous_imported, previous_failed = checkpoint.imported, checkpoint.failed
+    lookups = ImportLookups()
+
+    def flush(rows: list, position: int) -> None:
+        # os tickets do lote e o novo checkpoint são confirmados na mesma transação
+        report.messages += _insert_chunk(rows)
+        report.imported += len(rows)
+        report.position = position
+        checkpoint.position = position
+        checkpoint.imported = previous_imported + report.imported
+        checkpoint.failed = previous_failed + report.failed
+        # as inserções em lote não passam pelos eventos da sessão que mantêm os contadores
+        if rows:
+            ticket_counters.invalidate_everywhere(db.session)
+        db.session.commit()
+
+    rows = []
+    position = report.position
+    try:
+        for number, record in read_records(stream, fmt):
+            if number <= report.resumed_from:
+                continue
+            position = number
+            if record is None:
+                values, messages, errors = None, None, ['registro inválido']
+            else:
+                values, messages, errors = lookups.resolve(record)
+            if errors:
+                report.add_error(number, errors)
+                if on_error:
+                    on_error(number, errors)
+            else:
+                rows.append((values, messages))
+
+            if number % chunk_size == 0:
+                flush(rows, position)
+                rows = []
+        flush(rows, position)
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        # as inserções em lote não passam pelos eventos da sessão
+        if report.imported:
+            routing.invalidate()
+
+    return report
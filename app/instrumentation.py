@@ -0,0 +1,166 @@
+import functools
+import json
+import logging
+import os
+import re
+import time
+from flask import g, has_app_context, request
+from flask.logging import default_handler
+from sqlalchemy import event
+from app import db
+
+logger = logging.getLogger('app.sql')
+
+# listas de parâmetros (IN (?, ?, ?)) e literais, trocados para agrupar consultas iguais no log
+_PARAMETER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_PARAMETER_LIST = re.compile(r'\(\s*' + _PARAMETER + r'(?:\s*,\s*' + _PARAMETER + r')+\s*\)')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_sql(statement: str) -> str:
+    """Normaliza uma instrução SQL para o log: sem literais, listas de parâmetros ou quebras de linha."""
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _PARAMETER_LIST.sub('(...)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+class QueryStats:
+    """Estatísticas das consultas de uma requisição ou de um evento do Socket.IO."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        if duration > self.slowest:
+            self.slowest = duration
+            self.slowest_statement = statement
+
+    def as_dict(self) -> dict:
+        return {
+            'queries': self.count,
+            'db_ms': round(self.total * 1000, 2),
+            'slowest_ms': round(self.slowest * 1000, 2),
+            'elapsed_ms': round((time.perf_counter() - self.started) * 1000, 2),
+        }
+
+class SQLInstrumentation:
+    """Instrumentação opcional (SQL_INSTRUMENTATION=1) das consultas ao banco.
+
+    Conta as instruções, o tempo total no banco e a mais lenta de cada
+    requisição HTTP e de cada evento do Socket.IO decorado com `socket_event`.
+    O resultado vai no cabeçalho Server-Timing e numa linha de log em JSON
+    (logger `app.sql`). Instruções acima de SQL_SLOW_QUERY_MS são registradas
+    com o SQL normalizado.
+    """
+
+    def __init__(self, slow_query_ms: float = 100):
+        self.enabled = False
+        self.slow_query_ms = slow_query_ms
+
+    def init_app(self, app) -> None:
+        """Registra os eventos do engine e os hooks da requisição, se a instrumentação estiver ativa."""
+        app.config.setdefault('SQL_INSTRUMENTATION', os.getenv('SQL_INSTRUMENTATION', '0') == '1')
+        app.config.setdefault('SQL_SLOW_QUERY_MS', float(os.getenv('SQL_SLOW_QUERY_MS', self.slow_query_ms)))
+        self.enabled = app.config['SQL_INSTRUMENTATION']
+        self.slow_query_ms = app.config['SQL_SLOW_QUERY_MS']
+        if not self.enabled:
+            return
+
+        if logger.level == logging.NOTSET:
+            logger.setLevel(logging.INFO)
+        if not logger.handlers:
+            # mesmo formato e destino do log do flask
+            logger.addHandler(default_handler)
+            logger.propagate = False
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(engine, 'handle_error', self._handle_error)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    # ------------------------------
+    # eventos do engine
+    # ------------------------------
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info['query_started'].pop()
+        duration = time.perf_counter() - started
+
+        if duration * 1000 >= self.slow_query_ms:
+            logger.warning(json.dumps({'event': 'slow_query', 'ms': round(duration * 1000, 2),
+                                       'sql': normalize_sql(statement)}))
+
+        stats = g.get('query_stats') if has_app_context() else None
+        if stats is not None:
+            stats.record(statement, duration)
+
+    def _handle_error(self, context) -> None:
+        started = context.connection.info.get('query_started') if context.connection is not None else None
+        if started:
+            started.pop()
+
+    # ------------------------------
+    # requisições http
+    # ------------------------------
+    def _start_request(self) -> None:
+        g.query_stats = QueryStats()
+
+    def _finish_request(self, response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+
+        response.headers.add('Server-Timing', self.server_timing(stats))
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            **stats.as_dict(),
+            'slowest_sql': normalize_sql(stats.slowest_statement) if stats.slowest_statement else None,
+        }))
+        return response
+
+    @staticmethod
+    def server_timing(stats: QueryStats) -> str:
+        """Monta o valor do cabeçalho Server-Timing com as métricas do banco."""
+        return (f'db;desc="{stats.count} queries";dur={stats.total * 1000:.2f}, '
+                f'db-slowest;dur={stats.slowest * 1000:.2f}')
+
+    # ------------------------------
+    # eventos do socket.io
+    # ------------------------------
+    def socket_event(self, handler):
+        """Decorador para os handlers do Socket.IO: registra as consultas de cada evento."""
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return handler(*args, **kwargs)
+
+            g.query_stats = stats = QueryStats()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                g.pop('query_stats', None)
+                logger.info(json.dumps({
+                    'event': 'socketio',
+                    'handler': handler.__name__,
+                    **stats.as_dict(),
+                    'slowest_sql': normalize_sql(stats.slowest_statement) if stats.slowest_statement else None,
+                }))
+        return wrapper
+
+sql_instrumentation = SQLInstrumentation()
@@ -0,0 +1,190 @@
+import atexit
+import logging
+import os
+import signal
+import threading
+import uuid
+from datetime import datetime
+from sqlalchemy import insert
+from app import db, socketio
+from app.models import TicketMessage
+from app.messages import message_room
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class MessageWriteBehind:
+    """Gravação adiada (write-behind) das mensagens enviadas pelo socket do chat.
+
+    Quando ativada (CHAT_WRITE_BEHIND=1), a mensagem é transmitida para a sala
+    imediatamente, com um id provisório, e guardada numa fila em memória. Uma
+    tarefa em segundo plano grava a fila a cada `flush_interval` segundos (ou ao
+    atingir `batch_size` mensagens) num único INSERT de várias linhas e avisa a
+    sala com o evento `message_persisted`, que troca o id provisório pelo real.
+    A fila restante é gravada ao encerrar o processo: no atexit, no SIGTERM
+    (fora do gunicorn) e nos ganchos worker_exit/worker_int/worker_abort do
+    gunicorn.conf.py.
+    """
+
+    def __init__(self, flush_interval: float = 0.02, batch_size: int = 100, max_attempts: int = 5):
+        self.enabled = False
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._previous_handlers = {}
+        self.app = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task = None
+
+    def init_app(self, app) -> None:
+        """Lê a configuração e registra a gravação da fila no encerramento do processo."""
+        app.config.setdefault('CHAT_WRITE_BEHIND', os.getenv('CHAT_WRITE_BEHIND', '0') == '1')
+        app.config.setdefault('CHAT_FLUSH_INTERVAL_MS',
+                              float(os.getenv('CHAT_FLUSH_INTERVAL_MS', self.flush_interval * 1000)))
+        app.config.setdefault('CHAT_FLUSH_BATCH_SIZE', int(os.getenv('CHAT_FLUSH_BATCH_SIZE', self.batch_size)))
+        app.config.setdefault('CHAT_FLUSH_MAX_ATTEMPTS', int(os.getenv('CHAT_FLUSH_MAX_ATTEMPTS', self.max_attempts)))
+
+        self.enabled = app.config['CHAT_WRITE_BEHIND']
+        self.flush_interval = app.config['CHAT_FLUSH_INTERVAL_MS'] / 1000
+        self.batch_size = app.config['CHAT_FLUSH_BATCH_SIZE']
+        self.max_attempts = app.config['CHAT_FLUSH_MAX_ATTEMPTS']
+        self.app = app
+
+        if self.enabled:
+            atexit.register(self.flush)
+            # o atexit não roda quando o processo é encerrado por um sinal; sob o gunicorn,
+            # que já trata os sinais do worker, quem grava a fila são os ganchos do gunicorn.conf.py
+            if signal.getsignal(signal.SIGTERM) in (signal.SIG_DFL, None):
+                try:
+                    self._previous_handlers[signal.SIGTERM] = signal.SIG_DFL
+                    signal.signal(signal.SIGTERM, self._flush_on_signal)
+                except ValueError:
+                    # fora da thread principal não é possível registrar sinais
+                    pass
+
+    def submit(self, ticket_id: int, author_id: int, message: str) -> dict:
+        """Enfileira uma mensagem e a transmite para a sala do ticket.
+
+        Returns:
+            dict: A mensagem no formato do chat, com o id provisório.
+        """
+        payload = {
+            'id': f'p-{uuid.uuid4().hex}',
+            'ticket_id': ticket_id,
+            'author_id': author_id,
+            'message': message,
+            'created_at': datetime.utcnow().isoformat(),
+            'provisional': True,
+        }
+
+        with self._lock:
+            self._pending.append(payload)
+            full = len(self._pending) >= self.batch_size
+            if self._task is None:
+                self._task = socketio.start_background_task(self._run)
+
+        socketio.emit('new_message', payload, to=message_room(ticket_id))
+        if full:
+            socketio.start_background_task(self.flush)
+        return payload
+
+    def _run(self) -> None:
+        while True:
+            socketio.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Falha ao gravar as mensagens do chat; nova tentativa no próximo ciclo.')
+
+    def _insert(self, items: list) -> list:
+        """Grava as mensagens num único INSERT de várias linhas e retorna os ids, na ordem da lista."""
+        rows = [{
+            'ticket_id': item['ticket_id'],
+            'author_id': item['author_id'],
+            'message': item['message'],
+            'created_at': datetime.fromisoformat(item['created_at']),
+        } for item in items]
+        try:
+            ids = db.session.scalars(
+                insert(TicketMessage).returning(TicketMessage.id, sort_by_parameter_order=True),
+                rows,
+            ).all()
+            db.session.commit()
+            return ids
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def flush(self) -> int:
+        """Grava as mensagens pendentes e retorna quantas foram gravadas.
+
+        O lote vai num único INSERT. Se ele falhar por causa de uma linha (por
+        exemplo, o ticket foi excluído entre o envio e a gravação), as mensagens
+        são gravadas uma a uma; as que ainda falham são descartadas, com um log
+        e o evento `message_failed` para a sala, e não travam a fila. Se o banco
+        estiver indisponível (nenhuma linha entra), o lote volta para a fila,
+        até `max_attempts` tentativas.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            persisted = []
+            failed = []
+            with self.app.app_context():
+                try:
+                    persisted = list(zip(batch, self._insert(batch)))
+                except Exception:
+                    logger.warning('Falha ao gravar um lote de %s mensagens do chat; gravando uma a uma.',
+                                   len(batch), exc_info=True)
+                    for item in batch:
+                        try:
+                            persisted.append((item, self._insert([item])[0]))
+                        except Exception:
+                            failed.append(item)
+
+            if failed and not persisted:
+                # nenhuma linha entrou: provavelmente o banco, não as mensagens
+                retry = [item for item in failed if item.setdefault('attempts', 0) < self.max_attempts - 1]
+                for item in retry:
+                    item['attempts'] += 1
+                failed = [item for item in failed if item not in retry]
+                with self._lock:
+                    self._pending[:0] = retry
+
+            for item in failed:
+                logger.error('Mensagem do chat descartada após falhar ao gravar (ticket %s, autor %s).',
+                             item['ticket_id'], item['author_id'])
+                socketio.emit('message_failed', {
+                    'ticket_id': item['ticket_id'],
+                    'provisional_id': item['id'],
+                }, to=message_room(item['ticket_id']))
+
+            if persisted:
+                metrics.messages_persisted(len(persisted))
+            for item, message_id in persisted:
+                socketio.emit('message_persisted', {
+                    'ticket_id': item['ticket_id'],
+                    'provisional_id': item['id'],
+                    'id': message_id,
+                }, to=message_room(item['ticket_id']))
+            return len(persisted)
+
+    def _flush_on_signal(self, signum, frame) -> None:
+        """Grava a fila ao receber SIGTERM e segue com o tratamento anterior do sinal."""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Falha ao gravar as mensagens do chat no encerramento.')
+        previous = self._previous_handlers.get(signum, signal.SIG_DFL)
+        if callable(previous):
+            previous(signum, frame)
+            return
+        signal.signal(signum, previous)
+        os.kill(os.getpid(), signum)
+
+message_writer = MessageWriteBehind()
@@ -0,0 +1,85 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload, load_only
+from app import db, socketio
+from app.models import TicketMessage
+from app.models import User
+
+# quantidade de mensagens carregadas por vez no chat de um ticket
+MESSAGES_PER_PAGE = 50
+
+def message_page_query(ticket_id: int, before_id: int = None, limit: int = MESSAGES_PER_PAGE):
+    """Monta (sem executar) a consulta de uma página do histórico de mensagens.
+
+    As mensagens são lidas da mais nova para a mais antiga, a partir de `before_id`,
+    usando o índice (ticket_id, id). Uma linha a mais é buscada para saber se
+    ainda existem mensagens anteriores.
+    """
+    query = (
+        select(TicketMessage)
+        .options(
+            load_only(TicketMessage.id, TicketMessage.message, TicketMessage.created_at,
+                      TicketMessage.ticket_id, TicketMessage.author_id),
+            joinedload(TicketMessage.author).load_only(User.id, User.first_name, User.last_name),
+        )
+        .where(TicketMessage.ticket_id == ticket_id)
+    )
+    if before_id is not None:
+        query = query.where(TicketMessage.id < before_id)
+    return query.order_by(TicketMessage.id.desc()).limit(limit + 1)
+
+def message_page(ticket_id: int, before_id: int = None, limit: int = MESSAGES_PER_PAGE) -> tuple:
+    """Retorna uma página do histórico de mensagens de um ticket.
+
+    Args:
+        ticket_id (int): O id do ticket.
+        before_id (int, optional): Retorna apenas mensagens anteriores a esta.
+        limit (int, optional): Quantidade máxima de mensagens.
+
+    Returns:
+        tuple: (mensagens em ordem cronológica, True se existem mensagens mais antigas).
+    """
+    messages = db.session.scalars(message_page_query(ticket_id, before_id, limit)).all()
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    messages.reverse()
+    return messages, has_more
+
+def message_count(ticket_id: int) -> int:
+    """Retorna a quantidade total de mensagens de um ticket."""
+    return db.session.scalar(
+        select(func.count()).select_from(TicketMessage).where(TicketMessage.ticket_id == ticket_id)
+    )
+
+def message_room(ticket_id: int) -> str:
+    """Retorna o nome da sala do Socket.IO de um ticket."""
+    return f'ticket_{ticket_id}'
+
+def serialize_message(message: TicketMessage) -> dict:
+    """Converte uma mensagem no formato compacto enviado ao cliente do chat.
+
+    O autor vai apenas pelo id; nome e sobrenome ficam no cache do cliente
+    (ver `serialize_author`).
+    """
+    return {
+        'id': message.id,
+        'ticket_id': message.ticket_id,
+        'author_id': message.author_id,
+        'message': message.message,
+        'created_at': message.created_at.isoformat(),
+    }
+
+def serialize_author(user: User) -> dict:
+    """Converte o autor de uma mensagem no formato guardado no cache do cliente."""
+    return {
+        'id': user.id,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+    }
+
+def message_authors(messages) -> dict:
+    """Retorna os autores (sem repetição) de uma lista de mensagens, indexados pelo id."""
+    return {message.author_id: serialize_author(message.author) for message in messages}
+
+def publish_message(message: TicketMessage) -> None:
+    """Envia uma mensagem nova apenas para os clientes na sala do ticket."""
+    socketio.emit('new_message', serialize_message(message), to=message_room(message.ticket_id))
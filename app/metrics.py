@@ -0,0 +1,130 @@
+import functools
+import os
+import time
+from flask import g, request
+from flask_socketio import rooms
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from app import socketio
+
+# Métricas no formato do Prometheus. Com PROMETHEUS_MULTIPROC_DIR definido (antes de
+# iniciar o processo), cada worker grava os valores em arquivos nesse diretório e
+# o /metrics de qualquer worker devolve a soma de todos.
+
+HTTP_REQUESTS = Counter('http_requests_total', 'Requisições HTTP atendidas.',
+                        ['endpoint', 'method', 'status'])
+HTTP_LATENCY = Histogram('http_request_duration_seconds', 'Duração das requisições HTTP.',
+                         ['endpoint'])
+
+SOCKET_EVENTS = Counter('socketio_events_total', 'Eventos do Socket.IO recebidos.', ['event'])
+SOCKET_LATENCY = Histogram('socketio_event_duration_seconds', 'Duração dos handlers do Socket.IO.', ['event'])
+SOCKET_CONNECTIONS = Gauge('socketio_connections', 'Sockets conectados.', multiprocess_mode='livesum')
+# as salas não viram rótulos (um por ticket, sem limite): ficam só o total e a distribuição dos tamanhos
+ROOM_SOCKETS = Gauge('socketio_room_sockets', 'Sockets nas salas de tickets.', multiprocess_mode='livesum')
+ROOMS = Gauge('socketio_rooms', 'Salas de tickets com ao menos um socket (por worker, somadas).',
+              multiprocess_mode='livesum')
+ROOM_SIZE = Histogram('socketio_room_size', 'Sockets na sala do ticket (no worker) a cada entrada.',
+                      buckets=(1, 2, 3, 5, 10, 25, 50, 100, 250))
+
+MESSAGES_PERSISTED = Counter('chat_messages_persisted_total', 'Mensagens do chat gravadas no banco.')
+
+POOL_CHECKOUT_WAIT = Histogram('db_pool_checkout_wait_seconds',
+                               'Tempo de espera por uma conexão do pool do SQLAlchemy.',
+                               buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30))
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mede o tempo de espera de cada checkout (inclusive a abertura da conexão)."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+class Metrics:
+    """Coleta das métricas de HTTP, Socket.IO, chat e pool de conexões."""
+
+    def __init__(self):
+        # sockets de cada sala de ticket neste processo
+        self._room_sizes = {}
+
+    def configure_pool(self, app) -> None:
+        """Usa o `TimedQueuePool` no engine (antes de `db.init_app`), exceto para SQLite em memória."""
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+            return
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {}).setdefault('poolclass', TimedQueuePool)
+
+    def init_app(self, app) -> None:
+        """Registra os hooks das requisições e os eventos de conexão do Socket.IO."""
+        app.config.setdefault('METRICS_TOKEN', os.getenv('METRICS_TOKEN'))
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        socketio.on_event('connect', self._socket_connected)
+        socketio.on_event('disconnect', self._socket_disconnected)
+
+    # ------------------------------
+    # http
+    # ------------------------------
+    def _start_request(self) -> None:
+        g.metrics_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            endpoint = request.endpoint or 'unknown'
+            HTTP_LATENCY.labels(endpoint).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+        return response
+
+    # ------------------------------
+    # socket.io
+    # ------------------------------
+    def _socket_connected(self, auth=None) -> None:
+        SOCKET_CONNECTIONS.inc()
+
+    def _socket_disconnected(self, reason=None) -> None:
+        SOCKET_CONNECTIONS.dec()
+        for room in rooms():
+            if room.startswith('ticket_'):
+                self._room_left(room)
+
+    def room_joined(self, room: str) -> None:
+        """Conta um socket que entrou na sala de um ticket."""
+        size = self._room_sizes.get(room, 0) + 1
+        self._room_sizes[room] = size
+        if size == 1:
+            ROOMS.inc()
+        ROOM_SOCKETS.inc()
+        ROOM_SIZE.observe(size)
+
+    def _room_left(self, room: str) -> None:
+        size = self._room_sizes.pop(room, 0) - 1
+        if size > 0:
+            self._room_sizes[room] = size
+        elif size == 0:
+            ROOMS.dec()
+        if size >= 0:
+            ROOM_SOCKETS.dec()
+
+    def socket_event(self, event: str):
+        """Decorador para os handlers do Socket.IO: conta os eventos e mede a duração."""
+        def decorator(handler):
+            @functools.wraps(handler)
+            def wrapper(*args, **kwargs):
+                SOCKET_EVENTS.labels(event).inc()
+                with SOCKET_LATENCY.labels(event).time():
+                    return handler(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # ------------------------------
+    # chat
+    # ------------------------------
+    def messages_persisted(self, count: int = 1) -> None:
+        """Conta mensagens do chat gravadas no banco."""
+        MESSAGES_PERSISTED.inc(count)
+
+metrics = Metrics()
@@ -1,10 +1,8 @@
 from app import db
-from flask_bcrypt import Bcrypt # para hashing de senhas
+from app.passwords import password_hasher # para hashing de senhas (fora do hub do eventlet)
 from flask_login import UserMixin # para integração com Flask-Login
 from datetime import datetime
 
-bcrypt = Bcrypt() # para hashing de senhas
-
 # tabela de junção usuário-setor
 user_sectors = db.Table('user_sectors',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
@@ -42,6 +40,21 @@ class User(db.Model, UserMixin):
         """
 
         return self.admin == True
+
+    @property
+    def sector_ids(self) -> list:
+        """Retorna os ids dos setores do usuário.
+
+        Quando o usuário vem do cache de identidade (ver app/identity.py), os ids
+        já estão carregados e a relação `sectors` não é consultada.
+
+        Returns:
+            list: Os ids dos setores do usuário.
+        """
+        cached = self.__dict__.get('_sector_ids')
+        if cached is not None:
+            return list(cached)
+        return [sector.id for sector in self.sectors]
     
     # gera um hash a partir de uma senha e o armazena
     def set_password(self, password) -> None:
@@ -50,7 +63,7 @@ class User(db.Model, UserMixin):
         Args:
             password (str): A senha a ser convertida em hash.
         """
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = password_hasher.hash(password)
 
     # verifica se uma senha fornecida corresponde ao hash armazenado
     def check_password(self, password) -> bool:
@@ -62,7 +75,7 @@ class User(db.Model, UserMixin):
         Returns:
             bool: True se a senha corresponder ao hash, False caso contrário.
         """
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.check(self.password_hash, password)
 
     def __repr__(self) -> str:
         return f'<User {self.username}>'
@@ -119,6 +132,17 @@ class Priority(db.Model):
 
 class Ticket(db.Model):
     """Modelo de dados para o ticket."""
+    # Índices dos caminhos de acesso do dashboard (ver migração b7c3d9e1f2a4)
+    __table_args__ = (
+        db.Index('ix_ticket_creator_id_status_id', 'creator_id', 'status_id'),
+        db.Index('ix_ticket_assignee_id_status_id', 'assignee_id', 'status_id'),
+        db.Index('ix_ticket_sector_id_status_id', 'sector_id', 'status_id'),
+        db.Index('ix_ticket_created_at', 'created_at'),
+        # fila de tickets sem responsável (ver app/assignment.py, migração c7a1e3f5b9d4)
+        db.Index('ix_ticket_unassigned_queue', 'sector_id', 'priority_id', 'created_at',
+                 postgresql_where=db.text('assignee_id IS NULL'), sqlite_where=db.text('assignee_id IS NULL')),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
@@ -148,6 +172,11 @@ class Ticket(db.Model):
     
 class TicketMessage(db.Model):
     """Modelo de dados para as mensagens dos tickets."""
+    # Índice do histórico de mensagens de um ticket, paginado por id (ver migração d5f1a3c7e9b2)
+    __table_args__ = (
+        db.Index('ix_ticket_message_ticket_id_id', 'ticket_id', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     message = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
@@ -161,4 +190,51 @@ class TicketMessage(db.Model):
     author = db.relationship('User', foreign_keys=[author_id])
 
     def __repr__(self):
-        return f'<TicketMessage {self.id}>'
\ No newline at end of file
+        return f'<TicketMessage {self.id}>'
+
+class ReferenceVersion(db.Model):
+    """Versão dos dados de referência (status, prioridades, setores e assuntos).
+
+    Incrementada a cada alteração nessas tabelas, permite que cada processo
+    saiba quando recarregar o seu cache em memória (ver app/registry.py). A
+    linha de id 2 faz o mesmo para os contadores do dashboard, quando os
+    tickets são alterados em lote (ver app/counters.py).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f'<ReferenceVersion {self.version}>'
+
+class SocketIOOverflow(db.Model):
+    """Mensagens do Socket.IO grandes demais para o NOTIFY do PostgreSQL.
+
+    Usada apenas pelo PostgresManager (ver app/socket_bus.py): a mensagem é gravada
+    aqui e somente o id é enviado pelo canal. As linhas são descartadas após alguns segundos.
+    """
+    __tablename__ = 'socketio_overflow'
+
+    id = db.Column(db.Integer, primary_key=True)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now(), index=True)
+
+    def __repr__(self):
+        return f'<SocketIOOverflow {self.id}>'
+
+class ImportCheckpoint(db.Model):
+    """Progresso de uma importação de tickets (ver app/imports.py).
+
+    Atualizada na mesma transação de cada lote inserido, de modo que uma
+    importação interrompida continua do primeiro registro ainda não gravado.
+    """
+    __tablename__ = 'import_checkpoint'
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(64), unique=True, nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    imported = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now(), onupdate=db.func.now())
+
+    def __repr__(self):
+        return f'<ImportCheckpoint {self.key} {self.position}>'
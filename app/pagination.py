@@ -0,0 +1,190 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import and_, column, or_, DateTime, Integer
+
+# quantidade padrão de linhas por página nas listagens
+PER_PAGE = 25
+
+class KeysetPage:
+    """Uma página de resultados obtida por paginação keyset (cursor).
+
+    Attributes:
+        items (list): Os objetos da página atual.
+        next_cursor (str | None): Cursor para a próxima página, se existir.
+        prev_cursor (str | None): Cursor para a página anterior, se existir.
+    """
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+def encode_cursor(values) -> str:
+    """Codifica os valores da chave de ordenação num cursor seguro para url.
+
+    Args:
+        values (list): Os valores das colunas de ordenação da linha de referência.
+
+    Returns:
+        str: O cursor codificado em base64.
+    """
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, columns):
+    """Decodifica um cursor gerado por `encode_cursor`.
+
+    Args:
+        cursor (str): O cursor recebido na query string.
+        columns (list): As colunas de ordenação, usadas para converter os tipos.
+
+    Returns:
+        list | None: Os valores da chave, ou None se o cursor for inválido.
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, binascii.Error, UnicodeError):
+        return None
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        return None
+
+    # converte as datas de volta para datetime
+    try:
+        return [
+            datetime.fromisoformat(v) if isinstance(column.type, DateTime) and v is not None else v
+            for column, v in zip(columns, values)
+        ]
+    except (TypeError, ValueError):
+        return None
+
+def _keyset_condition(order, values, backwards: bool):
+    """Monta o filtro que seleciona as linhas depois (ou antes) da chave informada.
+
+    Para as colunas (c1, c2, ..., cn) gera a expansão
+    c1 > v1 OR (c1 = v1 AND c2 > v2) OR ... respeitando a direção de cada coluna,
+    o que permite misturar asc e desc na mesma ordenação.
+    """
+    clauses = []
+    for i, (column, direction) in enumerate(order):
+        ascending = (direction == 'asc') != backwards
+        comparison = column > values[i] if ascending else column < values[i]
+        equals = [order[j][0] == values[j] for j in range(i)]
+        clauses.append(and_(*equals, comparison))
+    return or_(*clauses)
+
+def keyset_query(query, order, after=None, before=None, per_page=PER_PAGE) -> tuple:
+    """Monta (sem executar) a query de uma página keyset.
+
+    Args:
+        query: A query base (já com joins e filtros), ainda sem ordenação.
+        order (list): Lista de tuplas (coluna, direção). A última coluna deve ser única (ex.: Ticket.id).
+        after (str, optional): Cursor da última linha da página anterior.
+        before (str, optional): Cursor da primeira linha da página seguinte.
+        per_page (int, optional): Quantidade de linhas por página.
+
+    Returns:
+        tuple: (query, backwards, has_reference), onde `backwards` indica que a página
+               é lida em ordem inversa e `has_reference` se havia um cursor válido.
+    """
+    columns = [column for column, _ in order]
+    after_values = decode_cursor(after, columns)
+    before_values = decode_cursor(before, columns) if after_values is None else None
+    backwards = before_values is not None
+
+    # as colunas de ordenação são selecionadas junto para montar os cursores
+    query = query.add_columns(*[column.label(f'_keyset_{i}') for i, column in enumerate(columns)])
+
+    reference = before_values if backwards else after_values
+    if reference is not None:
+        query = query.filter(_keyset_condition(order, reference, backwards))
+
+    query = query.order_by(*[
+        column.asc() if (direction == 'asc') != backwards else column.desc()
+        for column, direction in order
+    ])
+
+    return query.limit(per_page + 1), backwards, reference is not None
+
+def paginate_keyset(query, order, after=None, before=None, per_page=PER_PAGE) -> KeysetPage:
+    """Pagina uma query com base num cursor em vez de OFFSET.
+
+    O custo de cada página é constante, independentemente de quantas linhas
+    existam antes dela, desde que as colunas de ordenação sejam indexadas.
+
+    Args:
+        query: A query base (já com joins e filtros), ainda sem ordenação.
+        order (list): Lista de tuplas (coluna, direção). A última coluna deve ser única (ex.: Ticket.id).
+        after (str, optional): Cursor da última linha da página anterior.
+        before (str, optional): Cursor da primeira linha da página seguinte.
+        per_page (int, optional): Quantidade de linhas por página.
+
+    Returns:
+        KeysetPage: A página com os itens e os cursores de navegação.
+    """
+    query, backwards, has_reference = keyset_query(query, order, after, before, per_page)
+
+    rows = query.all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    items = [row[0] for row in rows]
+    first_cursor = encode_cursor(list(rows[0][1:])) if rows else None
+    last_cursor = encode_cursor(list(rows[-1][1:])) if rows else None
+
+    if backwards:
+        # veio de uma página posterior, então sempre há próxima página
+        next_cursor = last_cursor
+        prev_cursor = first_cursor if has_more else None
+    else:
+        next_cursor = last_cursor if has_more else None
+        prev_cursor = first_cursor if has_reference else None
+
+    return KeysetPage(items, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+def paginate_offset(query, order_by, after=None, before=None, per_page=PER_PAGE) -> KeysetPage:
+    """Pagina uma query por OFFSET, com a posição guardada nos mesmos cursores da paginação keyset.
+
+    Usada apenas quando a ordenação não pode servir de cursor (ex.: agregados);
+    o custo de cada página cresce com a quantidade de linhas antes dela.
+
+    Args:
+        query: A query base (já com joins e filtros), ainda sem ordenação.
+        order_by (list): As expressões de ordenação, já com a direção.
+        after (str, optional): Cursor da próxima página.
+        before (str, optional): Cursor da página anterior.
+        per_page (int, optional): Quantidade de linhas por página.
+
+    Returns:
+        KeysetPage: A página com os itens e os cursores de navegação.
+    """
+    position = decode_cursor(after, [column('offset', Integer)]) or decode_cursor(before, [column('offset', Integer)])
+    offset = position[0] if position and isinstance(position[0], int) and position[0] > 0 else 0
+
+    rows = query.order_by(*order_by).offset(offset).limit(per_page + 1).all()
+    next_cursor = encode_cursor([offset + per_page]) if len(rows) > per_page else None
+    prev_cursor = encode_cursor([max(offset - per_page, 0)]) if offset > 0 else None
+    return KeysetPage(rows[:per_page], next_cursor=next_cursor, prev_cursor=prev_cursor)
@@ -0,0 +1,43 @@
+import os
+from app import bcrypt
+
+class PasswordHasher:
+    """Geração e verificação de hashes bcrypt fora do hub do eventlet.
+
+    O bcrypt é propositalmente lento e, executado no hub, bloqueia todas as
+    green threads (inclusive os sockets do chat) durante cada login. Com o
+    offload ativo (PASSWORD_HASH_OFFLOAD=1, padrão), o cálculo roda no pool de
+    threads nativas do eventlet (`eventlet.tpool`), limitado a
+    PASSWORD_HASH_THREADS threads. O custo é definido por BCRYPT_LOG_ROUNDS.
+    """
+
+    def __init__(self, offload: bool = True, threads: int = 4):
+        self.offload = offload
+        self.threads = threads
+
+    def init_app(self, app) -> None:
+        """Lê a configuração e dimensiona o pool de threads do eventlet."""
+        app.config.setdefault('PASSWORD_HASH_OFFLOAD', os.getenv('PASSWORD_HASH_OFFLOAD', '1') == '1')
+        app.config.setdefault('PASSWORD_HASH_THREADS', int(os.getenv('PASSWORD_HASH_THREADS', self.threads)))
+        self.offload = app.config['PASSWORD_HASH_OFFLOAD']
+        self.threads = app.config['PASSWORD_HASH_THREADS']
+
+        if self.offload:
+            from eventlet import tpool
+            tpool.set_num_threads(self.threads)
+
+    def _run(self, function, *args):
+        if not self.offload:
+            return function(*args)
+        from eventlet import tpool
+        return tpool.execute(function, *args)
+
+    def hash(self, password: str) -> str:
+        """Gera o hash bcrypt de uma senha."""
+        return self._run(bcrypt.generate_password_hash, password).decode('utf-8')
+
+    def check(self, password_hash: str, password: str) -> bool:
+        """Verifica se a senha corresponde ao hash bcrypt."""
+        return self._run(bcrypt.check_password_hash, password_hash, password)
+
+password_hasher = PasswordHasher()
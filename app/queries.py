@@ -0,0 +1,309 @@
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import contains_eager, load_only, selectinload
+from app.models import Ticket
+from app.models import User
+from app.models import Sector
+from app.models import Subject
+from app.models import Status
+from app.models import Priority
+from app.pagination import paginate_keyset, paginate_offset, keyset_query, PER_PAGE
+
+class Sort:
+    """Uma chave de ordenação permitida numa listagem.
+
+    Args:
+        column: A expressão SQL ordenada (coluna da entidade ou de uma tabela relacionada).
+        joins (tuple, optional): Relações "para muitos" que a expressão exige (LEFT JOIN).
+        aggregate (bool, optional): Se a expressão é um agregado, o que exige GROUP BY na entidade.
+    """
+
+    def __init__(self, column, joins=(), aggregate=False):
+        self.column = column
+        self.joins = tuple(joins)
+        self.aggregate = aggregate
+
+class ListQuery:
+    """Descrição declarativa de uma listagem (entidade, colunas, relações e ordenações).
+
+    A partir dos filtros, da ordenação e da página, compila uma única instrução SQL
+    em que cada tabela relacionada entra no máximo uma vez: o mesmo JOIN serve
+    para ordenar e para carregar as relações exibidas em cada linha.
+
+    Args:
+        model: A entidade listada.
+        sorts (dict): Nome da ordenação (valor de `sort_by`) para `Sort`.
+        default_sort (str, optional): Ordenação usada quando `sort_by` é inválido.
+        columns (tuple, optional): Colunas da entidade a carregar. None carrega todas.
+        joined (dict, optional): Relações "para um" obrigatórias (INNER JOIN + contains_eager)
+            mapeadas para as colunas carregadas da tabela relacionada.
+        selectin (dict, optional): Relações "para muitos" carregadas por selectinload,
+            mapeadas para as colunas carregadas da tabela relacionada.
+    """
+
+    def __init__(self, model, sorts, default_sort='id', columns=None, joined=None, selectin=None):
+        self.model = model
+        self.sorts = sorts
+        self.default_sort = default_sort
+        self.columns = columns
+        self.joined = joined or {}
+        self.selectin = selectin or {}
+
+    def parse_sort(self, sort_by: str, direction: str) -> tuple:
+        """Valida os parâmetros de ordenação vindos da query string.
+
+        `sort_by` aceita várias chaves separadas por vírgula (ex.: 'status,-created_at').
+        O prefixo '-' inverte a direção apenas para aquela chave.
+
+        Args:
+            sort_by (str): As chaves de ordenação pedidas.
+            direction (str): A direção base ('asc' ou 'desc').
+
+        Returns:
+            tuple: (sort_by, direction, keys), com os valores normalizados e a lista de (nome, direção).
+        """
+        if direction not in ['asc', 'desc']:
+            direction = 'asc'
+        inverse = 'desc' if direction == 'asc' else 'asc'
+
+        keys = []
+        names = []
+        for raw in (sort_by or '').split(','):
+            raw = raw.strip()
+            name = raw.lstrip('-')
+            # ignora chaves não permitidas (evita injeção de sql) e repetidas
+            if name not in self.sorts or name in names:
+                continue
+            names.append(name)
+            keys.append((name, inverse if raw.startswith('-') else direction))
+
+        if not keys:
+            keys = [(self.default_sort, direction)]
+
+        normalized = ','.join(name if d == direction else f'-{name}' for name, d in keys)
+        return normalized, direction, keys
+
+    def query(self, filters=(), keys=()):
+        """Monta a query (joins, colunas carregadas e filtros), ainda sem ordenação."""
+        query = self.model.query
+        options = []
+
+        if self.columns is not None:
+            options.append(load_only(*self.columns))
+
+        for relationship, columns in self.joined.items():
+            query = query.join(relationship)
+            options.append(contains_eager(relationship).load_only(*columns))
+
+        for relationship, columns in self.selectin.items():
+            options.append(selectinload(relationship).load_only(*columns))
+
+        # relações exigidas apenas pela ordenação entram uma única vez
+        joined = set()
+        grouped = False
+        for name, _ in keys:
+            sort = self.sorts[name]
+            for relationship in sort.joins:
+                if relationship.key not in joined:
+                    query = query.outerjoin(relationship)
+                    joined.add(relationship.key)
+            grouped = grouped or sort.aggregate
+
+        if grouped:
+            query = query.group_by(self.model.id)
+
+        return query.options(*options).filter(*filters)
+
+    def _tiebreak(self, keys) -> list:
+        """Desempate pela chave primária, na direção da primeira chave (a mesma regra no keyset e no OFFSET)."""
+        if any(name == 'id' for name, _ in keys):
+            return []
+        return [(self.model.id, keys[0][1])]
+
+    def order(self, keys) -> list:
+        """Converte as chaves em (expressão, direção), com a chave primária como desempate."""
+        return [(self.sorts[name].column, direction) for name, direction in keys] + self._tiebreak(keys)
+
+    def order_by(self, keys) -> list:
+        """Converte as chaves em expressões ORDER BY, com a chave primária como desempate."""
+        order_by = []
+        for name, direction in keys:
+            sort = self.sorts[name]
+            expression = sort.column.asc() if direction == 'asc' else sort.column.desc()
+            # linhas sem valor agregado (ex.: usuário sem setor) ficam sempre no final
+            order_by.append(expression.nulls_last() if sort.aggregate else expression)
+        for column, direction in self._tiebreak(keys):
+            order_by.append(column.asc() if direction == 'asc' else column.desc())
+        return order_by
+
+    def all(self, filters=(), keys=()) -> list:
+        """Executa a listagem completa, ordenada.
+
+        Returns:
+            list: Todas as linhas que satisfazem os filtros.
+        """
+        keys = keys or [(self.default_sort, 'asc')]
+        return self.query(filters, keys).order_by(*self.order_by(keys)).all()
+
+    def page_query(self, filters=(), keys=(), after=None, before=None, per_page=PER_PAGE):
+        """Monta (sem executar) a query de uma página, usada também pelo EXPLAIN dos comandos."""
+        keys = keys or [(self.default_sort, 'asc')]
+        return keyset_query(self.query(filters, keys), self.order(keys),
+                            after=after, before=before, per_page=per_page)[0]
+
+    def page(self, filters=(), keys=(), after=None, before=None, per_page=PER_PAGE):
+        """Executa uma página da listagem com paginação keyset.
+
+        Ordenações por agregados não podem ser usadas no cursor; nesse caso a
+        página é lida por OFFSET (ver `paginate_offset`).
+
+        Returns:
+            KeysetPage: A página pedida.
+        """
+        keys = keys or [(self.default_sort, 'asc')]
+        if any(self.sorts[name].aggregate for name, _ in keys):
+            return paginate_offset(self.query(filters, keys), self.order_by(keys),
+                                   after=after, before=before, per_page=per_page)
+
+        return paginate_keyset(self.query(filters, keys), self.order(keys),
+                               after=after, before=before, per_page=per_page)
+
+# ------------------------------
+# filtros
+# ------------------------------
+
+def user_ticket_filters(user_id: int) -> list:
+    """Filtros dos tickets criados por ou atribuídos ao usuário (dashboard.user_tickets)."""
+    return [(Ticket.creator_id == user_id) | (Ticket.assignee_id == user_id)]
+
+def sector_ticket_filters(sector_ids, status_ids) -> list:
+    """Filtros dos tickets dos setores do usuário com os status informados (dashboard.sector_user_tickets)."""
+    return [Ticket.sector_id.in_(sector_ids), Ticket.status_id.in_(status_ids)]
+
+def _like_escape(term: str) -> str:
+    """Escapa os curingas do LIKE (% e _) digitados pelo usuário."""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def contains_filter(columns, term: str):
+    """Filtro "alguma das colunas contém o termo" (ILIKE '%termo%').
+
+    No PostgreSQL, os índices de trigramas (pg_trgm) atendem esse filtro para
+    termos com 3 ou mais caracteres, sem varrer a tabela.
+    """
+    pattern = f'%{_like_escape(term)}%'
+    return or_(*(column.ilike(pattern, escape='\\') for column in columns))
+
+def user_search_filters(term: str) -> list:
+    """Filtros da pesquisa de usuários do painel (users.view)."""
+    return [contains_filter(USER_SEARCH_COLUMNS, term)]
+
+# ------------------------------
+# pesquisa conforme o usuário digita
+# ------------------------------
+
+# termos mais curtos não usam os índices de trigramas e não são pesquisados
+SUGGESTION_MIN_LENGTH = 3
+SUGGESTION_LIMIT = 10
+SUGGESTION_MAX_LIMIT = 50
+
+def suggestions(model, columns, term: str, limit: int = SUGGESTION_LIMIT, filters=()) -> list:
+    """Busca até `limit` linhas em que alguma das colunas contém o termo.
+
+    As linhas cuja primeira coluna começa com o termo vêm primeiro, depois a
+    ordem alfabética dessa coluna.
+
+    Returns:
+        list: As linhas encontradas (vazia se o termo for curto demais).
+    """
+    term = (term or '').strip()
+    if len(term) < SUGGESTION_MIN_LENGTH:
+        return []
+
+    limit = min(max(limit, 1), SUGGESTION_MAX_LIMIT)
+    starts = columns[0].ilike(f'{_like_escape(term)}%', escape='\\')
+    return (
+        model.query
+        .filter(contains_filter(columns, term), *filters)
+        .order_by(case((starts, 0), else_=1), columns[0], model.id)
+        .limit(limit)
+        .all()
+    )
+
+# ------------------------------
+# listagens
+# ------------------------------
+
+# tickets exibidos nos dashboards
+TICKET_LIST = ListQuery(
+    Ticket,
+    sorts={
+        'id': Sort(Ticket.id),
+        'title': Sort(Ticket.title),
+        'sector': Sort(Sector.name),
+        'subject': Sort(Subject.name),
+        'creator': Sort(User.first_name),
+        'created_at': Sort(Ticket.created_at),
+        'status': Sort(Status.name),
+    },
+    columns=(Ticket.id, Ticket.title, Ticket.created_at),
+    joined={
+        Ticket.sector: (Sector.name, Sector.color),
+        Ticket.subject: (Subject.name,),
+        Ticket.creator: (User.first_name, User.last_name),
+        Ticket.status: (Status.name,),
+        Ticket.priority: (Priority.color,),
+    },
+)
+
+# colunas da pesquisa de usuários, cada uma com um índice de trigramas (ver migração a4d8e0f2b6c1)
+USER_SEARCH_COLUMNS = (User.username, User.first_name, User.last_name, User.email)
+
+# usuários do painel de administração (sem o hash da senha)
+USER_LIST = ListQuery(
+    User,
+    sorts={
+        'id': Sort(User.id),
+        'username': Sort(User.username),
+        'first_name': Sort(User.first_name),
+        'last_name': Sort(User.last_name),
+        'email': Sort(User.email),
+        # ordena pelo nome do primeiro setor em ordem alfabética
+        'sectors': Sort(func.min(Sector.name), joins=(User.sectors,), aggregate=True),
+        'admin': Sort(User.admin),
+    },
+    columns=(User.id, User.username, User.first_name, User.last_name, User.email, User.admin),
+    selectin={User.sectors: (Sector.name, Sector.color)},
+)
+
+SUBJECT_LIST = ListQuery(
+    Subject,
+    sorts={
+        'id': Sort(Subject.id),
+        'name': Sort(Subject.name),
+        'sectors': Sort(func.min(Sector.name), joins=(Subject.sectors,), aggregate=True),
+    },
+    selectin={Subject.sectors: (Sector.name, Sector.color)},
+)
+
+SECTOR_LIST = ListQuery(
+    Sector,
+    sorts={
+        'id': Sort(Sector.id),
+        'name': Sort(Sector.name),
+    },
+)
+
+STATUS_LIST = ListQuery(
+    Status,
+    sorts={
+        'id': Sort(Status.id),
+        'name': Sort(Status.name),
+    },
+)
+
+PRIORITY_LIST = ListQuery(
+    Priority,
+    sorts={
+        'id': Sort(Priority.id),
+        'name': Sort(Priority.name),
+    },
+)
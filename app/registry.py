@@ -0,0 +1,231 @@
+import os
+import threading
+import time
+from typing import NamedTuple
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Status
+from app.models import Priority
+from app.models import Sector
+from app.models import Subject
+from app.models import ReferenceVersion
+from app.models import subject_sectors
+
+# nomes dos status usados pelas regras do sistema
+STATUS_OPEN = 'Aberto'
+STATUS_WAITING = 'Aguardando'
+STATUS_IN_PROGRESS = 'Em Progresso'
+STATUS_EDITED = 'Editado'
+STATUS_RESOLVED = 'Resolvido'
+STATUS_CLOSED = 'Fechado'
+
+# a urgência das prioridades é a ordem dos ids: cada prioridade cadastrada depois é mais
+# urgente que as anteriores (seed-priorities cria Baixa, Média, Alta e Urgente, nesta ordem).
+# a fila do "pegar próximo" (most_urgent_first) e o peso do roteamento (priority_rank) seguem esta regra
+def most_urgent_first(priority_id):
+    """Ordenação SQL de uma coluna priority_id, da prioridade mais urgente para a menos urgente."""
+    return priority_id.desc()
+
+class StatusRef(NamedTuple):
+    id: int
+    name: str
+    symbol: str
+
+class PriorityRef(NamedTuple):
+    id: int
+    name: str
+    color: str
+
+class SectorRef(NamedTuple):
+    id: int
+    name: str
+    color: str
+
+class SubjectRef(NamedTuple):
+    id: int
+    name: str
+    sector_ids: tuple
+
+class _Snapshot:
+    """Cópia imutável das tabelas de referência, indexada por id e por nome."""
+
+    def __init__(self, version, statuses, priorities, sectors, subjects):
+        self.version = version
+        self.statuses = statuses
+        self.priorities = priorities
+        self.sectors = sectors
+        self.subjects = subjects
+
+        self.status_by_id = {s.id: s for s in statuses}
+        self.status_by_name = {s.name: s for s in statuses}
+        self.priority_by_id = {p.id: p for p in priorities}
+        self.priority_rank = {p.id: rank for rank, p in enumerate(priorities, start=1)}
+        self.sector_by_id = {s.id: s for s in sectors}
+        self.sector_by_name = {s.name: s for s in sectors}
+        self.subject_by_id = {s.id: s for s in subjects}
+
+        self.subjects_by_sector = {}
+        for subject in subjects:
+            for sector_id in subject.sector_ids:
+                self.subjects_by_sector.setdefault(sector_id, []).append(subject)
+
+class ReferenceRegistry:
+    """Registro em memória, por processo, de Status, Priority, Sector e Subject.
+
+    As tabelas são carregadas uma única vez e servidas por id ou por nome em O(1).
+    Qualquer alteração feita nelas pela sessão incrementa a linha de
+    `ReferenceVersion` na mesma transação. O processo que fez a alteração descarta
+    o seu cache no commit, e os demais workers percebem a nova versão na próxima
+    verificação (no máximo uma consulta a cada `check_interval` segundos).
+    """
+
+    def __init__(self, check_interval: float = 5):
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """Lê o intervalo de verificação da configuração da aplicação."""
+        app.config.setdefault('REFERENCE_REGISTRY_CHECK_INTERVAL',
+                              float(os.getenv('REFERENCE_REGISTRY_CHECK_INTERVAL', self.check_interval)))
+        self.check_interval = app.config['REFERENCE_REGISTRY_CHECK_INTERVAL']
+
+    def invalidate(self) -> None:
+        """Descarta o cache local; a próxima leitura recarrega as tabelas."""
+        self._snapshot = None
+
+    def _current_version(self) -> int:
+        return db.session.scalar(select(ReferenceVersion.version).where(ReferenceVersion.id == 1)) or 0
+
+    def _load(self) -> _Snapshot:
+        version = self._current_version()
+        statuses = [StatusRef(s.id, s.name, s.symbol)
+                    for s in db.session.execute(select(Status.id, Status.name, Status.symbol).order_by(Status.id))]
+        # ordenadas da menos para a mais urgente (ver most_urgent_first)
+        priorities = [PriorityRef(p.id, p.name, p.color)
+                      for p in db.session.execute(select(Priority.id, Priority.name, Priority.color).order_by(Priority.id))]
+        sectors = [SectorRef(s.id, s.name, s.color)
+                   for s in db.session.execute(select(Sector.id, Sector.name, Sector.color).order_by(Sector.name))]
+
+        subject_sector_ids = {}
+        for subject_id, sector_id in db.session.execute(select(subject_sectors.c.subject_id, subject_sectors.c.sector_id)):
+            subject_sector_ids.setdefault(subject_id, []).append(sector_id)
+        subjects = [SubjectRef(s.id, s.name, tuple(sorted(subject_sector_ids.get(s.id, ()))))
+                    for s in db.session.execute(select(Subject.id, Subject.name).order_by(Subject.name))]
+
+        return _Snapshot(version, statuses, priorities, sectors, subjects)
+
+    def _data(self) -> _Snapshot:
+        snapshot = self._snapshot
+        now = time.monotonic()
+
+        if snapshot is not None and now - self._checked_at < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or self._current_version() != snapshot.version:
+                snapshot = self._load()
+                self._snapshot = snapshot
+            self._checked_at = now
+            return snapshot
+
+    # ------------------------------
+    # status
+    # ------------------------------
+    def statuses(self) -> list:
+        return list(self._data().statuses)
+
+    def status(self, status_id: int):
+        return self._data().status_by_id.get(status_id)
+
+    def status_by_name(self, name: str):
+        return self._data().status_by_name.get(name)
+
+    def status_id(self, name: str):
+        """Retorna o id do status com o nome informado, ou None se não existir."""
+        status = self.status_by_name(name)
+        return status.id if status else None
+
+    def status_ids(self, names, exclude: bool = False) -> list:
+        """Retorna os ids dos status com os nomes informados (ou de todos os outros, com exclude=True)."""
+        names = set(names)
+        return [s.id for s in self._data().statuses if (s.name in names) != exclude]
+
+    # ------------------------------
+    # prioridades
+    # ------------------------------
+    def priorities(self) -> list:
+        """Retorna todas as prioridades, da menos para a mais urgente."""
+        return list(self._data().priorities)
+
+    def priority(self, priority_id: int):
+        return self._data().priority_by_id.get(priority_id)
+
+    def priority_rank(self, priority_id: int) -> int:
+        """Retorna a posição da prioridade na ordem de urgência (1 é a menos urgente), ou 0 se não existir."""
+        return self._data().priority_rank.get(priority_id, 0)
+
+    # ------------------------------
+    # setores e assuntos
+    # ------------------------------
+    def sectors(self) -> list:
+        """Retorna todos os setores, ordenados por nome."""
+        return list(self._data().sectors)
+
+    def sector(self, sector_id: int):
+        return self._data().sector_by_id.get(sector_id)
+
+    def sector_by_name(self, name: str):
+        return self._data().sector_by_name.get(name)
+
+    def subjects(self) -> list:
+        """Retorna todos os assuntos, ordenados por nome."""
+        return list(self._data().subjects)
+
+    def subject(self, subject_id: int):
+        return self._data().subject_by_id.get(subject_id)
+
+    def subjects_for_sector(self, sector_id: int) -> list:
+        """Retorna os assuntos associados a um setor, ordenados por nome."""
+        return list(self._data().subjects_by_sector.get(sector_id, ()))
+
+registry = ReferenceRegistry()
+
+def _touches_registry(session, obj) -> bool:
+    """Indica se um objeto alterado muda algum dado mantido no registro."""
+    if isinstance(obj, Subject):
+        # a associação com os setores também faz parte do registro
+        return session.is_modified(obj)
+    if isinstance(obj, (Status, Priority, Sector)):
+        return session.is_modified(obj, include_collections=False)
+    return False
+
+@event.listens_for(Session, 'after_flush')
+def _bump_reference_version(session, flush_context) -> None:
+    changed = any(isinstance(obj, (Status, Priority, Sector, Subject))
+                  for obj in list(session.new) + list(session.deleted))
+    changed = changed or any(_touches_registry(session, obj) for obj in session.dirty)
+    if not changed or session.info.get('reference_version_bumped'):
+        return
+
+    # incrementa a versão na mesma transação da alteração
+    connection = session.connection()
+    result = connection.execute(
+        update(ReferenceVersion).where(ReferenceVersion.id == 1)
+        .values(version=ReferenceVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(ReferenceVersion).values(id=1, version=1))
+    session.info['reference_version_bumped'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _reload_registry(session) -> None:
+    if session.info.pop('reference_version_bumped', None):
+        registry.invalidate()
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_reference_bump(session, previous_transaction) -> None:
+    session.info.pop('reference_version_bumped', None)
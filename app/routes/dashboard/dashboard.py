@@ -9,6 +9,10 @@ from app.models import Sector
 from app.models import Subject
 from app.models import Status
 from app.models import Priority
+from app.pagination import KeysetPage
+from app.counters import ticket_counters, SECTOR_OPEN_STATUSES
+from app.registry import registry
+from app.queries import TICKET_LIST, user_ticket_filters, sector_ticket_filters
 
 dashboard = Blueprint('dashboard', __name__)
 
@@ -20,74 +24,28 @@ def user_tickets() -> Response:
     # ------------------------------
     # contadores
     # ------------------------------
-    open_status_ids = [s.id for s in Status.query.filter(Status.name != 'Resolvido').all()]
-    open_user_tickets_count = Ticket.query.filter(
-        Ticket.creator_id == current_user.id,
-        Ticket.status_id.in_(open_status_ids)
-    ).count()
+    # lidos do cache, recalculados apenas quando algum ticket do usuário muda
+    user_counts = ticket_counters.user_counts(current_user.id)
+    open_user_tickets_count = user_counts['open']
+    assigned_user_tickets_count = user_counts['assigned']
 
-    working_status_ids = [s.id for s in Status.query.filter(Status.name.in_(['Em Progresso', 'Editado'])).all()]
-    assigned_user_tickets_count = Ticket.query.filter(
-        Ticket.assignee_id == current_user.id,
-        Ticket.status_id.in_(working_status_ids)
-    ).count()
-
-    user_sector_ids = [sector.id for sector in current_user.sectors]
-
-    # ------------------------------
-    # ordenação
-    # ------------------------------
-    sort_by = request.args.get('sort_by', 'id', type=str)
-    direction = request.args.get('direction', 'asc', type=str)
-
-    allowed_columns = ['id', 'title', 'sector', 'subject', 'creator', 'created_at', 'status']
-    if sort_by not in allowed_columns:
-        sort_by = 'id'
-
-    if direction not in ['asc', 'desc']:
-        direction = 'asc'
-
-    # Query base com ordenação
-    base_query = Ticket.query
-    if sort_by == 'sector':
-        base_query = base_query.join(Sector).order_by(
-            Sector.name.asc() if direction == 'asc' else Sector.name.desc()
-        )
-
-    elif sort_by == 'subject':
-        base_query = base_query.join(Subject).order_by(
-            Subject.name.asc() if direction == 'asc' else Subject.name.desc()
-        )
-
-    elif sort_by == 'creator':
-        base_query = base_query.join(User, User.id == Ticket.creator_id).order_by(
-            User.first_name.asc() if direction == 'asc' else User.first_name.desc()
-        )
-        
-    elif sort_by == 'created_at':
-        base_query = base_query.order_by(
-            Ticket.created_at.asc() if direction == 'asc' else Ticket.created_at.desc()
-        )
-    
-    elif sort_by == 'status':
-        base_query = base_query.join(Status).order_by(
-            Status.name.asc() if direction == 'asc' else Status.name.desc()
-        )
-
-    else:
-        sort_column = getattr(Ticket, sort_by)
-        base_query = base_query.order_by(
-            sort_column.asc() if direction == 'asc' else sort_column.desc()
-        )
+    user_sector_ids = current_user.sector_ids
 
     # ------------------------------
-    # queries finais (apenas filtros)
+    # ordenação e paginação
     # ------------------------------
+    sort_by, direction, sort_keys = TICKET_LIST.parse_sort(
+        request.args.get('sort_by', 'id', type=str),
+        request.args.get('direction', 'asc', type=str)
+    )
 
     # filtro de tickets do usuário
-    user_tickets = base_query.filter(
-        (Ticket.creator_id == current_user.id) | (Ticket.assignee_id == current_user.id)
-    ).all()
+    user_tickets = TICKET_LIST.page(
+        filters=user_ticket_filters(current_user.id),
+        keys=sort_keys,
+        after=request.args.get('after', type=str),
+        before=request.args.get('before', type=str)
+    )
 
     # ------------------------------
     # render
@@ -109,79 +67,35 @@ def sector_user_tickets() -> Response:
     # ------------------------------
     # contadores
     # ------------------------------
-    user_sector_ids = [sector.id for sector in current_user.sectors]
-    open_sector_status_ids = [s.id for s in Status.query.filter(Status.name.in_(['Aberto', 'Aguardando'])).all()]
+    user_sector_ids = current_user.sector_ids
 
-    sector_user_tickets_count = 0
-    if user_sector_ids:
-        sector_user_tickets_count = Ticket.query.filter(
-            Ticket.sector_id.in_(user_sector_ids),
-            Ticket.status_id.in_(open_sector_status_ids)
-        ).count()
-
-    # ------------------------------
-    # ordenação
-    # ------------------------------
-    sort_by = request.args.get('sort_by', 'id', type=str)
-    direction = request.args.get('direction', 'asc', type=str)
-
-    allowed_columns = ['id', 'title', 'sector', 'subject', 'creator', 'created_at', 'status']
-    if sort_by not in allowed_columns:
-        sort_by = 'id'
-
-    if direction not in ['asc', 'desc']:
-        direction = 'asc'
-
-    # Query base com ordenação
-    base_query = Ticket.query
-    if sort_by == 'sector':
-        base_query = base_query.join(Sector).order_by(
-            Sector.name.asc() if direction == 'asc' else Sector.name.desc()
-        )
-
-    elif sort_by == 'subject':
-        base_query = base_query.join(Subject).order_by(
-            Subject.name.asc() if direction == 'asc' else Subject.name.desc()
-        )
-
-    elif sort_by == 'creator':
-        base_query = base_query.join(User, User.id == Ticket.creator_id).order_by(
-            User.first_name.asc() if direction == 'asc' else User.first_name.desc()
-        )
-        
-    elif sort_by == 'created_at':
-        base_query = base_query.order_by(
-            Ticket.created_at.asc() if direction == 'asc' else Ticket.created_at.desc()
-        )
-    
-    elif sort_by == 'status':
-        base_query = base_query.join(Status).order_by(
-            Status.name.asc() if direction == 'asc' else Status.name.desc()
-        )
-
-    else:
-        sort_column = getattr(Ticket, sort_by)
-        base_query = base_query.order_by(
-            sort_column.asc() if direction == 'asc' else sort_column.desc()
-        )
+    # lido do cache, recalculado apenas quando algum ticket dos setores muda
+    sector_user_tickets_count = ticket_counters.sector_count(user_sector_ids)
 
     # ------------------------------
-    # queries finais (apenas filtros)
+    # ordenação e paginação
     # ------------------------------
+    sort_by, direction, sort_keys = TICKET_LIST.parse_sort(
+        request.args.get('sort_by', 'id', type=str),
+        request.args.get('direction', 'asc', type=str)
+    )
 
     # filtro de tickets do setor do usuário
-    sector_user_tickets = []
+    sector_user_tickets = KeysetPage([])
     if user_sector_ids:
-        sector_user_tickets = base_query.filter(
-            Ticket.sector_id.in_(user_sector_ids),
-            Ticket.status_id.in_([1, 2])
-        ).all()
+        sector_user_tickets = TICKET_LIST.page(
+            filters=sector_ticket_filters(user_sector_ids, registry.status_ids(SECTOR_OPEN_STATUSES)),
+            keys=sort_keys,
+            after=request.args.get('after', type=str),
+            before=request.args.get('before', type=str)
+        )
 
     # ------------------------------
     # render
     # ------------------------------
     return render_template(
         "dashboard/sector-user-tickets.html",
+        user_sectors=[sector for sector in registry.sectors() if sector.id in user_sector_ids],
         sector_user_tickets=sector_user_tickets,
         sector_user_tickets_count=sector_user_tickets_count,
         sort_by=sort_by,
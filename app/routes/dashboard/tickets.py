@@ -2,10 +2,11 @@ from app import db, socketio
 from flask import Blueprint, render_template, redirect, url_for, flash, request, session, Response, jsonify, abort
 from datetime import datetime
 from flask_login import login_user, logout_user, login_required, current_user
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import load_only
 from app.decorators import admin_required
 
-from flask_socketio import join_room, emit
+from flask_socketio import join_room, rooms
 
 from app.models import Ticket
 from app.models import User
@@ -14,38 +15,86 @@ from app.models import Subject
 from app.models import Status
 from app.models import Priority
 from app.models import TicketMessage
+from app.registry import registry, STATUS_OPEN, STATUS_IN_PROGRESS
+from app.messages import MESSAGES_PER_PAGE, message_page, message_count, message_room
+from app.messages import serialize_message, serialize_author, message_authors, publish_message
+from app.message_writer import message_writer
+from app.instrumentation import sql_instrumentation
+from app.metrics import metrics
+from app.search import search_tickets
+from app.bulk import BULK_UPDATED, BulkError, bulk_update
+from app import assignment
+from app.routing import routing
 
 tickets = Blueprint('tickets', __name__)
 
 # quando um usuário se conecta ao chat de um ticket
 @socketio.on("join")
+@metrics.socket_event("join")
+@sql_instrumentation.socket_event
 def handle_join(data):
     ticket_id = data.get("ticket_id")
-    join_room(f"ticket_{ticket_id}")
+
+    # as mensagens são enviadas apenas para a sala, então só entra quem pode ver o ticket
+    ticket = db.session.get(Ticket, ticket_id) if isinstance(ticket_id, int) else None
+    if ticket is None or not current_user.is_authenticated or not _can_view_ticket(ticket):
+        return
+    room = message_room(ticket.id)
+    if room not in rooms():
+        join_room(room)
+        metrics.room_joined(room)
 
 @socketio.on("send_message")
+@metrics.socket_event("send_message")
+@sql_instrumentation.socket_event
 def handle_send_message(data):
     ticket_id = data.get("ticket_id")
     message = data.get("message")
 
+    # ignora mensagens vazias ou para tickets que o usuário não pode ver
+    ticket = db.session.get(Ticket, ticket_id) if isinstance(ticket_id, int) else None
+    if not message or ticket is None or not current_user.is_authenticated or not _can_view_ticket(ticket):
+        return
+
+    # no modo write-behind a mensagem é transmitida na hora e gravada em lote depois
+    if message_writer.enabled:
+        message_writer.submit(ticket.id, current_user.id, message)
+        return
+
     # salva no banco
     new_msg = TicketMessage(
         message=message,
-        ticket_id=ticket_id,
+        ticket_id=ticket.id,
         author_id=current_user.id
     )
     db.session.add(new_msg)
     db.session.commit()
+    metrics.messages_persisted()
 
     # envia para todos no room
-    emit("new_message", {
-        "ticket_id": ticket_id,
-        "author_id": current_user.id,
-        "first_name": current_user.first_name,
-        "last_name": current_user.last_name,
-        "message": message,
-        "created_at": new_msg.created_at.isoformat()
-    }, room=f"ticket_{ticket_id}")
+    publish_message(new_msg)
+
+def _can_view_ticket(ticket: Ticket) -> bool:
+    """Indica se o usuário atual pode visualizar o ticket (criador, responsável, setor ou admin)."""
+    if ticket.creator_id == current_user.id or ticket.assignee_id == current_user.id or current_user.is_admin:
+        return True
+    # verificar se o usuário está no setor do ticket
+    return ticket.sector_id in current_user.sector_ids
+
+def _render_ticket(ticket: Ticket) -> Response:
+    """Renderiza a página do ticket com apenas as mensagens mais recentes do chat."""
+    messages, has_more_messages = message_page(ticket.id)
+
+    # cache inicial de autores do cliente: os das mensagens exibidas e o próprio usuário
+    authors = message_authors(messages)
+    authors[current_user.id] = serialize_author(current_user)
+
+    return render_template('dashboard/tickets/view-ticket.html',
+                           ticket=ticket,
+                           messages=messages,
+                           authors=authors,
+                           has_more_messages=has_more_messages,
+                           messages_count=message_count(ticket.id))
 
 @tickets.route('/view/<int:ticket_id>')
 @login_required
@@ -54,17 +103,68 @@ def view_ticket(ticket_id: int) -> Response:
     ticket = Ticket.query.get_or_404(ticket_id)
 
     # verifica se o usuário tem permissão para acessar o ticket
-    ## se o usuário não for o criador, o responsável ou um administrador, redireciona de volta para o dashboard com um erro.
-    if ticket.creator_id != current_user.id and ticket.assignee_id != current_user.id and not current_user.is_admin:
-        # verificar se o usuário está no setor do ticket ou é admin
-        if not current_user.is_admin:
-            user_sectors = [sector.id for sector in current_user.sectors]
-            if ticket.sector_id not in user_sectors:
-                flash('Você não tem permissão para acessar este ticket.', 'danger')
-                return redirect(url_for('dashboard.user_tickets'))
-    
-    messages = TicketMessage.query.filter_by(ticket_id=ticket.id).order_by(TicketMessage.created_at.asc()).all()
-    return render_template('dashboard/tickets/view-ticket.html', ticket=ticket, messages=messages)
+    ## se o usuário não for o criador, o responsável, do setor do ticket ou um administrador, redireciona de volta para o dashboard com um erro.
+    if not _can_view_ticket(ticket):
+        flash('Você não tem permissão para acessar este ticket.', 'danger')
+        return redirect(url_for('dashboard.user_tickets'))
+
+    return _render_ticket(ticket)
+
+@tickets.route('/tickets/<int:ticket_id>/messages')
+@login_required
+def ticket_messages(ticket_id: int) -> Response:
+    """Retorna (em JSON) as mensagens do ticket anteriores a `before`, da mais antiga para a mais nova."""
+    ticket = Ticket.query.get_or_404(ticket_id)
+    if not _can_view_ticket(ticket):
+        abort(403)
+
+    before_id = request.args.get('before', type=int)
+    limit = min(max(request.args.get('limit', MESSAGES_PER_PAGE, type=int), 1), MESSAGES_PER_PAGE)
+
+    messages, has_more = message_page(ticket.id, before_id, limit)
+    return jsonify({
+        'messages': [serialize_message(message) for message in messages],
+        'authors': message_authors(messages),
+        'has_more': has_more,
+    })
+
+@tickets.route('/tickets/authors/<int:user_id>')
+@login_required
+def message_author(user_id: int) -> Response:
+    """Retorna (em JSON) o nome de um autor de mensagens, para o cache do chat."""
+    user = db.session.scalars(
+        select(User).options(load_only(User.id, User.first_name, User.last_name)).where(User.id == user_id)
+    ).first()
+    if user is None:
+        abort(404)
+    return jsonify(serialize_author(user))
+
+@tickets.route('/search')
+@login_required
+def search() -> Response:
+    """Busca tickets por texto (título, descrição e mensagens), entre os que o usuário pode ver.
+
+    Responde em JSON quando o cliente pede `application/json`.
+    """
+    text = request.args.get('q', '', type=str).strip()
+    results = search_tickets(text, current_user, request.args.get('page', 1, type=int))
+
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'tickets': [{
+                'id': ticket.id,
+                'title': ticket.title,
+                'sector': ticket.sector.name,
+                'subject': ticket.subject.name,
+                'status': ticket.status.name,
+                'created_at': ticket.created_at.isoformat(),
+                'url': url_for('tickets.view_ticket', ticket_id=ticket.id),
+            } for ticket in results],
+            'page': results.page,
+            'has_next': results.has_next,
+        })
+
+    return render_template('dashboard/tickets/search.html', results=results, q=text)
 
 @tickets.route('/tickets/add', methods=['GET', 'POST'])
 @login_required
@@ -86,15 +186,17 @@ def add() -> Response:
             sector_id=sector_id,
             subject_id=subject_id,
             priority_id=priority_id,
-            status_id=1
+            status_id=registry.status_id(STATUS_OPEN)
         )
+        # com ROUTING_STRATEGY definida, o ticket já nasce atribuído a um membro do setor
+        routing.route(new_ticket)
         db.session.add(new_ticket)
         db.session.commit()
         flash('Ticket adicionado com sucesso!', 'success')
         return redirect(url_for('dashboard.user_tickets'))
 
-    all_sectors = Sector.query.order_by(Sector.name).all()
-    all_priorities = Priority.query.order_by(Priority.id).all()
+    all_sectors = registry.sectors()
+    all_priorities = registry.priorities()
 
     return render_template('dashboard/tickets/add-ticket.html', 
                            all_sectors=all_sectors,
@@ -104,28 +206,65 @@ def add() -> Response:
 @login_required
 def get_subjects_for_sector(sector_id):
     """Retorna uma lista de assuntos (em JSON) para um determinado setor."""
-    sector = Sector.query.get_or_404(sector_id)
-    subjects_list = [{'id': subject.id, 'name': subject.name} for subject in sector.subjects]
+    if registry.sector(sector_id) is None:
+        abort(404)
+    subjects_list = [{'id': subject.id, 'name': subject.name} for subject in registry.subjects_for_sector(sector_id)]
     return jsonify(subjects_list)
 
 @tickets.route('/tickets/assign/<int:ticket_id>', methods=['POST'])
 @login_required
 def assign_ticket(ticket_id: int) -> Response:
     """Atribui um ticket a um usuário específico."""
-    ticket = Ticket.query.get_or_404(ticket_id)
-
-    if ticket.assignee_id is not None:
+    # a checagem "ainda sem responsável" e a atribuição acontecem no mesmo UPDATE
+    if not assignment.assign_ticket(ticket_id, current_user.id):
+        if db.session.get(Ticket, ticket_id) is None:
+            abort(404)
         flash('Este ticket já está atribuído.', 'warning')
         return redirect(url_for('dashboard.user_tickets'))
-    
-    ticket.status_id = 3
-    ticket.assignee_id = current_user.id
-    ticket.assigned_at = datetime.utcnow()
-    ticket.updated_at = datetime.utcnow()
-    db.session.commit()
+
     flash('Ticket atribuído com sucesso!', 'success')
     return redirect(url_for('dashboard.user_tickets'))
 
+@tickets.route('/tickets/claim-next', methods=['POST'])
+@login_required
+def claim_next() -> Response:
+    """Atribui ao usuário o próximo ticket da fila dos seus setores (maior prioridade, mais antigo)."""
+    ticket_id = assignment.claim_next(current_user)
+
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'ticket_id': ticket_id})
+
+    if ticket_id is None:
+        flash('Nenhum ticket sem responsável nos seus setores.', 'info')
+        return redirect(url_for('dashboard.sector_user_tickets'))
+
+    flash('Ticket atribuído com sucesso!', 'success')
+    return redirect(url_for('tickets.view_ticket', ticket_id=ticket_id))
+
+@tickets.route('/tickets/bulk', methods=['POST'])
+@login_required
+def bulk() -> Response:
+    """Aplica uma ação a vários tickets de uma vez (JSON).
+
+    Corpo: {"ids": [...], "action": "assign" | "reassign" | "status" | "priority" | "move", ...}
+    com user_id, status_id, priority_id ou sector_id (e subject_id) conforme a ação.
+    Retorna o resultado de cada id (ver app/bulk.py).
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Envie um objeto JSON.'}), 400
+
+    try:
+        results = bulk_update(data.get('ids'), data.get('action'), data, current_user)
+    except BulkError as error:
+        return jsonify({'error': str(error)}), 400
+
+    return jsonify({
+        'action': data['action'],
+        'updated': sum(1 for result in results.values() if result == BULK_UPDATED),
+        'results': {str(ticket_id): result for ticket_id, result in results.items()},
+    })
+
 @tickets.route('/tickets/<int:ticket_id>/chat', methods=['GET', 'POST'])
 @login_required
 def chat(ticket_id: int) -> Response:
@@ -150,22 +289,11 @@ def chat(ticket_id: int) -> Response:
             )
             db.session.add(new_message)
             db.session.commit()
+            metrics.messages_persisted()
 
-            socketio.emit('new_message', {
-                'ticket_id': ticket.id,
-                'author_id': current_user.id,
-                'first_name': current_user.first_name,
-                'last_name': current_user.last_name,
-                'message': message,
-                'created_at': new_message.created_at.isoformat()
-            })
-
-    # Carrega todas as mensagens do ticket
-    messages = TicketMessage.query.filter_by(ticket_id=ticket.id).order_by(TicketMessage.created_at.asc()).all()
-
-    return render_template(
-        'dashboard/tickets/view-ticket.html',
-        ticket=ticket,
-        messages=messages
-    )
+            # envia apenas para quem está na sala do ticket
+            publish_message(new_message)
+
+    # carrega apenas as mensagens mais recentes; as anteriores são buscadas sob demanda
+    return _render_ticket(ticket)
 
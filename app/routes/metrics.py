@@ -0,0 +1,25 @@
+import hmac
+import os
+from flask import Blueprint, Response, abort, current_app, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+metrics = Blueprint('metrics', __name__)
+
+@metrics.route('/metrics')
+def view() -> Response:
+    """Exibe as métricas da aplicação no formato de texto do Prometheus.
+
+    Se METRICS_TOKEN estiver definido, exige o cabeçalho `Authorization: Bearer <token>`.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+
+    # com vários workers, soma os arquivos gravados por todos os processos
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
@@ -1,8 +1,13 @@
+import csv
 from app import db
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session, Response
+from datetime import date, datetime
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, Response, stream_with_context, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from app.decorators import admin_required
 from app.models import User
+from app.exports import EXPORT_FORMATS, export_filters, export_tickets
+from app.imports import IMPORT_FORMATS, IMPORT_CHUNK_SIZE, import_tickets
+from app.registry import registry
 
 panel = Blueprint('panel', __name__)
 
@@ -25,3 +30,72 @@ def view() -> 'Response':
 
     return render_template('panel/main.html', user=current_user)
 
+
+@panel.route('/export')
+@login_required
+@admin_required
+def export() -> Response:
+    """Exibe o formulário de exportação de tickets."""
+    return render_template('panel/export.html', all_sectors=registry.sectors(), formats=EXPORT_FORMATS)
+
+@panel.route('/export/tickets')
+@login_required
+@admin_required
+def export_tickets_file() -> Response:
+    """Exporta os tickets em CSV ou JSONL, enviando o arquivo em partes enquanto é gerado.
+
+    Parâmetros: format ('csv' ou 'jsonl'), start e end (AAAA-MM-DD, inclusivos),
+    sector_id (pode repetir) e messages=1 para incluir as conversas.
+    """
+    fmt = request.args.get('format', 'csv', type=str)
+    if fmt not in EXPORT_FORMATS:
+        fmt = 'csv'
+
+    filters = export_filters(
+        start=request.args.get('start', type=date.fromisoformat),
+        end=request.args.get('end', type=date.fromisoformat),
+        sector_ids=request.args.getlist('sector_id', type=int),
+    )
+    include_messages = request.args.get('messages') == '1'
+
+    filename = f"tickets-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(export_tickets(fmt, filters, include_messages)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+@panel.route('/import', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def import_tickets_file() -> Response:
+    """Recebe um arquivo CSV ou JSONL (no formato da exportação) e importa os tickets.
+
+    Reenviar o mesmo arquivo continua uma importação interrompida. Com
+    `Accept: application/json`, o relatório é devolvido em JSON.
+    """
+    if request.method == 'GET':
+        return render_template('panel/import.html', formats=IMPORT_FORMATS, report=None)
+
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        flash('Selecione um arquivo.', 'warning')
+        return redirect(url_for('panel.import_tickets_file'))
+
+    fmt = request.form.get('format') or ('jsonl' if upload.filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv')
+    if fmt not in IMPORT_FORMATS:
+        fmt = 'csv'
+    chunk_size = max(request.form.get('chunk_size', IMPORT_CHUNK_SIZE, type=int) or IMPORT_CHUNK_SIZE, 1)
+
+    try:
+        report = import_tickets(upload.stream, fmt, chunk_size=chunk_size, restart=request.form.get('restart') == '1')
+    except (UnicodeDecodeError, csv.Error) as error:
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({'error': str(error)}), 400
+        flash(f'Erro ao ler o arquivo: {error}', 'danger')
+        return redirect(url_for('panel.import_tickets_file'))
+
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(report.to_dict())
+    return render_template('panel/import.html', formats=IMPORT_FORMATS, report=report)
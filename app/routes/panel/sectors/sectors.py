@@ -1,9 +1,10 @@
 from app import db
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session, Response
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, Response, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from app.decorators import admin_required
 from app.models import Sector
 from app.models import User
+from app.queries import SECTOR_LIST, SUGGESTION_LIMIT, suggestions
 
 sectors = Blueprint('sectors', __name__)
 
@@ -20,25 +21,13 @@ def view() -> Response:
         Response: Um objeto de resposta do Flask que renderiza a lista de setores.
     """
 
-    # obtém os parâmetros de ordenação da requisição
-    sort_by = request.args.get('sort_by', 'id', type=str)
-    direction = request.args.get('direction', 'asc', type=str)
+    # obtém os parâmetros de ordenação da requisição, validados contra as colunas permitidas
+    sort_by, direction, sort_keys = SECTOR_LIST.parse_sort(
+        request.args.get('sort_by', 'id', type=str),
+        request.args.get('direction', 'asc', type=str)
+    )
 
-    # lista de colunas permitidas para evitar injeção de sql
-    allowed_columns = ['id', 'name']
-
-    # valor padrão se a coluna não for permitida
-    if sort_by not in allowed_columns: 
-        sort_by = 'id'
-
-    # valor padrão se a direção for inválida
-    if direction not in ['asc', 'desc']: 
-        direction = 'asc'
-
-    sort_column = getattr(Sector, sort_by)
-    query = Sector.query.order_by(sort_column.asc() if direction == 'asc' else sort_column.desc())
-
-    sectors = query.all()
+    sectors = SECTOR_LIST.all(keys=sort_keys)
     return render_template('panel/sectors/main.html', 
                            sectors=sectors, 
                            sort_by=sort_by, 
@@ -180,9 +169,23 @@ def manage(sector_id) -> Response:
         flash(f'Membros do setor "{sector.name}" atualizados com sucesso!', 'success')
         return redirect(url_for('sectors.view'))
 
-    # busca todos os usuários para os listar 
-    all_users = User.query.order_by(User.username).all()
+    # lista apenas os membros atuais; os demais usuários são encontrados pela pesquisa (users.search)
+    members = [{
+        'id': user.id,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+    } for user in sorted(sector.users, key=lambda user: user.username)]
 
     return render_template('panel/sectors/manage-users.html', 
                            sector=sector, 
-                           all_users=all_users)
\ No newline at end of file
+                           members=members)
+
+@sectors.route('/search')
+@login_required
+@admin_required
+def search() -> Response:
+    """Retorna (em JSON) os setores cujo nome contém o termo `q`, para a pesquisa conforme se digita."""
+    found = suggestions(Sector, (Sector.name,), request.args.get('q', '', type=str),
+                        request.args.get('limit', SUGGESTION_LIMIT, type=int))
+    return jsonify([{'id': sector.id, 'name': sector.name, 'color': sector.color} for sector in found])
\ No newline at end of file
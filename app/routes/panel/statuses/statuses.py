@@ -3,6 +3,7 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import login_user, logout_user, login_required, current_user
 from app.decorators import admin_required
 from app.models import Status
+from app.queries import STATUS_LIST
 
 statuses = Blueprint('statuses', __name__)
 
@@ -19,25 +20,13 @@ def view() -> Response:
         Response: Um objeto de resposta do Flask que renderiza a lista de statuses.
     """
 
-    # obtém os parâmetros de ordenação da requisição
-    sort_by = request.args.get('sort_by', 'id', type=str)
-    direction = request.args.get('direction', 'asc', type=str)
+    # obtém os parâmetros de ordenação da requisição, validados contra as colunas permitidas
+    sort_by, direction, sort_keys = STATUS_LIST.parse_sort(
+        request.args.get('sort_by', 'id', type=str),
+        request.args.get('direction', 'asc', type=str)
+    )
 
-    # lista de colunas permitidas para evitar injeção de sql
-    allowed_columns = ['id', 'name']
-
-    # valor padrão se a coluna não for permitida
-    if sort_by not in allowed_columns: 
-        sort_by = 'id'
-
-    # valor padrão se a direção for inválida
-    if direction not in ['asc', 'desc']: 
-        direction = 'asc'
-
-    sort_column = getattr(Status, sort_by)
-    query = Status.query.order_by(sort_column.asc() if direction == 'asc' else sort_column.desc())
-
-    statuses = query.all()
+    statuses = STATUS_LIST.all(keys=sort_keys)
     return render_template('panel/statuses/main.html', 
                            statuses=statuses, 
                            sort_by=sort_by, 
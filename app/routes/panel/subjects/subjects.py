@@ -1,10 +1,12 @@
 from app import db
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session, Response
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, Response, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from sqlalchemy import func
 from app.decorators import admin_required
 from app.models import Subject
 from app.models import Sector
+from app.queries import SUBJECT_LIST, SUGGESTION_LIMIT, suggestions
+from app.registry import registry
 
 subjects = Blueprint('subjects', __name__)
 
@@ -21,43 +23,14 @@ def view() -> Response:
         Response: Um objeto de resposta do Flask que renderiza a lista de assuntos.
     """
 
-    sort_by = request.args.get('sort_by', 'id', type=str)
-    direction = request.args.get('direction', 'asc', type=str)
+    # valida a ordenação contra as colunas permitidas para evitar injeção de sql
+    sort_by, direction, sort_keys = SUBJECT_LIST.parse_sort(
+        request.args.get('sort_by', 'id', type=str),
+        request.args.get('direction', 'asc', type=str)
+    )
 
-    # lista de colunas permitidas para evitar injeção de sql
-    allowed_columns = ['id', 'name', 'sectors']
-
-    if sort_by not in allowed_columns:
-        # valor padrão se a coluna não for permitida
-        sort_by = 'id'
-
-    if direction not in ['asc', 'desc']:
-         # valor padrão se a direção for inválida
-        direction = 'asc'
-    
-    # constrói a query
-    query = Subject.query
-    if sort_by == 'sectors':
-        # para ordenar por setor, faz join nas tabelas assunto e setor.
-        # agrupa por usuário e ordena pelo nome do primeiro setor em ordem alfabética.
-        # para ordenar por setor, faz join nas tabelas user e setor. nesse caso faz um left join para recuperar usuários também sem setor.
-        # agrupa por usuário e ordena pelo nome do primeiro setor em ordem alfabética.
-        query = query.outerjoin(Subject.sectors).group_by(Subject.id)
-        order_expression = func.min(Sector.name)
-        
-        # .nulls_last() para garantir que os usuários sem setor apareçam sempre no final da lista.
-        if direction == 'asc':
-            query = query.order_by(order_expression.asc().nulls_last())
-        else:
-            query = query.order_by(order_expression.desc().nulls_last())
-    else:
-        # ordenação simples.
-        sort_column = getattr(Subject, sort_by)
-        query = query.order_by(sort_column.asc() if direction == 'asc' else sort_column.desc())
-    
-    
-    subjects = query.all()
-    all_sectors = Sector.query.order_by(Sector.name).all()
+    subjects = SUBJECT_LIST.all(keys=sort_keys)
+    all_sectors = registry.sectors()
 
     return render_template('panel/subjects/main.html', 
                            subjects=subjects, 
@@ -65,6 +38,17 @@ def view() -> Response:
                            sort_by=sort_by, 
                            direction=direction)
 
+@subjects.route('/search')
+@login_required
+@admin_required
+def search() -> Response:
+    """Retorna (em JSON) os assuntos cujo nome contém o termo `q`, opcionalmente apenas os do setor `sector_id`."""
+    sector_id = request.args.get('sector_id', type=int)
+    filters = [Subject.sectors.any(Sector.id == sector_id)] if sector_id else []
+    found = suggestions(Subject, (Subject.name,), request.args.get('q', '', type=str),
+                        request.args.get('limit', SUGGESTION_LIMIT, type=int), filters)
+    return jsonify([{'id': subject.id, 'name': subject.name} for subject in found])
+
 @subjects.route('/add', methods=['GET', 'POST'])
 @login_required
 @admin_required
@@ -96,11 +80,9 @@ def add() -> Response:
             return redirect(url_for('subjects.view'))
         else:
             flash('O nome do assunto é obrigatório.', 'danger')
-            sectors = Sector.query.order_by(Sector.name).all()
-            return render_template('panel/subjects/add-subject.html', all_sectors=sectors, name=name)
+            return render_template('panel/subjects/add-subject.html', all_sectors=registry.sectors(), name=name)
     
-    sectors = Sector.query.order_by(Sector.name).all()
-    return render_template('panel/subjects/add-subject.html', all_sectors=sectors)
+    return render_template('panel/subjects/add-subject.html', all_sectors=registry.sectors())
 
 @subjects.route('/edit/<int:subject_id>', methods=['POST'])
 @login_required
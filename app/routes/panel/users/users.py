@@ -1,10 +1,12 @@
 from app import db
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session, Response
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, Response, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
-from sqlalchemy import func, or_
+from sqlalchemy import func
 from app.decorators import admin_required
 from app.models import User
 from app.models import Sector
+from app.queries import USER_LIST, USER_SEARCH_COLUMNS, SUGGESTION_LIMIT, user_search_filters, suggestions
+from app.registry import registry
 
 users = Blueprint('users', __name__)
 
@@ -14,63 +16,31 @@ users = Blueprint('users', __name__)
 def view() -> Response:
     """Exibe uma lista de usuários.
 
-    Esta rota exibe uma lista de usuários com opções de pesquisa e ordenação.
+    Esta rota exibe uma lista paginada de usuários com opções de pesquisa e ordenação.
     Os usuários podem ser filtrados por nome, email e outros critérios.
 
     Returns:
         Response: Template de visualização de usuários.
     """
 
-    sort_by = request.args.get('sort_by', 'id', type=str)
-    direction = request.args.get('direction', 'asc', type=str)
     search_term = request.args.get('search', '', type=str)
 
-    # lista de colunas permitidas para evitar injeção de sql
-    allowed_columns = ['id', 'username', 'first_name', 'last_name', 'email', 'sectors', 'admin']
-
-    if sort_by not in allowed_columns:
-        # valor padrão se a coluna não for permitida
-        sort_by = 'id'
-
-    if direction not in ['asc', 'desc']:
-         # valor padrão se a direção for inválida
-        direction = 'asc'
-
-    # constrói a query
-    query = User.query
-
-    if search_term:
-        # o '%' é um wildcard, pesquisa por termos que contenham o texto.
-        search_pattern = f"%{search_term}%"
-        # or_() permite pesquisar em múltiplas colunas
-        query = query.filter(
-            or_(
-                User.username.ilike(search_pattern),
-                User.first_name.ilike(search_pattern),
-                User.last_name.ilike(search_pattern),
-                User.email.ilike(search_pattern)
-            )
-        )
-    
-    if sort_by == 'sectors':
-        # para ordenar por setor, faz join nas tabelas user e setor. nesse caso faz um left join para recuperar usuários também sem setor.
-        # agrupa por usuário e ordena pelo nome do primeiro setor em ordem alfabética.
-        query = query.outerjoin(User.sectors).group_by(User.id)
-        order_expression = func.min(Sector.name)
-        
-        # .nulls_last() para garantir que os usuários sem setor apareçam sempre no final da lista.
-        if direction == 'asc':
-            query = query.order_by(order_expression.asc().nulls_last())
-        else:
-            query = query.order_by(order_expression.desc().nulls_last())
-    else:
-        # ordenação simples.
-        sort_column = getattr(User, sort_by)
-        query = query.order_by(sort_column.asc() if direction == 'asc' else sort_column.desc())
-    
-    
-    users = query.all()
-    all_sectors = Sector.query.order_by(Sector.name).all()
+    # valida a ordenação contra as colunas permitidas para evitar injeção de sql
+    sort_by, direction, sort_keys = USER_LIST.parse_sort(
+        request.args.get('sort_by', 'id', type=str),
+        request.args.get('direction', 'asc', type=str)
+    )
+
+    # pesquisa em username, nome, sobrenome e email (índices de trigramas no postgresql)
+    filters = user_search_filters(search_term) if search_term else []
+
+    users = USER_LIST.page(
+        filters=filters,
+        keys=sort_keys,
+        after=request.args.get('after', type=str),
+        before=request.args.get('before', type=str)
+    )
+    all_sectors = registry.sectors()
 
     return render_template('panel/users/main.html', 
                            users=users, 
@@ -79,6 +49,21 @@ def view() -> Response:
                            direction=direction,
                            search=search_term)
 
+@users.route('/search')
+@login_required
+@admin_required
+def search() -> Response:
+    """Retorna (em JSON) os usuários que contêm o termo `q`, para a pesquisa conforme se digita."""
+    found = suggestions(User, USER_SEARCH_COLUMNS, request.args.get('q', '', type=str),
+                        request.args.get('limit', SUGGESTION_LIMIT, type=int))
+    return jsonify([{
+        'id': user.id,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'email': user.email,
+    } for user in found])
+
 @users.route('/add', methods=['GET', 'POST'])
 @login_required
 @admin_required
@@ -153,8 +138,7 @@ def add() -> Response:
             flash(f'Usuário "{user.username}" cadastrado com sucesso com sucesso.', 'success')
             return redirect(url_for('users.view'))
 
-    sectors = Sector.query.order_by(Sector.name).all()
-    return render_template('panel/users/add-user.html', all_sectors=sectors)
+    return render_template('panel/users/add-user.html', all_sectors=registry.sectors())
         
 
 @users.route('/edit/<int:user_id>', methods=['POST'])
@@ -0,0 +1,263 @@
+import heapq
+import os
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Ticket
+from app.models import User
+from app.models import user_sectors
+from app.registry import registry, STATUS_IN_PROGRESS, STATUS_RESOLVED, STATUS_CLOSED
+
+ROUTING_STRATEGIES = ('round_robin', 'least_open', 'priority_weighted')
+
+# status que não contam na carga do atendente
+ROUTING_DONE_STATUSES = [STATUS_RESOLVED, STATUS_CLOSED]
+
+class RoutingEngine:
+    """Atribuição automática dos tickets novos aos membros do setor (opcional, ROUTING_STRATEGY).
+
+    Estratégias:
+
+    - round_robin: os membros do setor, em ordem de id, um de cada vez;
+    - least_open: o membro com menos tickets em aberto;
+    - priority_weighted: o membro com a menor carga, em que cada ticket em
+      aberto pesa conforme a urgência da prioridade (`registry.priority_rank`:
+      a menos urgente pesa 1, a seguinte 2, e assim por diante).
+
+    A carga de cada atendente fica em memória, com um heap por setor, e é
+    carregada com uma única consulta agrupada. Depois disso é mantida pelos
+    eventos da sessão (tickets criados, atribuídos, fechados...), de modo que
+    cada escolha custa O(log n), sem contagens por ticket. As entradas
+    desatualizadas do heap são descartadas quando chegam ao topo. Alterações
+    feitas por outros processos são incorporadas na recarga seguinte (no
+    máximo a cada `resync_interval` segundos).
+    """
+
+    def __init__(self, resync_interval: float = 60):
+        self.strategy = None
+        self.resync_interval = resync_interval
+        self._lock = threading.Lock()
+        self._state = None
+        self._loaded_at = 0.0
+
+    def init_app(self, app) -> None:
+        """Lê a estratégia e o intervalo de recarga da configuração da aplicação."""
+        app.config.setdefault('ROUTING_STRATEGY', os.getenv('ROUTING_STRATEGY', ''))
+        app.config.setdefault('ROUTING_RESYNC_INTERVAL',
+                              float(os.getenv('ROUTING_RESYNC_INTERVAL', self.resync_interval)))
+
+        strategy = app.config['ROUTING_STRATEGY'] or None
+        if strategy is not None and strategy not in ROUTING_STRATEGIES:
+            raise ValueError(f"ROUTING_STRATEGY inválida: {strategy} (use {', '.join(ROUTING_STRATEGIES)})")
+        self.strategy = strategy
+        self.resync_interval = app.config['ROUTING_RESYNC_INTERVAL']
+
+    @property
+    def enabled(self) -> bool:
+        return self.strategy is not None
+
+    def invalidate(self) -> None:
+        """Descarta o estado em memória; a próxima escolha recarrega as cargas."""
+        with self._lock:
+            self._state = None
+
+    # ------------------------------
+    # carga
+    # ------------------------------
+    def weight(self, priority_id: int) -> int:
+        """Quanto um ticket em aberto com a prioridade informada soma à carga do atendente."""
+        if self.strategy != 'priority_weighted':
+            return 1
+        return registry.priority_rank(priority_id) or 1
+
+    def counts(self, status_id) -> bool:
+        """Indica se um ticket com o status informado conta na carga do responsável."""
+        return status_id is not None and status_id not in registry.status_ids(ROUTING_DONE_STATUSES)
+
+    def _load(self) -> dict:
+        members = {}
+        for user_id, sector_id in db.session.execute(
+                select(user_sectors.c.user_id, user_sectors.c.sector_id).order_by(user_sectors.c.user_id)):
+            members.setdefault(sector_id, []).append(user_id)
+
+        # a carga de todos os atendentes numa única consulta agrupada
+        load = {}
+        rows = db.session.execute(
+            select(Ticket.assignee_id, Ticket.priority_id, func.count())
+            .where(Ticket.assignee_id.is_not(None),
+                   Ticket.status_id.not_in(registry.status_ids(ROUTING_DONE_STATUSES)))
+            .group_by(Ticket.assignee_id, Ticket.priority_id)
+        )
+        for user_id, priority_id, count in rows:
+            load[user_id] = load.get(user_id, 0) + self.weight(priority_id) * count
+
+        sectors_of = {}
+        for sector_id, user_ids in members.items():
+            for user_id in user_ids:
+                sectors_of.setdefault(user_id, []).append(sector_id)
+
+        heaps = {}
+        for sector_id, user_ids in members.items():
+            heap = [(load.get(user_id, 0), user_id) for user_id in user_ids]
+            heapq.heapify(heap)
+            heaps[sector_id] = heap
+
+        return {
+            'members': members,
+            'sectors_of': sectors_of,
+            'load': load,
+            'heaps': heaps,
+            # a posição do round-robin sobrevive às recargas
+            'cursor': self._state['cursor'] if self._state else {},
+        }
+
+    def _data(self) -> dict:
+        now = time.monotonic()
+        if self._state is None or now - self._loaded_at >= self.resync_interval:
+            self._state = self._load()
+            self._loaded_at = now
+        return self._state
+
+    def adjust(self, changes: dict) -> None:
+        """Aplica variações de carga ({user_id: delta}) já confirmadas no banco."""
+        with self._lock:
+            state = self._state
+            if state is None:
+                return
+            for user_id, delta in changes.items():
+                if not delta:
+                    continue
+                load = state['load'].get(user_id, 0) + delta
+                state['load'][user_id] = load
+                # a entrada antiga continua no heap e é descartada quando chegar ao topo
+                for sector_id in state['sectors_of'].get(user_id, ()):
+                    heap = state['heaps'][sector_id]
+                    heapq.heappush(heap, (load, user_id))
+                    if len(heap) > 4 * len(state['members'][sector_id]) + 16:
+                        self._compact(state, sector_id)
+
+    def _compact(self, state: dict, sector_id: int) -> None:
+        heap = [(state['load'].get(user_id, 0), user_id) for user_id in state['members'][sector_id]]
+        heapq.heapify(heap)
+        state['heaps'][sector_id] = heap
+
+    # ------------------------------
+    # escolha
+    # ------------------------------
+    def choose(self, sector_id: int):
+        """Retorna o id do atendente que deve receber o próximo ticket do setor, ou None."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            state = self._data()
+            members = state['members'].get(sector_id)
+            if not members:
+                return None
+
+            if self.strategy == 'round_robin':
+                cursor = state['cursor'].get(sector_id, -1) + 1
+                state['cursor'][sector_id] = cursor
+                return members[cursor % len(members)]
+
+            heap = state['heaps'][sector_id]
+            load = state['load']
+            # descarta as entradas desatualizadas do topo
+            while heap and heap[0][0] != load.get(heap[0][1], 0):
+                heapq.heappop(heap)
+            if not heap:
+                self._compact(state, sector_id)
+                heap = state['heaps'][sector_id]
+            return heap[0][1]
+
+    def route(self, ticket: Ticket):
+        """Atribui um ticket novo (ainda não confirmado) a um membro do setor, se o roteamento estiver ativo.
+
+        Returns:
+            int | None: O id do responsável escolhido.
+        """
+        if not self.enabled or ticket.assignee_id is not None:
+            return None
+        user_id = self.choose(int(ticket.sector_id))
+        if user_id is None:
+            return None
+
+        now = datetime.utcnow()
+        ticket.assignee_id = user_id
+        ticket.assigned_at = now
+        ticket.updated_at = now
+        ticket.status_id = registry.status_id(STATUS_IN_PROGRESS)
+        return user_id
+
+routing = RoutingEngine()
+
+def _contributions(state, created: bool = False, deleted: bool = False):
+    """Variação de carga causada por um ticket presente no flush: sai a contribuição antiga, entra a nova.
+
+    Retorna None quando o valor anterior de algum atributo não estava carregado
+    (e a carga não pode ser corrigida sem recarregar).
+    """
+    changes = {}
+
+    def add(assignee_id, status_id, priority_id, sign):
+        # os formulários atribuem os ids como texto
+        if assignee_id is not None and status_id is not None and routing.counts(int(status_id)):
+            assignee_id = int(assignee_id)
+            weight = routing.weight(int(priority_id)) if priority_id is not None else 1
+            changes[assignee_id] = changes.get(assignee_id, 0) + sign * weight
+
+    attrs = state.attrs
+    histories = {name: attrs[name].history for name in ('assignee_id', 'status_id', 'priority_id')}
+    if not created and not deleted and not any(history.has_changes() for history in histories.values()):
+        return changes
+
+    def old(name):
+        history = histories[name]
+        return (history.deleted or history.unchanged or [None])[0]
+
+    def new(name):
+        history = histories[name]
+        return (history.added or history.unchanged or [None])[0]
+
+    if not created:
+        if any(not history.deleted and not history.unchanged for history in histories.values()):
+            return None
+        add(old('assignee_id'), old('status_id'), old('priority_id'), -1)
+    if not deleted:
+        add(new('assignee_id'), new('status_id'), new('priority_id'), +1)
+    return changes
+
+@event.listens_for(Session, 'after_flush')
+def _collect_routing_changes(session, flush_context) -> None:
+    if not routing.enabled:
+        return
+    pending = session.info.setdefault('routing_load_changes', {})
+    tickets = ([(obj, True, False) for obj in session.new] + [(obj, False, False) for obj in session.dirty]
+               + [(obj, False, True) for obj in session.deleted])
+    for obj, created, deleted in tickets:
+        if isinstance(obj, Ticket):
+            changes = _contributions(inspect(obj), created, deleted)
+            if changes is None:
+                session.info['routing_reload'] = True
+                continue
+            for user_id, delta in changes.items():
+                pending[user_id] = pending.get(user_id, 0) + delta
+    # mudanças de setor dos usuários alteram os membros de cada heap
+    if any(isinstance(obj, User) for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info['routing_reload'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _apply_routing_changes(session) -> None:
+    changes = session.info.pop('routing_load_changes', None)
+    if session.info.pop('routing_reload', None):
+        routing.invalidate()
+    elif changes:
+        routing.adjust(changes)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_routing_changes(session, previous_transaction) -> None:
+    session.info.pop('routing_load_changes', None)
+    session.info.pop('routing_reload', None)
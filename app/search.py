@@ -0,0 +1,229 @@
+import re
+from sqlalchemy import DDL, column, event, func, literal_column, or_, select, table, union_all
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from app import db
+from app.models import Ticket
+from app.models import TicketMessage
+from app.queries import TICKET_LIST
+
+# resultados por página da busca e última página alcançável (a paginação é por offset)
+SEARCH_PER_PAGE = 25
+SEARCH_MAX_PAGE = 40
+
+# peso das mensagens no sqlite, onde o bm25 não distingue título e mensagem como os pesos do tsvector
+FTS5_MESSAGE_WEIGHT = 0.5
+
+# ------------------------------
+# índices de busca
+# ------------------------------
+# PostgreSQL: colunas tsvector (dicionário português) mantidas por trigger, com índice GIN.
+# o título pesa mais que a descrição, e a descrição mais que as mensagens.
+POSTGRES_DDL = {
+    'ticket': [
+        "ALTER TABLE ticket ADD COLUMN search_vector tsvector",
+        """CREATE OR REPLACE FUNCTION ticket_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := setweight(to_tsvector('portuguese', coalesce(NEW.title, '')), 'A') ||
+                         setweight(to_tsvector('portuguese', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql""",
+        """CREATE TRIGGER ticket_search_vector BEFORE INSERT OR UPDATE OF title, description ON ticket
+FOR EACH ROW EXECUTE FUNCTION ticket_search_vector_update()""",
+    ],
+    'ticket_message': [
+        "ALTER TABLE ticket_message ADD COLUMN search_vector tsvector",
+        """CREATE OR REPLACE FUNCTION ticket_message_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := setweight(to_tsvector('portuguese', coalesce(NEW.message, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql""",
+        """CREATE TRIGGER ticket_message_search_vector BEFORE INSERT OR UPDATE OF message ON ticket_message
+FOR EACH ROW EXECUTE FUNCTION ticket_message_search_vector_update()""",
+    ],
+}
+
+# índices GIN das colunas tsvector
+POSTGRES_INDEXES = {
+    'ticket': 'ix_ticket_search_vector',
+    'ticket_message': 'ix_ticket_message_search_vector',
+}
+
+# SQLite (execuções locais): tabelas FTS5 de conteúdo externo, sincronizadas por triggers
+SQLITE_DDL = {
+    'ticket': [
+        """CREATE VIRTUAL TABLE ticket_fts USING fts5(title, description, content='ticket', content_rowid='id',
+tokenize='unicode61 remove_diacritics 2')""",
+        # relevância (coluna oculta rank) com o título pesando mais que a descrição
+        "INSERT INTO ticket_fts(ticket_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0)')",
+        """CREATE TRIGGER ticket_fts_insert AFTER INSERT ON ticket BEGIN
+    INSERT INTO ticket_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END""",
+        """CREATE TRIGGER ticket_fts_delete AFTER DELETE ON ticket BEGIN
+    INSERT INTO ticket_fts(ticket_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+END""",
+        """CREATE TRIGGER ticket_fts_update AFTER UPDATE OF title, description ON ticket BEGIN
+    INSERT INTO ticket_fts(ticket_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO ticket_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END""",
+    ],
+    'ticket_message': [
+        """CREATE VIRTUAL TABLE ticket_message_fts USING fts5(message, content='ticket_message', content_rowid='id',
+tokenize='unicode61 remove_diacritics 2')""",
+        """CREATE TRIGGER ticket_message_fts_insert AFTER INSERT ON ticket_message BEGIN
+    INSERT INTO ticket_message_fts(rowid, message) VALUES (new.id, new.message);
+END""",
+        """CREATE TRIGGER ticket_message_fts_delete AFTER DELETE ON ticket_message BEGIN
+    INSERT INTO ticket_message_fts(ticket_message_fts, rowid, message) VALUES ('delete', old.id, old.message);
+END""",
+        """CREATE TRIGGER ticket_message_fts_update AFTER UPDATE OF message ON ticket_message BEGIN
+    INSERT INTO ticket_message_fts(ticket_message_fts, rowid, message) VALUES ('delete', old.id, old.message);
+    INSERT INTO ticket_message_fts(rowid, message) VALUES (new.id, new.message);
+END""",
+    ],
+}
+
+# o banco de produção recebe estes objetos pela migração f3c7d9e5a1b4, que guarda uma cópia
+# própria das instruções (migrações não mudam depois de aplicadas: qualquer alteração aqui
+# precisa de uma nova migração). os eventos abaixo os criam quando as tabelas vêm de
+# `db.create_all()` (testes, benchmarks e bancos locais)
+for _model in (Ticket, TicketMessage):
+    _table = _model.__tablename__
+    for _statement in POSTGRES_DDL[_table]:
+        event.listen(_model.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+    event.listen(_model.__table__, 'after_create',
+                 DDL(f'CREATE INDEX {POSTGRES_INDEXES[_table]} ON {_table} USING gin (search_vector)')
+                 .execute_if(dialect='postgresql'))
+    for _statement in SQLITE_DDL[_table]:
+        event.listen(_model.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+    # as tabelas FTS5 não dependem da tabela original e precisam ser apagadas junto com ela
+    event.listen(_model.__table__, 'after_drop',
+                 DDL(f'DROP TABLE IF EXISTS {_model.__tablename__}_fts').execute_if(dialect='sqlite'))
+
+# ------------------------------
+# busca
+# ------------------------------
+
+class SearchPage:
+    """Uma página de resultados da busca, do mais relevante para o menos relevante.
+
+    Attributes:
+        items (list): Os tickets da página.
+        page (int): O número da página (a partir de 1).
+        has_next (bool): Se existe uma próxima página.
+    """
+
+    def __init__(self, items, page, has_next):
+        self.items = items
+        self.page = page
+        self.has_next = has_next
+
+    @property
+    def has_prev(self) -> bool:
+        return self.page > 1
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+def access_filters(user) -> list:
+    """Filtros dos tickets que o usuário pode ver (mesmas regras de tickets.view_ticket)."""
+    if user.is_admin:
+        return []
+    return [or_(Ticket.creator_id == user.id, Ticket.assignee_id == user.id,
+                Ticket.sector_id.in_(user.sector_ids))]
+
+def _postgres_hits(text: str, filters: list) -> tuple:
+    """Tickets e mensagens encontrados pelos índices GIN, com a relevância de cada linha (ts_rank)."""
+    query = func.websearch_to_tsquery(literal_column("'portuguese'::regconfig"), text)
+    ticket_vector = literal_column('ticket.search_vector', TSVECTOR)
+    message_vector = literal_column('ticket_message.search_vector', TSVECTOR)
+
+    tickets = (
+        select(Ticket.id.label('ticket_id'), func.ts_rank(ticket_vector, query).label('rank'))
+        .where(ticket_vector.op('@@')(query), *filters)
+    )
+    messages = (
+        select(TicketMessage.ticket_id, func.ts_rank(message_vector, query).label('rank'))
+        .where(message_vector.op('@@')(query))
+    )
+    return tickets, messages
+
+def _sqlite_hits(text: str, filters: list) -> tuple:
+    """Tickets e mensagens encontrados pelas tabelas FTS5, com a relevância de cada linha (bm25)."""
+    # cada palavra vira um termo entre aspas (todas obrigatórias), sem a sintaxe de consulta do FTS5
+    query = ' '.join(f'"{term}"' for term in re.findall(r'\w+', text))
+
+    # a coluna oculta rank é o bm25 (menor = mais relevante); a função bm25() não pode ser usada em subconsultas
+    ticket_fts = table('ticket_fts', column('rowid'), column('rank'))
+    message_fts = table('ticket_message_fts', column('rowid'), column('rank'))
+
+    tickets = (
+        select(Ticket.id.label('ticket_id'),
+               (-ticket_fts.c.rank).label('rank'))
+        .select_from(ticket_fts)
+        .join(Ticket, Ticket.id == ticket_fts.c.rowid)
+        .where(literal_column('ticket_fts').op('MATCH')(query), *filters)
+    )
+    messages = (
+        select(TicketMessage.ticket_id,
+               (-message_fts.c.rank * FTS5_MESSAGE_WEIGHT).label('rank'))
+        .select_from(message_fts)
+        .join(TicketMessage, TicketMessage.id == message_fts.c.rowid)
+        .where(literal_column('ticket_message_fts').op('MATCH')(query))
+    )
+    return tickets, messages
+
+def search_tickets(text: str, user, page: int = 1, per_page: int = SEARCH_PER_PAGE) -> SearchPage:
+    """Busca tickets pelo título, pela descrição e pelas mensagens do chat.
+
+    A relevância de cada ticket soma a do próprio ticket e a da mensagem mais
+    relevante dele. O filtro de acesso entra nas duas buscas, então só tickets
+    que o usuário pode ver são considerados e carregados.
+
+    Args:
+        text (str): Os termos pesquisados.
+        user (User): O usuário que pesquisa.
+        page (int, optional): A página pedida (a partir de 1, até SEARCH_MAX_PAGE).
+        per_page (int, optional): Tickets por página.
+
+    Returns:
+        SearchPage: A página de resultados.
+    """
+    page = min(max(page, 1), SEARCH_MAX_PAGE)
+    if not re.search(r'\w', text or ''):
+        return SearchPage([], page, False)
+
+    filters = access_filters(user)
+    if db.engine.dialect.name == 'postgresql':
+        tickets, messages = _postgres_hits(text, filters)
+    else:
+        tickets, messages = _sqlite_hits(text, filters)
+    if filters:
+        messages = messages.join(Ticket, Ticket.id == TicketMessage.ticket_id).where(*filters)
+
+    # a mensagem mais relevante de cada ticket
+    messages = messages.subquery()
+    messages = select(messages.c.ticket_id, func.max(messages.c.rank).label('rank')).group_by(messages.c.ticket_id)
+
+    hits = union_all(tickets, messages).subquery()
+    ranked = (
+        select(hits.c.ticket_id, func.sum(hits.c.rank).label('rank'))
+        .group_by(hits.c.ticket_id)
+        .order_by(func.sum(hits.c.rank).desc(), hits.c.ticket_id.desc())
+        .limit(per_page + 1)
+        .offset((page - 1) * per_page)
+        .subquery()
+    )
+
+    # carrega só os tickets da página, com as mesmas colunas e relações dos dashboards
+    items = (
+        TICKET_LIST.query()
+        .join(ranked, ranked.c.ticket_id == Ticket.id)
+        .order_by(ranked.c.rank.desc(), Ticket.id.desc())
+        .all()
+    )
+    return SearchPage(items[:per_page], page, len(items) > per_page)
@@ -0,0 +1,315 @@
+import json
+import os
+import selectors
+import socket as std_socket
+import threading
+from urllib.parse import urlparse
+from socketio import PubSubManager
+from sqlalchemy.engine import make_url
+
+# canal padrão do flask-socketio
+DEFAULT_CHANNEL = 'flask-socketio'
+
+# limite do payload do NOTIFY no postgresql (8000 bytes), com margem
+NOTIFY_PAYLOAD_LIMIT = 7900
+
+# tempo que uma mensagem grande fica guardada na tabela de overflow
+OVERFLOW_RETENTION_SECONDS = 60
+
+# primeira linha enviada pelas conexões que só publicam no broker local
+PUBLISHER_HELLO = b'PUBLISH'
+
+# bytes pendentes para uma conexão do broker local antes de ela ser desconectada
+BROKER_MAX_BACKLOG = 8 * 1024 * 1024
+
+def _green_modules(server):
+    """Retorna os módulos select e socket compatíveis com o modo assíncrono do servidor."""
+    if server is not None and server.async_mode == 'eventlet':
+        from eventlet.green import select, socket
+        return select, socket
+    import select
+    return select, std_socket
+
+class PostgresManager(PubSubManager):
+    """Distribui os eventos do Socket.IO entre processos via LISTEN/NOTIFY do PostgreSQL.
+
+    Não precisa de nenhum serviço além do banco que a aplicação já usa. Cada
+    processo mantém duas conexões dedicadas (fora do pool do SQLAlchemy): uma
+    para publicar e outra para escutar o canal. Mensagens maiores que o limite
+    do NOTIFY são gravadas na tabela `socketio_overflow` e apenas o id é enviado.
+    """
+    name = 'postgres'
+
+    def __init__(self, url, channel=DEFAULT_CHANNEL, write_only=False, logger=None, json=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        # o psycopg2 não entende o sufixo do driver usado pelo sqlalchemy
+        self.dsn = make_url(url).set(drivername='postgresql').render_as_string(hide_password=False)
+        self._publisher = None
+        self._publish_lock = threading.Lock()
+
+    def _connect(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        connection = psycopg2.connect(self.dsn)
+        connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        return connection
+
+    def _publish(self, data):
+        payload = self.json.dumps(data)
+        with self._publish_lock:
+            for retries_left in range(1, -1, -1):  # 2 tentativas
+                try:
+                    if self._publisher is None or self._publisher.closed:
+                        self._publisher = self._connect()
+                    with self._publisher.cursor() as cursor:
+                        if len(payload.encode('utf-8')) > NOTIFY_PAYLOAD_LIMIT:
+                            cursor.execute(
+                                "DELETE FROM socketio_overflow WHERE created_at < now() - make_interval(secs => %s)",
+                                (OVERFLOW_RETENTION_SECONDS,))
+                            cursor.execute("INSERT INTO socketio_overflow (payload) VALUES (%s) RETURNING id", (payload,))
+                            payload = json.dumps({'overflow_id': cursor.fetchone()[0]})
+                        cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+                    return
+                except Exception as exc:
+                    self._publisher = None
+                    if retries_left > 0:
+                        self._get_logger().error('Cannot publish to postgres... retrying (%s)', exc)
+                    else:
+                        self._get_logger().error('Cannot publish to postgres... giving up (%s)', exc)
+
+    def _resolve(self, connection, payload):
+        """Lê o conteúdo de uma notificação, buscando na tabela de overflow se necessário."""
+        data = json.loads(payload)
+        if 'overflow_id' not in data or 'method' in data:
+            return data
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT payload FROM socketio_overflow WHERE id = %s", (data['overflow_id'],))
+            row = cursor.fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _listen(self):
+        from psycopg2 import sql
+
+        select, _ = _green_modules(self.server)
+        retry_sleep = 1
+        while True:
+            connection = None
+            try:
+                connection = self._connect()
+                with connection.cursor() as cursor:
+                    cursor.execute(sql.SQL('LISTEN {}').format(sql.Identifier(self.channel)))
+                retry_sleep = 1
+
+                while True:
+                    # espera sem bloquear o hub do eventlet
+                    select.select([connection], [], [], 60)
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        message = self._resolve(connection, notify.payload)
+                        if message is not None:
+                            yield message
+            except Exception as exc:
+                self._get_logger().error('Cannot receive from postgres... retrying in %s secs (%s)', retry_sleep, exc)
+                self.server.sleep(retry_sleep)
+                retry_sleep = min(retry_sleep * 2, 60)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+class LocalBrokerManager(PubSubManager):
+    """Distribui os eventos do Socket.IO entre processos através do broker local.
+
+    Alternativa para desenvolvimento, sem PostgreSQL: os processos se conectam a um
+    socket Unix servido por `flask socketio-broker`, que repassa cada linha
+    recebida a todos os conectados.
+    """
+    name = 'local'
+
+    def __init__(self, path, channel=DEFAULT_CHANNEL, write_only=False, logger=None, json=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.path = path
+        self._publisher = None
+        self._publish_lock = threading.Lock()
+
+    def _connect(self):
+        _, socket = _green_modules(self.server)
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(self.path)
+        return connection
+
+    def _publish(self, data):
+        # o canal vai junto para que clusters diferentes possam dividir o mesmo broker
+        line = (self.json.dumps({'channel': self.channel, 'data': data}) + '\n').encode('utf-8')
+        with self._publish_lock:
+            for retries_left in range(1, -1, -1):  # 2 tentativas
+                try:
+                    if self._publisher is None:
+                        self._publisher = self._connect()
+                        # avisa o broker que esta conexão não lê o repasse
+                        self._publisher.sendall(PUBLISHER_HELLO + b'\n')
+                    self._publisher.sendall(line)
+                    return
+                except OSError as exc:
+                    self._publisher = None
+                    if retries_left > 0:
+                        self._get_logger().error('Cannot publish to local broker... retrying (%s)', exc)
+                    else:
+                        self._get_logger().error('Cannot publish to local broker... giving up (%s)', exc)
+
+    def _listen(self):
+        retry_sleep = 1
+        while True:
+            try:
+                with self._connect() as connection, connection.makefile('rb') as stream:
+                    retry_sleep = 1
+                    for line in stream:
+                        envelope = self.json.loads(line)
+                        if envelope.get('channel') == self.channel:
+                            yield envelope['data']
+            except (OSError, ValueError) as exc:
+                self._get_logger().error('Cannot receive from local broker... retrying in %s secs (%s)', retry_sleep, exc)
+            self.server.sleep(retry_sleep)
+            retry_sleep = min(retry_sleep * 2, 60)
+
+def run_local_broker(path: str, max_backlog: int = BROKER_MAX_BACKLOG) -> None:
+    """Serve o broker local: repassa cada linha recebida para todas as conexões que escutam.
+
+    As conexões que apenas publicam se identificam com a linha PUBLISHER_HELLO e
+    não recebem o repasse. Cada conexão que escuta tem um buffer de saída
+    próprio e os envios não bloqueiam; uma conexão que acumula mais de
+    `max_backlog` bytes sem ler é desconectada (o processo reconecta), em vez de
+    parar o broker inteiro.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+
+    server = std_socket.socket(std_socket.AF_UNIX, std_socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+    server.setblocking(False)
+
+    selector = selectors.DefaultSelector()
+    selector.register(server, selectors.EVENT_READ)
+    inputs = {}     # conexão -> linha incompleta recebida
+    outputs = {}    # conexão que escuta -> bytes ainda não enviados
+
+    def close(connection):
+        if connection not in inputs:
+            return
+        selector.unregister(connection)
+        inputs.pop(connection, None)
+        outputs.pop(connection, None)
+        connection.close()
+
+    def flush(connection) -> None:
+        """Envia o que couber do buffer de saída, sem bloquear."""
+        pending = outputs[connection]
+        try:
+            sent = connection.send(pending)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            close(connection)
+            return
+        del pending[:sent]
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if pending else 0)
+        if selector.get_key(connection).events != events:
+            selector.modify(connection, events)
+
+    def fan_out(line: bytes) -> None:
+        for target in list(outputs):
+            if target not in outputs:
+                continue
+            pending = outputs[target]
+            if len(pending) + len(line) > max_backlog:
+                # consumidor lento demais: desconecta em vez de acumular sem limite
+                close(target)
+                continue
+            was_empty = not pending
+            pending += line
+            if was_empty:
+                flush(target)
+
+    try:
+        while True:
+            for key, events in selector.select():
+                if key.fileobj is server:
+                    connection, _ = server.accept()
+                    connection.setblocking(False)
+                    selector.register(connection, selectors.EVENT_READ)
+                    inputs[connection] = b''
+                    outputs[connection] = bytearray()
+                    continue
+
+                connection = key.fileobj
+                if connection not in inputs:
+                    # fechada nesta mesma rodada
+                    continue
+
+                if events & selectors.EVENT_WRITE and connection in outputs:
+                    flush(connection)
+                    if connection not in inputs:
+                        continue
+                if not events & selectors.EVENT_READ:
+                    continue
+
+                try:
+                    chunk = connection.recv(65536)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    chunk = b''
+                if not chunk:
+                    close(connection)
+                    continue
+
+                *lines, inputs[connection] = (inputs[connection] + chunk).split(b'\n')
+                for line in lines:
+                    if line == PUBLISHER_HELLO:
+                        # só publica: não recebe o repasse (e nunca leria o que fosse enviado)
+                        outputs.pop(connection, None)
+                        selector.modify(connection, selectors.EVENT_READ)
+                        continue
+                    fan_out(line + b'\n')
+    finally:
+        server.close()
+        os.remove(path)
+
+def socketio_options(app) -> dict:
+    """Monta as opções do SocketIO para a fila de mensagens configurada.
+
+    SOCKETIO_MESSAGE_QUEUE aceita:
+        - vazio: sem fila, os eventos alcançam apenas o próprio processo;
+        - "postgres" (usa SOCKETIO_DATABASE_URL ou, sem ela, DATABASE_URL) ou uma
+          url postgresql://: LISTEN/NOTIFY;
+        - local:///caminho/do/socket: broker local (`flask socketio-broker`);
+        - qualquer outra url (redis://, amqp://, kafka://...): repassada ao flask-socketio.
+
+    Raises:
+        ValueError: Se o LISTEN/NOTIFY for usar a url do PgBouncer (DB_PGBOUNCER=1).
+            No modo transação o PgBouncer troca a conexão do servidor a cada
+            transação, e o LISTEN da conexão de escuta se perde sem nenhum erro.
+    """
+    app.config.setdefault('SOCKETIO_MESSAGE_QUEUE', os.getenv('SOCKETIO_MESSAGE_QUEUE', ''))
+    app.config.setdefault('SOCKETIO_DATABASE_URL', os.getenv('SOCKETIO_DATABASE_URL', ''))
+    app.config.setdefault('SOCKETIO_CHANNEL', os.getenv('SOCKETIO_CHANNEL', DEFAULT_CHANNEL))
+    url = app.config['SOCKETIO_MESSAGE_QUEUE']
+    channel = app.config['SOCKETIO_CHANNEL']
+
+    if not url:
+        return {}
+    if url == 'postgres':
+        url = app.config['SOCKETIO_DATABASE_URL'] or app.config['SQLALCHEMY_DATABASE_URI']
+    if url.startswith(('postgres://', 'postgresql://', 'postgresql+')):
+        # o mesmo servidor e banco da aplicação, qualquer que seja o driver
+        through_pgbouncer = (make_url(url).set(drivername='postgresql')
+                             == make_url(app.config['SQLALCHEMY_DATABASE_URI']).set(drivername='postgresql'))
+        if app.config.get('DB_PGBOUNCER') and through_pgbouncer:
+            raise ValueError('SOCKETIO_MESSAGE_QUEUE: com DB_PGBOUNCER=1 o LISTEN/NOTIFY precisa de uma conexão '
+                             'direta com o PostgreSQL; defina SOCKETIO_DATABASE_URL (sem passar pelo PgBouncer)')
+        return {'client_manager': PostgresManager(url, channel=channel)}
+    if url.startswith('local://'):
+        return {'client_manager': LocalBrokerManager(urlparse(url).path, channel=channel)}
+    return {'message_queue': url, 'channel': channel}
@@ -0,0 +1,253 @@
+"""Mede a latência e as consultas por requisição das páginas principais e do chat.
+
+Para cada valor de --sizes (quantidade de tickets), cria um banco descartável,
+popula com `flask seed-load` (com --seed fixo, a massa é sempre a mesma) e mede,
+pelo test client do Flask, p50/p95/p99 e consultas ao banco por requisição de:
+dashboard.user_tickets, dashboard.sector_user_tickets, tickets.view_ticket,
+tickets.ticket_messages, tickets.get_subjects_for_sector, users.view e o evento
+send_message do Socket.IO. Cada tamanho roda num processo separado.
+
+Por padrão usa um arquivo SQLite temporário por tamanho. Com --database-url as
+tabelas do banco informado são APAGADAS e recriadas: use apenas um banco de testes.
+
+O resultado sai em JSON (stdout ou --output). Com --baseline, compara com uma
+execução anterior e termina com código 1 se o p95 piorar mais que --threshold
+(com folga mínima de --min-delta-ms) ou se as consultas por requisição aumentarem.
+
+Exemplos:
+    python benchmarks/endpoints.py --sizes 1000,10000 --output antes.json
+    python benchmarks/endpoints.py --sizes 1000,10000 --baseline antes.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_USERNAME = 'bench'
+BENCH_PASSWORD = 'bench'
+
+def percentile(values, pct):
+    """Retorna o percentil `pct` (0-100) de uma lista de valores."""
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+def summarize(latencies, queries) -> dict:
+    """Resume as amostras de um endpoint (latências em segundos, consultas por requisição)."""
+    return {
+        'requests': len(latencies),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'queries': round(statistics.mean(queries), 2),
+        'queries_max': max(queries),
+    }
+
+# ------------------------------
+# processo de medição (um por tamanho)
+# ------------------------------
+def populate(app, size: int, seed: int) -> None:
+    """Recria as tabelas e gera a massa de dados de `size` tickets, mais o usuário do benchmark."""
+    from app import db
+    from app.models import Sector, User
+
+    runner = app.test_cli_runner()
+    db.drop_all()
+    db.create_all()
+    commands = [
+        ['seed-statuses'], ['seed-priorities'], ['seed-subjects'],
+        ['seed-load', '--users', str(max(50, size // 50)), '--tickets', str(size),
+         '--messages', str(size * 5), '--seed', str(seed)],
+    ]
+    for args in commands:
+        result = runner.invoke(args=args)
+        if result.exit_code != 0:
+            raise RuntimeError(f"'flask {' '.join(args)}' falhou: {result.output}") from result.exception
+
+    # admin (para users.view) e membro dos três primeiros setores, como um atendente
+    user = User(username=BENCH_USERNAME, first_name='Bench', last_name='Mark',
+                email='bench@tickets.com', admin=True)
+    user.set_password(BENCH_PASSWORD)
+    user.sectors = Sector.query.order_by(Sector.id).limit(3).all()
+    db.session.add(user)
+    db.session.commit()
+
+def pick_targets(user) -> dict:
+    """Escolhe os parâmetros das rotas: o ticket do setor do usuário com mais mensagens e o setor dele."""
+    from sqlalchemy import func, select
+    from app import db
+    from app.models import Ticket, TicketMessage
+
+    ticket_id = db.session.scalar(
+        select(Ticket.id)
+        .join(TicketMessage, TicketMessage.ticket_id == Ticket.id)
+        .where(Ticket.sector_id.in_(user.sector_ids))
+        .group_by(Ticket.id)
+        .order_by(func.count(TicketMessage.id).desc(), Ticket.id)
+        .limit(1)
+    )
+    return {'ticket_id': ticket_id, 'sector_id': user.sector_ids[0]}
+
+def measure_size(args, size: int) -> dict:
+    """Popula o banco e mede os endpoints; roda no processo filho."""
+    from flask import url_for
+    from sqlalchemy import event
+    from app import create_app, db, socketio
+    from app.models import User
+
+    app = create_app()
+    app.config['TESTING'] = True
+
+    started = time.monotonic()
+    with app.app_context():
+        populate(app, size, args.seed)
+        user = User.query.filter_by(username=BENCH_USERNAME).one()
+        targets = pick_targets(user)
+        engine = db.engine
+    seed_seconds = time.monotonic() - started
+
+    # conta as instruções enviadas ao banco durante cada requisição
+    counter = [0]
+    def count_query(*_):
+        counter[0] += 1
+    event.listen(engine, 'before_cursor_execute', count_query)
+
+    client = app.test_client()
+    response = client.post('/auth/login', data={'username': BENCH_USERNAME, 'password': BENCH_PASSWORD})
+    if response.status_code != 302:
+        raise RuntimeError('Falha no login do usuário do benchmark.')
+    socket_client = socketio.test_client(app, flask_test_client=client)
+    socket_client.emit('join', {'ticket_id': targets['ticket_id']})
+
+    with app.test_request_context():
+        pages = {
+            'dashboard.user_tickets': url_for('dashboard.user_tickets'),
+            'dashboard.sector_user_tickets': url_for('dashboard.sector_user_tickets'),
+            'tickets.view_ticket': url_for('tickets.view_ticket', ticket_id=targets['ticket_id']),
+            'tickets.ticket_messages': url_for('tickets.ticket_messages', ticket_id=targets['ticket_id']),
+            'tickets.get_subjects_for_sector': url_for('tickets.get_subjects_for_sector',
+                                                       sector_id=targets['sector_id']),
+            'users.view': url_for('users.view'),
+        }
+
+    def http_request(url):
+        def run():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f'{url} respondeu {response.status_code}.')
+        return run
+
+    def send_message():
+        socket_client.emit('send_message', {'ticket_id': targets['ticket_id'], 'message': 'benchmark'})
+        socket_client.get_received()
+
+    operations = {name: http_request(url) for name, url in pages.items()}
+    operations['socketio.send_message'] = send_message
+
+    endpoints = {}
+    for name, operation in operations.items():
+        for _ in range(args.warmup):
+            operation()
+        latencies, queries = [], []
+        for _ in range(args.requests):
+            counter[0] = 0
+            began = time.perf_counter()
+            operation()
+            latencies.append(time.perf_counter() - began)
+            queries.append(counter[0])
+        endpoints[name] = summarize(latencies, queries)
+        print(f"  {name:<34} p50={endpoints[name]['p50_ms']:>8}ms  p95={endpoints[name]['p95_ms']:>8}ms  "
+              f"consultas={endpoints[name]['queries']}", file=sys.stderr)
+
+    socket_client.disconnect()
+    return {'size': size, 'seed_seconds': round(seed_seconds, 1), 'endpoints': endpoints}
+
+def worker(args) -> None:
+    """Ponto de entrada do processo filho: mede um tamanho e imprime o resultado em JSON."""
+    sys.path.insert(0, ROOT)
+    print(json.dumps(measure_size(args, args.worker)))
+
+# ------------------------------
+# processo principal
+# ------------------------------
+def run_size(args, size: int, directory: str) -> dict:
+    """Mede um tamanho num processo novo, com o banco próprio."""
+    database_url = args.database_url or f"sqlite:///{os.path.join(directory, f'bench-{size}.db')}"
+    env = dict(os.environ, DATABASE_URL=database_url, FLASK_SECRET_KEY='benchmark',
+               BCRYPT_LOG_ROUNDS='4', PASSWORD_HASH_OFFLOAD='0', SQL_INSTRUMENTATION='0')
+    command = [sys.executable, os.path.abspath(__file__), '--worker', str(size),
+               '--requests', str(args.requests), '--warmup', str(args.warmup), '--seed', str(args.seed)]
+    print(f"tamanho={size} ({database_url.split(':')[0]})", file=sys.stderr)
+    output = subprocess.run(command, cwd=ROOT, env=env, stdout=subprocess.PIPE, check=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def compare(baseline: dict, current: dict, threshold: float, min_delta_ms: float) -> list:
+    """Lista as regressões de `current` em relação a `baseline` (mesmo tamanho e endpoint)."""
+    previous = {(run['size'], name): stats
+                for run in baseline['runs'] for name, stats in run['endpoints'].items()}
+    regressions = []
+    for run in current['runs']:
+        for name, stats in run['endpoints'].items():
+            before = previous.get((run['size'], name))
+            if before is None:
+                continue
+            if stats['queries'] > before['queries']:
+                regressions.append(f"{name} (tamanho {run['size']}): consultas {before['queries']} -> {stats['queries']}")
+            delta = stats['p95_ms'] - before['p95_ms']
+            if delta > min_delta_ms and delta > before['p95_ms'] * threshold:
+                regressions.append(f"{name} (tamanho {run['size']}): p95 {before['p95_ms']}ms -> {stats['p95_ms']}ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000', help='Quantidades de tickets, separadas por vírgula.')
+    parser.add_argument('--requests', type=int, default=200, help='Requisições medidas por endpoint.')
+    parser.add_argument('--warmup', type=int, default=20, help='Requisições descartadas antes da medição.')
+    parser.add_argument('--seed', type=int, default=1, help='Semente do seed-load.')
+    parser.add_argument('--database-url', help='Banco de testes (as tabelas são apagadas). Padrão: SQLite temporário.')
+    parser.add_argument('--output', help='Arquivo para gravar o resultado (padrão: stdout).')
+    parser.add_argument('--baseline', help='Resultado anterior para comparar.')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Piora relativa do p95 tolerada (0.2 = 20%%).')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='Piora absoluta do p95 sempre tolerada.')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        worker(args)
+        return
+
+    with tempfile.TemporaryDirectory(prefix='tickets-bench-') as directory:
+        runs = [run_size(args, int(size), directory) for size in args.sizes.split(',')]
+    result = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'database': (args.database_url or 'sqlite').split(':')[0],
+        'requests': args.requests,
+        'runs': runs,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(result, file, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(json.load(file), result, args.threshold, args.min_delta_ms)
+        for regression in regressions:
+            print(f'REGRESSÃO: {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print('Sem regressões em relação ao baseline.', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
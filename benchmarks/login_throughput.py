@@ -0,0 +1,105 @@
+"""Mede a vazão de logins e a latência dos sockets do chat sob carga simultânea.
+
+Roda contra um servidor já iniciado (ex.: `python run.py` ou gunicorn com worker
+eventlet). Compare duas execuções do servidor, com PASSWORD_HASH_OFFLOAD=1 e =0:
+sem o offload, a latência dos sockets cresce junto com o número de logins.
+
+Exemplo:
+    python benchmarks/login_throughput.py --url http://localhost:5000 \\
+        --username admin --password admin --concurrency 8 --sockets 20 --duration 10
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+
+import requests
+import socketio
+
+def percentile(values, pct):
+    """Retorna o percentil `pct` (0-100) de uma lista de valores."""
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+def login_worker(args, deadline, results, lock):
+    """Faz logins seguidos até o prazo, cada um numa sessão nova."""
+    while time.monotonic() < deadline:
+        session = requests.Session()
+        started = time.perf_counter()
+        response = session.post(f'{args.url}/auth/login',
+                                data={'username': args.username, 'password': args.password},
+                                allow_redirects=False)
+        elapsed = time.perf_counter() - started
+        with lock:
+            results['latencies'].append(elapsed)
+            # login bem-sucedido redireciona para a página inicial
+            results['ok' if response.status_code == 302 else 'failed'] += 1
+
+def socket_worker(args, deadline, latencies, lock):
+    """Mantém um cliente Socket.IO conectado medindo o tempo de ida e volta de cada evento."""
+    client = socketio.Client()
+    client.connect(args.url, transports=['websocket'])
+    try:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            # o servidor responde ao "join" (ack) mesmo sem entrar na sala
+            client.call('join', {'ticket_id': 0}, timeout=30)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+            time.sleep(args.socket_interval)
+    finally:
+        client.disconnect()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--concurrency', type=int, default=8, help='Logins simultâneos.')
+    parser.add_argument('--sockets', type=int, default=20, help='Clientes Socket.IO conectados durante o teste.')
+    parser.add_argument('--socket-interval', type=float, default=0.1, help='Intervalo entre eventos de cada socket (s).')
+    parser.add_argument('--duration', type=float, default=10, help='Duração do teste (s).')
+    args = parser.parse_args()
+
+    lock = threading.Lock()
+    results = {'ok': 0, 'failed': 0, 'latencies': []}
+    socket_latencies = []
+    deadline = time.monotonic() + args.duration
+
+    threads = [threading.Thread(target=socket_worker, args=(args, deadline, socket_latencies, lock))
+               for _ in range(args.sockets)]
+    threads += [threading.Thread(target=login_worker, args=(args, deadline, results, lock))
+                for _ in range(args.concurrency)]
+
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    def summary(values):
+        return {
+            'count': len(values),
+            'mean_ms': round(statistics.mean(values) * 1000, 2) if values else None,
+            'p50_ms': round(percentile(values, 50) * 1000, 2) if values else None,
+            'p95_ms': round(percentile(values, 95) * 1000, 2) if values else None,
+            'p99_ms': round(percentile(values, 99) * 1000, 2) if values else None,
+            'max_ms': round(max(values) * 1000, 2) if values else None,
+        }
+
+    print(json.dumps({
+        'duration_s': round(elapsed, 2),
+        'logins_ok': results['ok'],
+        'logins_failed': results['failed'],
+        'logins_per_s': round(results['ok'] / elapsed, 2),
+        'login_latency': summary(results['latencies']),
+        'socket_latency': summary(socket_latencies),
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Mede requisições por segundo do dashboard para diferentes tamanhos de pool.
+
+Para cada valor de --pool-sizes, inicia a aplicação (eventlet, com monkey patch)
+com DB_POOL_SIZE=<n> e DB_MAX_OVERFLOW=0, faz login com --concurrency clientes e
+repete GET --path durante --duration segundos. Usa o DATABASE_URL do ambiente
+(.env); o resultado só é representativo com PostgreSQL.
+
+Exemplo:
+    python benchmarks/pool_load.py --pool-sizes 1,2,5,10,20 --concurrency 32 --duration 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVER = (
+    "import eventlet; eventlet.monkey_patch()\n"
+    "from run import app\n"
+    "from app import socketio\n"
+    "socketio.run(app, host='127.0.0.1', port={port}, log_output=False)\n"
+)
+
+def percentile(values, pct):
+    """Retorna o percentil `pct` (0-100) de uma lista de valores."""
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+def start_server(port: int, pool_size: int, extra_env: dict) -> subprocess.Popen:
+    """Inicia a aplicação num processo separado e espera ela responder."""
+    env = dict(os.environ, DB_POOL_SIZE=str(pool_size), DB_MAX_OVERFLOW='0', **extra_env)
+    process = subprocess.Popen([sys.executable, '-c', SERVER.format(port=port)], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'http://127.0.0.1:{port}/auth/login', timeout=1)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('A aplicação não respondeu em 30 segundos.')
+
+def run_load(args, port: int) -> dict:
+    """Dispara as requisições com `args.concurrency` clientes autenticados."""
+    base = f'http://127.0.0.1:{port}'
+    sessions = []
+    for _ in range(args.concurrency):
+        session = requests.Session()
+        response = session.post(f'{base}/auth/login', data={'username': args.username, 'password': args.password},
+                                allow_redirects=False)
+        if response.status_code != 302:
+            raise RuntimeError('Falha no login; confira --username e --password.')
+        sessions.append(session)
+
+    lock = threading.Lock()
+    latencies = []
+    errors = [0]
+    deadline = time.monotonic() + args.duration
+
+    def worker(session):
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                ok = session.get(f'{base}{args.path}', timeout=60).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker, args=(session,)) for session in sessions]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': round(len(latencies) / elapsed, 2),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pool-sizes', default='1,2,5,10,20', help='Tamanhos de pool, separados por vírgula.')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--path', default='/dashboard/user_tickets')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--port', type=int, default=5077)
+    parser.add_argument('--pgbouncer', action='store_true', help='Roda com DB_PGBOUNCER=1 (o pool fica a cargo do PgBouncer).')
+    args = parser.parse_args()
+
+    extra_env = {'DB_PGBOUNCER': '1'} if args.pgbouncer else {}
+    results = []
+    for pool_size in [int(size) for size in args.pool_sizes.split(',')]:
+        process = start_server(args.port, pool_size, extra_env)
+        try:
+            result = {'pool_size': pool_size, **run_load(args, args.port)}
+        finally:
+            process.terminate()
+            process.wait()
+        results.append(result)
+        print(f"pool={pool_size:>3}  rps={result['rps']:>8}  p50={result['p50_ms']}ms  "
+              f"p95={result['p95_ms']}ms  erros={result['errors']}", file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
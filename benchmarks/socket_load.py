@@ -0,0 +1,262 @@
+"""Teste de carga do chat: muitas conexões Socket.IO autenticadas trocando mensagens.
+
+Cada conexão usa o cookie de sessão de um login feito por HTTP, entra na sala
+de um dos tickets de --ticket-ids (evento "join", como a página do ticket) e
+recebe os eventos "new_message" da sala. Durante --duration segundos são
+enviadas --rate mensagens por segundo ("send_message"), cada uma por uma
+conexão sorteada. Ao final, mede:
+
+- latência de fan-out: do envio até o recebimento em cada conexão da sala;
+- mensagens perdidas: recebimentos esperados (todas as conexões da sala) que
+  não chegaram até --drain segundos depois do último envio;
+- memória do servidor por conexão: diferença do RSS antes e depois de abrir as
+  conexões (Linux; com --start-server ou --server-pid).
+
+Com --start-server a aplicação é iniciada aqui (eventlet, DATABASE_URL do
+ambiente/.env) e encerrada ao final. Com a mesma --seed, os remetentes e os
+intervalos entre envios se repetem. As mensagens enviadas são gravadas no
+banco: use um banco de testes (ex.: populado com `flask seed-load`).
+
+Exemplo:
+    python benchmarks/socket_load.py --start-server --connections 2000 \\
+        --ticket-ids 1-50 --rate 50 --duration 30
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+import socketio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVER = (
+    "import eventlet; eventlet.monkey_patch()\n"
+    "from run import app\n"
+    "from app import socketio\n"
+    "socketio.run(app, host='127.0.0.1', port={port}, log_output=False, max_size={max_size})\n"
+)
+
+# prefixo das mensagens do teste: bench:<id da mensagem>
+MESSAGE_PREFIX = 'bench:'
+
+def percentile(values, pct):
+    """Retorna o percentil `pct` (0-100) de uma lista de valores."""
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+def parse_ids(value: str) -> list:
+    """Converte '1-50,60,70' em [1, ..., 50, 60, 70]."""
+    ids = []
+    for part in value.split(','):
+        start, _, end = part.partition('-')
+        ids.extend(range(int(start), int(end or start) + 1))
+    return ids
+
+def server_rss(pid) -> int:
+    """Memória residente (bytes) do processo `pid`, lida de /proc; None se indisponível."""
+    if pid is None:
+        return None
+    try:
+        with open(f'/proc/{pid}/status') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+def start_server(port: int, max_size: int) -> subprocess.Popen:
+    """Inicia a aplicação num processo separado e espera ela responder.
+
+    `max_size` é o limite de conexões simultâneas do servidor do eventlet (padrão dele: 1024).
+    """
+    process = subprocess.Popen([sys.executable, '-c', SERVER.format(port=port, max_size=max_size)], cwd=ROOT,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'http://127.0.0.1:{port}/auth/login', timeout=1)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('A aplicação não respondeu em 30 segundos.')
+
+def login(url: str, username: str, password: str) -> str:
+    """Faz login por HTTP e retorna o cabeçalho Cookie da sessão."""
+    session = requests.Session()
+    response = session.post(f'{url}/auth/login', data={'username': username, 'password': password},
+                            allow_redirects=False)
+    if response.status_code != 302:
+        raise RuntimeError('Falha no login; confira --username e --password.')
+    return '; '.join(f'{name}={value}' for name, value in session.cookies.items())
+
+class LoadTest:
+    """Estado compartilhado do teste: conexões por sala, envios e recebimentos."""
+
+    def __init__(self, args):
+        self.args = args
+        self.lock = threading.Lock()
+        self.clients = []
+        self.members = {}        # ticket_id -> quantidade de conexões na sala
+        self.sent = {}           # id da mensagem -> (ticket_id, instante do envio, conexões esperadas)
+        self.latencies = []
+        self.received = 0
+        self.unexpected = 0
+        self.connect_errors = 0
+        self.connect_error = None
+
+    def on_message(self, data) -> None:
+        now = time.perf_counter()
+        text = data.get('message') or ''
+        if not text.startswith(MESSAGE_PREFIX):
+            return
+        with self.lock:
+            sent = self.sent.get(text[len(MESSAGE_PREFIX):])
+            if sent is None:
+                self.unexpected += 1
+                return
+            self.received += 1
+            self.latencies.append(now - sent[1])
+
+    def connect(self, ticket_id: int, cookie: str) -> None:
+        """Abre uma conexão, entra na sala do ticket e a registra."""
+        client = socketio.Client(reconnection=False)
+        client.on('new_message', self.on_message)
+        try:
+            client.connect(self.args.url, headers={'Cookie': cookie}, transports=['websocket'],
+                           wait_timeout=30)
+            # o ack garante que o servidor já processou a entrada na sala
+            client.call('join', {'ticket_id': ticket_id}, timeout=30)
+        except Exception as error:
+            with self.lock:
+                self.connect_errors += 1
+                self.connect_error = self.connect_error or repr(error)
+            return
+        with self.lock:
+            self.clients.append((client, ticket_id))
+            self.members[ticket_id] = self.members.get(ticket_id, 0) + 1
+
+    def send(self, message_id: str, client, ticket_id: int) -> None:
+        with self.lock:
+            self.sent[message_id] = (ticket_id, time.perf_counter(), self.members[ticket_id])
+        client.emit('send_message', {'ticket_id': ticket_id, 'message': f'{MESSAGE_PREFIX}{message_id}'})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None, help='Servidor já iniciado (padrão: http://127.0.0.1:<porta>).')
+    parser.add_argument('--start-server', action='store_true', help='Inicia a aplicação neste script.')
+    parser.add_argument('--port', type=int, default=5078)
+    parser.add_argument('--server-pid', type=int, help='Pid do servidor, para medir a memória sem --start-server.')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--logins', type=int, default=1, help='Sessões HTTP distintas, repartidas entre as conexões.')
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--connect-rate', type=float, default=100, help='Novas conexões por segundo.')
+    parser.add_argument('--ticket-ids', default='1-20', help="Tickets (salas), ex.: '1-50,60'.")
+    parser.add_argument('--rate', type=float, default=20, help='Mensagens enviadas por segundo.')
+    parser.add_argument('--duration', type=float, default=20, help='Duração dos envios (s).')
+    parser.add_argument('--drain', type=float, default=5, help='Espera pelos recebimentos após o último envio (s).')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    args.url = args.url or f'http://127.0.0.1:{args.port}'
+
+    rng = random.Random(args.seed)
+    ticket_ids = parse_ids(args.ticket_ids)
+    process = start_server(args.port, args.connections + 100) if args.start_server else None
+    pid = process.pid if process else args.server_pid
+
+    try:
+        cookies = [login(args.url, args.username, args.password) for _ in range(args.logins)]
+        test = LoadTest(args)
+
+        # ------------------------------
+        # conexões
+        # ------------------------------
+        rss_before = server_rss(pid)
+        started = time.monotonic()
+        pool = eventlet.GreenPool(args.connections)
+        for i in range(args.connections):
+            pool.spawn_n(test.connect, ticket_ids[i % len(ticket_ids)], cookies[i % len(cookies)])
+            eventlet.sleep(1 / args.connect_rate)
+        pool.waitall()
+        connect_seconds = time.monotonic() - started
+        eventlet.sleep(1)
+        rss_after = server_rss(pid)
+        print(f'{len(test.clients)} conexões em {connect_seconds:.1f}s ({test.connect_errors} falhas)', file=sys.stderr)
+        if not test.clients:
+            raise RuntimeError('Nenhuma conexão foi aberta.')
+
+        # ------------------------------
+        # envios
+        # ------------------------------
+        started = time.monotonic()
+        deadline = started + args.duration
+        count = 0
+        while time.monotonic() < deadline:
+            client, ticket_id = rng.choice(test.clients)
+            eventlet.spawn_n(test.send, f'{args.seed}-{count}', client, ticket_id)
+            count += 1
+            # chegadas de Poisson com a taxa pedida
+            eventlet.sleep(rng.expovariate(args.rate))
+        send_seconds = time.monotonic() - started
+        eventlet.sleep(args.drain)
+
+        with test.lock:
+            expected = sum(members for _, _, members in test.sent.values())
+            latencies = list(test.latencies)
+            received = test.received
+
+        def memory(value):
+            return round(value / 1024 / 1024, 1) if value is not None else None
+
+        result = {
+            'connections': len(test.clients),
+            'connect_errors': test.connect_errors,
+            'first_connect_error': test.connect_error,
+            'connect_seconds': round(connect_seconds, 2),
+            'rooms': len(test.members),
+            'messages_sent': count,
+            'send_rate': round(count / send_seconds, 2),
+            'deliveries_expected': expected,
+            'deliveries_received': received,
+            'deliveries_dropped': expected - received,
+            'drop_ratio': round((expected - received) / expected, 4) if expected else None,
+            'unexpected_messages': test.unexpected,
+            'fanout_latency': {
+                'mean_ms': round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+                'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+                'p95_ms': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+                'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+                'max_ms': round(max(latencies) * 1000, 2) if latencies else None,
+            },
+            'server_rss_before_mb': memory(rss_before),
+            'server_rss_after_mb': memory(rss_after),
+            'server_bytes_per_connection': (round((rss_after - rss_before) / len(test.clients))
+                                            if rss_before is not None and rss_after is not None else None),
+        }
+
+        for client, _ in test.clients:
+            client.disconnect()
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    print(json.dumps(result, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+# configuração do gunicorn para rodar com vários workers, ex.:
+#   PROMETHEUS_MULTIPROC_DIR=/tmp/tickets-metrics SOCKETIO_MESSAGE_QUEUE=postgres \
+#   gunicorn -k eventlet -w 4 -b 0.0.0.0:5000 run:app
+import os
+import shutil
+
+def on_starting(server):
+    # descarta as métricas gravadas por uma execução anterior
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+def child_exit(server, worker):
+    # remove os gauges do worker encerrado da soma do /metrics
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+def _flush_chat_messages():
+    # grava as mensagens do chat ainda na fila do write-behind (CHAT_WRITE_BEHIND=1)
+    from app.message_writer import message_writer
+    if message_writer.enabled:
+        message_writer.flush()
+
+def worker_exit(server, worker):
+    # encerramento do worker (SIGTERM, reinício): o atexit não é garantido
+    _flush_chat_messages()
+
+def worker_int(worker):
+    # SIGINT/SIGQUIT: encerramento rápido do worker
+    _flush_chat_messages()
+
+def worker_abort(worker):
+    # SIGABRT: o worker estourou o timeout e será morto em seguida
+    _flush_chat_messages()
@@ -0,0 +1,66 @@
+"""trigram search indexes
+
+Revision ID: a4d8e0f2b6c1
+Revises: f3c7d9e5a1b4
+Create Date: 2026-10-18 17:12:09.384615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d8e0f2b6c1'
+down_revision = 'f3c7d9e5a1b4'
+branch_labels = None
+depends_on = None
+
+
+def drop_invalid_index(name):
+    """Remove o índice deixado INVALID por um CREATE INDEX CONCURRENTLY que falhou.
+
+    Sem isso, o IF NOT EXISTS da nova tentativa pularia o índice inválido e a
+    migração terminaria sem um índice utilizável. Índices válidos são mantidos
+    (no modo offline, --sql, não há como consultar o catálogo).
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or op.get_context().as_sql:
+        return
+    invalid = bind.execute(sa.text('SELECT 1 FROM pg_index WHERE indexrelid = to_regclass(:name) AND NOT indisvalid'),
+                           {'name': name}).first()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+# colunas pesquisadas com ILIKE '%termo%' no painel (ver app/queries.py)
+TRIGRAM_INDEXES = [
+    ('ix_user_username_trgm', 'user', 'username'),
+    ('ix_user_first_name_trgm', 'user', 'first_name'),
+    ('ix_user_last_name_trgm', 'user', 'last_name'),
+    ('ix_user_email_trgm', 'user', 'email'),
+    ('ix_subject_name_trgm', 'subject', 'name'),
+    ('ix_sector_name_trgm', 'sector', 'name'),
+]
+
+
+def upgrade():
+    # índices de trigramas só existem no PostgreSQL
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for name, table, column in TRIGRAM_INDEXES:
+            drop_invalid_index(name)
+            op.create_index(name, table, [column], unique=False, postgresql_using='gin',
+                            postgresql_ops={column: 'gin_trgm_ops'},
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        for name, table, _ in TRIGRAM_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,34 @@
+"""import checkpoint
+
+Revision ID: b5e9f1a3c7d2
+Revises: a4d8e0f2b6c1
+Create Date: 2026-10-18 18:03:27.514062
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e9f1a3c7d2'
+down_revision = 'a4d8e0f2b6c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # progresso das importações de tickets (ver app/imports.py)
+    op.create_table('import_checkpoint',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('imported', sa.Integer(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('import_checkpoint')
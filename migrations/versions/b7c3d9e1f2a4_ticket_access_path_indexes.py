@@ -0,0 +1,64 @@
+"""ticket access path indexes
+
+Revision ID: b7c3d9e1f2a4
+Revises: ae8f45550a1d
+Create Date: 2026-10-18 09:12:40.118273
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c3d9e1f2a4'
+down_revision = 'ae8f45550a1d'
+branch_labels = None
+depends_on = None
+
+
+def drop_invalid_index(name):
+    """Remove o índice deixado INVALID por um CREATE INDEX CONCURRENTLY que falhou.
+
+    Sem isso, o IF NOT EXISTS da nova tentativa pularia o índice inválido e a
+    migração terminaria sem um índice utilizável. Índices válidos são mantidos
+    (no modo offline, --sql, não há como consultar o catálogo).
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or op.get_context().as_sql:
+        return
+    invalid = bind.execute(sa.text('SELECT 1 FROM pg_index WHERE indexrelid = to_regclass(:name) AND NOT indisvalid'),
+                           {'name': name}).first()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+# (nome, tabela, colunas) de cada índice
+INDEXES = [
+    # contadores e listagem de tickets criados pelo usuário
+    ('ix_ticket_creator_id_status_id', 'ticket', ['creator_id', 'status_id']),
+    # contadores e listagem de tickets atribuídos ao usuário
+    ('ix_ticket_assignee_id_status_id', 'ticket', ['assignee_id', 'status_id']),
+    # tickets dos setores do usuário filtrados por status
+    ('ix_ticket_sector_id_status_id', 'ticket', ['sector_id', 'status_id']),
+    # ordenação por data de criação
+    ('ix_ticket_created_at', 'ticket', ['created_at']),
+    # histórico de mensagens de um ticket em ordem cronológica
+    ('ix_ticket_message_ticket_id_created_at', 'ticket_message', ['ticket_id', 'created_at']),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY não pode rodar dentro de uma transação,
+    # por isso os índices são criados em modo autocommit (sem bloquear escritas).
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            drop_invalid_index(name)
+            op.create_index(name, table, columns, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table,
+                          postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,30 @@
+"""reference version
+
+Revision ID: c4e8a2b6d0f1
+Revises: b7c3d9e1f2a4
+Create Date: 2026-10-18 11:03:27.402519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a2b6d0f1'
+down_revision = 'b7c3d9e1f2a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    reference_version = op.create_table('reference_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # linha única lida por todos os workers para saber quando recarregar o registro
+    op.bulk_insert(reference_version, [{'id': 1, 'version': 1}])
+
+
+def downgrade():
+    op.drop_table('reference_version')
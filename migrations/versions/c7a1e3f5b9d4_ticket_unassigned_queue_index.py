@@ -0,0 +1,48 @@
+"""ticket unassigned queue index
+
+Revision ID: c7a1e3f5b9d4
+Revises: b5e9f1a3c7d2
+Create Date: 2026-10-18 18:41:55.207318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a1e3f5b9d4'
+down_revision = 'b5e9f1a3c7d2'
+branch_labels = None
+depends_on = None
+
+
+def drop_invalid_index(name):
+    """Remove o índice deixado INVALID por um CREATE INDEX CONCURRENTLY que falhou.
+
+    Sem isso, o IF NOT EXISTS da nova tentativa pularia o índice inválido e a
+    migração terminaria sem um índice utilizável. Índices válidos são mantidos
+    (no modo offline, --sql, não há como consultar o catálogo).
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or op.get_context().as_sql:
+        return
+    invalid = bind.execute(sa.text('SELECT 1 FROM pg_index WHERE indexrelid = to_regclass(:name) AND NOT indisvalid'),
+                           {'name': name}).first()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+def upgrade():
+    # fila de tickets sem responsável por setor, na ordem do "pegar próximo" (ver app/assignment.py);
+    # parcial, só com os tickets sem responsável
+    with op.get_context().autocommit_block():
+        drop_invalid_index('ix_ticket_unassigned_queue')
+        op.create_index('ix_ticket_unassigned_queue', 'ticket', ['sector_id', 'priority_id', 'created_at'], unique=False,
+                        postgresql_where=sa.text('assignee_id IS NULL'), sqlite_where=sa.text('assignee_id IS NULL'),
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_ticket_unassigned_queue', table_name='ticket',
+                      postgresql_concurrently=True, if_exists=True)
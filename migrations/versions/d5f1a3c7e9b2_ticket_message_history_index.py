@@ -0,0 +1,52 @@
+"""ticket message history index
+
+Revision ID: d5f1a3c7e9b2
+Revises: c4e8a2b6d0f1
+Create Date: 2026-10-18 13:41:08.227613
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f1a3c7e9b2'
+down_revision = 'c4e8a2b6d0f1'
+branch_labels = None
+depends_on = None
+
+
+def drop_invalid_index(name):
+    """Remove o índice deixado INVALID por um CREATE INDEX CONCURRENTLY que falhou.
+
+    Sem isso, o IF NOT EXISTS da nova tentativa pularia o índice inválido e a
+    migração terminaria sem um índice utilizável. Índices válidos são mantidos
+    (no modo offline, --sql, não há como consultar o catálogo).
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or op.get_context().as_sql:
+        return
+    invalid = bind.execute(sa.text('SELECT 1 FROM pg_index WHERE indexrelid = to_regclass(:name) AND NOT indisvalid'),
+                           {'name': name}).first()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+def upgrade():
+    # o histórico passa a ser paginado por id (keyset), então o índice
+    # (ticket_id, created_at) é substituído por (ticket_id, id)
+    with op.get_context().autocommit_block():
+        drop_invalid_index('ix_ticket_message_ticket_id_id')
+        op.create_index('ix_ticket_message_ticket_id_id', 'ticket_message', ['ticket_id', 'id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_ticket_message_ticket_id_created_at', table_name='ticket_message',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        drop_invalid_index('ix_ticket_message_ticket_id_created_at')
+        op.create_index('ix_ticket_message_ticket_id_created_at', 'ticket_message', ['ticket_id', 'created_at'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_ticket_message_ticket_id_id', table_name='ticket_message',
+                      postgresql_concurrently=True, if_exists=True)
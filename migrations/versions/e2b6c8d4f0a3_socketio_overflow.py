@@ -0,0 +1,32 @@
+"""socketio overflow
+
+Revision ID: e2b6c8d4f0a3
+Revises: d5f1a3c7e9b2
+Create Date: 2026-10-18 14:22:51.639104
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b6c8d4f0a3'
+down_revision = 'd5f1a3c7e9b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # mensagens do socket.io grandes demais para o NOTIFY (ver app/socket_bus.py)
+    op.create_table('socketio_overflow',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_socketio_overflow_created_at', 'socketio_overflow', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_socketio_overflow_created_at', table_name='socketio_overflow')
+    op.drop_table('socketio_overflow')
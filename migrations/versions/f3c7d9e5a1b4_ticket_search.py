@@ -0,0 +1,163 @@
+"""ticket search
+
+Revision ID: f3c7d9e5a1b4
+Revises: e2b6c8d4f0a3
+Create Date: 2026-10-18 16:05:42.918273
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c7d9e5a1b4'
+down_revision = 'e2b6c8d4f0a3'
+branch_labels = None
+depends_on = None
+
+
+def drop_invalid_index(name):
+    """Remove o índice deixado INVALID por um CREATE INDEX CONCURRENTLY que falhou.
+
+    Sem isso, o IF NOT EXISTS da nova tentativa pularia o índice inválido e a
+    migração terminaria sem um índice utilizável. Índices válidos são mantidos
+    (no modo offline, --sql, não há como consultar o catálogo).
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or op.get_context().as_sql:
+        return
+    invalid = bind.execute(sa.text('SELECT 1 FROM pg_index WHERE indexrelid = to_regclass(:name) AND NOT indisvalid'),
+                           {'name': name}).first()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+# linhas preenchidas (e confirmadas) por vez no backfill das colunas tsvector
+BACKFILL_BATCH_SIZE = 5000
+
+TICKET_VECTOR = """setweight(to_tsvector('portuguese', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('portuguese', coalesce(description, '')), 'B')"""
+TICKET_MESSAGE_VECTOR = """setweight(to_tsvector('portuguese', coalesce(message, '')), 'C')"""
+
+# percorre a tabela por faixas de id com um COMMIT a cada lote: cada transação bloqueia
+# e reescreve só as linhas do lote. atualizar apenas search_vector não dispara o trigger
+BACKFILL_TEMPLATE = """DO $$
+DECLARE
+    last_id integer := 0;
+    max_id integer;
+BEGIN
+    SELECT coalesce(max(id), 0) INTO max_id FROM {table};
+    WHILE last_id < max_id LOOP
+        UPDATE {table} SET search_vector = {vector}
+        WHERE id > last_id AND id <= last_id + {batch_size} AND search_vector IS NULL;
+        last_id := last_id + {batch_size};
+        COMMIT;
+    END LOOP;
+END
+$$"""
+
+
+# busca textual dos tickets e das mensagens (ver app/search.py):
+# tsvector + GIN no PostgreSQL, FTS5 no SQLite
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        upgrade_postgresql()
+    elif op.get_bind().dialect.name == 'sqlite':
+        upgrade_sqlite()
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        downgrade_postgresql()
+    elif op.get_bind().dialect.name == 'sqlite':
+        downgrade_sqlite()
+
+
+def upgrade_postgresql():
+    op.add_column('ticket', sa.Column('search_vector', sa.dialects.postgresql.TSVECTOR(), nullable=True))
+    op.add_column('ticket_message', sa.Column('search_vector', sa.dialects.postgresql.TSVECTOR(), nullable=True))
+
+    op.execute("""CREATE FUNCTION ticket_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := setweight(to_tsvector('portuguese', coalesce(NEW.title, '')), 'A') ||
+                         setweight(to_tsvector('portuguese', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql""")
+    op.execute("""CREATE TRIGGER ticket_search_vector BEFORE INSERT OR UPDATE OF title, description ON ticket
+FOR EACH ROW EXECUTE FUNCTION ticket_search_vector_update()""")
+
+    op.execute("""CREATE FUNCTION ticket_message_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := setweight(to_tsvector('portuguese', coalesce(NEW.message, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql""")
+    op.execute("""CREATE TRIGGER ticket_message_search_vector BEFORE INSERT OR UPDATE OF message ON ticket_message
+FOR EACH ROW EXECUTE FUNCTION ticket_message_search_vector_update()""")
+
+    # preenche as linhas existentes em lotes, fora da transação da migração (o trigger cuida das novas)
+    with op.get_context().autocommit_block():
+        op.execute(BACKFILL_TEMPLATE.format(table='ticket', vector=TICKET_VECTOR, batch_size=BACKFILL_BATCH_SIZE))
+        op.execute(BACKFILL_TEMPLATE.format(table='ticket_message', vector=TICKET_MESSAGE_VECTOR,
+                                            batch_size=BACKFILL_BATCH_SIZE))
+
+    with op.get_context().autocommit_block():
+        drop_invalid_index('ix_ticket_search_vector')
+        op.create_index('ix_ticket_search_vector', 'ticket', ['search_vector'], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+        drop_invalid_index('ix_ticket_message_search_vector')
+        op.create_index('ix_ticket_message_search_vector', 'ticket_message', ['search_vector'], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade_postgresql():
+    op.drop_index('ix_ticket_message_search_vector', table_name='ticket_message', if_exists=True)
+    op.drop_index('ix_ticket_search_vector', table_name='ticket', if_exists=True)
+    op.execute('DROP TRIGGER IF EXISTS ticket_message_search_vector ON ticket_message')
+    op.execute('DROP TRIGGER IF EXISTS ticket_search_vector ON ticket')
+    op.execute('DROP FUNCTION IF EXISTS ticket_message_search_vector_update()')
+    op.execute('DROP FUNCTION IF EXISTS ticket_search_vector_update()')
+    op.drop_column('ticket_message', 'search_vector')
+    op.drop_column('ticket', 'search_vector')
+
+
+def upgrade_sqlite():
+    op.execute("""CREATE VIRTUAL TABLE ticket_fts USING fts5(title, description, content='ticket', content_rowid='id',
+tokenize='unicode61 remove_diacritics 2')""")
+    op.execute("INSERT INTO ticket_fts(ticket_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0)')")
+    op.execute("""CREATE TRIGGER ticket_fts_insert AFTER INSERT ON ticket BEGIN
+    INSERT INTO ticket_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END""")
+    op.execute("""CREATE TRIGGER ticket_fts_delete AFTER DELETE ON ticket BEGIN
+    INSERT INTO ticket_fts(ticket_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+END""")
+    op.execute("""CREATE TRIGGER ticket_fts_update AFTER UPDATE OF title, description ON ticket BEGIN
+    INSERT INTO ticket_fts(ticket_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO ticket_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END""")
+
+    op.execute("""CREATE VIRTUAL TABLE ticket_message_fts USING fts5(message, content='ticket_message', content_rowid='id',
+tokenize='unicode61 remove_diacritics 2')""")
+    op.execute("""CREATE TRIGGER ticket_message_fts_insert AFTER INSERT ON ticket_message BEGIN
+    INSERT INTO ticket_message_fts(rowid, message) VALUES (new.id, new.message);
+END""")
+    op.execute("""CREATE TRIGGER ticket_message_fts_delete AFTER DELETE ON ticket_message BEGIN
+    INSERT INTO ticket_message_fts(ticket_message_fts, rowid, message) VALUES ('delete', old.id, old.message);
+END""")
+    op.execute("""CREATE TRIGGER ticket_message_fts_update AFTER UPDATE OF message ON ticket_message BEGIN
+    INSERT INTO ticket_message_fts(ticket_message_fts, rowid, message) VALUES ('delete', old.id, old.message);
+    INSERT INTO ticket_message_fts(rowid, message) VALUES (new.id, new.message);
+END""")
+
+    # indexa as linhas existentes
+    op.execute("INSERT INTO ticket_fts(ticket_fts) VALUES ('rebuild')")
+    op.execute("INSERT INTO ticket_message_fts(ticket_message_fts) VALUES ('rebuild')")
+
+
+def downgrade_sqlite():
+    for trigger in ('ticket_fts_insert', 'ticket_fts_delete', 'ticket_fts_update',
+                    'ticket_message_fts_insert', 'ticket_message_fts_delete', 'ticket_message_fts_update'):
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS ticket_message_fts')
+    op.execute('DROP TABLE IF EXISTS ticket_fts')
@@ -0,0 +1,115 @@
+import os
+import pytest
+
+# a aplicação lê a configuração das variáveis de ambiente ao ser criada
+os.environ.setdefault('FLASK_SECRET_KEY', 'test')
+os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+
+@pytest.fixture
+def make_app(tmp_path_factory, monkeypatch):
+    """Cria aplicações, cada uma com um banco SQLite temporário já com as tabelas e os cadastros básicos."""
+    from app import create_app, db
+    apps = []
+
+    def make():
+        monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path_factory.mktemp("db") / "tickets.db"}')
+        app = create_app()
+        app.config['TESTING'] = True
+        apps.append(app)
+
+        runner = app.test_cli_runner()
+        with app.app_context():
+            db.create_all()
+            for command in ('seed-statuses', 'seed-priorities', 'seed-subjects', 'create-admin'):
+                result = runner.invoke(args=[command])
+                assert result.exit_code == 0, (command, result.output, result.exception)
+        _reset_caches()
+        return app
+
+    yield make
+
+    _reset_caches()
+    for app in apps:
+        with app.app_context():
+            db.engine.dispose()
+
+def _reset_caches() -> None:
+    from app.registry import registry
+    from app.counters import ticket_counters
+    from app.routing import routing
+    # os caches em memória são globais e não podem passar de um banco para outro
+    registry.invalidate()
+    ticket_counters.clear()
+    routing.invalidate()
+
+@pytest.fixture
+def app(make_app):
+    """Aplicação com um banco SQLite temporário, já com as tabelas e os cadastros básicos."""
+    return make_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def make_user(app):
+    """Cria um usuário nos setores informados e retorna o id (a senha é o próprio username)."""
+    from app import db
+    from app.models import User
+    from app.models import Sector
+
+    def make(username: str, sector_ids=(), admin: bool = False) -> int:
+        with app.app_context():
+            user = User(username=username, first_name=username.title(), last_name='Teste',
+                        email=f'{username}@tickets.com', password_hash='', admin=admin)
+            user.set_password(username)
+            user.sectors = [db.session.get(Sector, sector_id) for sector_id in sector_ids]
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return make
+
+@pytest.fixture
+def make_ticket(app):
+    """Cria um ticket e retorna o id; setor, assunto e prioridade padrão são os primeiros cadastrados."""
+    from datetime import datetime
+    from sqlalchemy import select
+    from app import db
+    from app.models import Ticket
+    from app.models import Sector
+    from app.models import Priority
+    from app.registry import registry, STATUS_OPEN
+
+    def make(creator_id: int, sector_id: int = None, status: str = STATUS_OPEN, priority_id: int = None,
+             assignee_id: int = None, created_at: datetime = None) -> int:
+        with app.app_context():
+            sector = db.session.get(Sector, sector_id) if sector_id else db.session.scalar(
+                select(Sector).where(Sector.subjects.any()).order_by(Sector.id))
+            ticket = Ticket(title='Ticket', description='descrição', creator_id=creator_id,
+                            assignee_id=assignee_id, sector_id=sector.id, subject_id=sector.subjects[0].id,
+                            status_id=registry.status_id(status),
+                            priority_id=priority_id or db.session.scalar(select(Priority.id).order_by(Priority.id)),
+                            created_at=created_at or datetime.utcnow())
+            db.session.add(ticket)
+            db.session.commit()
+            return ticket.id
+    return make
+
+@pytest.fixture
+def sector_ids(app):
+    """Os ids dos setores que têm assuntos, em ordem."""
+    from sqlalchemy import select
+    from app import db
+    from app.models import Sector
+
+    with app.app_context():
+        return db.session.scalars(select(Sector.id).where(Sector.subjects.any()).order_by(Sector.id)).all()
+
+@pytest.fixture
+def login(client):
+    """Autentica o cliente de teste (a senha dos usuários de `make_user` é o próprio username)."""
+    def log_in(username: str, password: str = None):
+        response = client.post('/auth/login', data={'username': username, 'password': password or username})
+        assert response.status_code == 302, response.status_code
+        return client
+    return log_in
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models import Ticket
+from app.models import User
+from app.registry import registry, STATUS_IN_PROGRESS, STATUS_RESOLVED
+from app.assignment import assign_ticket, claim_next
+
+def _priorities(app) -> list:
+    """Os ids das prioridades, da menos para a mais urgente."""
+    with app.app_context():
+        return [priority.id for priority in registry.priorities()]
+
+def test_second_assign_does_not_overwrite(app, make_user, make_ticket, sector_ids):
+    """O UPDATE condicional só atribui tickets sem responsável: a segunda atribuição falha."""
+    first = make_user('first', sector_ids=[sector_ids[0]])
+    second = make_user('second', sector_ids=[sector_ids[0]])
+    ticket_id = make_ticket(first, sector_id=sector_ids[0])
+
+    with app.app_context():
+        assert assign_ticket(ticket_id, first) is True
+        assert assign_ticket(ticket_id, second) is False
+
+        ticket = db.session.get(Ticket, ticket_id)
+        assert ticket.assignee_id == first
+        assert ticket.status_id == registry.status_id(STATUS_IN_PROGRESS)
+        assert ticket.assigned_at is not None
+
+def test_assign_missing_ticket(app, make_user):
+    user = make_user('user')
+    with app.app_context():
+        assert assign_ticket(999999, user) is False
+
+def test_claim_next_order(app, make_user, make_ticket, sector_ids):
+    """Pega primeiro a prioridade mais urgente e, entre as de mesma prioridade, o ticket mais antigo."""
+    agent = make_user('agent', sector_ids=sector_ids[:2])
+    low, urgent = _priorities(app)[0], _priorities(app)[-1]
+    start = datetime(2026, 1, 1)
+
+    old_low = make_ticket(agent, sector_id=sector_ids[0], priority_id=low, created_at=start)
+    new_urgent = make_ticket(agent, sector_id=sector_ids[1], priority_id=urgent, created_at=start + timedelta(days=2))
+    old_urgent = make_ticket(agent, sector_id=sector_ids[0], priority_id=urgent, created_at=start + timedelta(days=1))
+    # fora da fila: já atribuído, resolvido ou de outro setor
+    make_ticket(agent, sector_id=sector_ids[0], priority_id=urgent, created_at=start,
+                status=STATUS_IN_PROGRESS, assignee_id=agent)
+    make_ticket(agent, sector_id=sector_ids[0], priority_id=urgent, created_at=start, status=STATUS_RESOLVED)
+    make_ticket(agent, sector_id=sector_ids[2], priority_id=urgent, created_at=start)
+
+    with app.app_context():
+        user = db.session.get(User, agent)
+        assert [claim_next(user) for _ in range(4)] == [old_urgent, new_urgent, old_low, None]
+        assert db.session.get(Ticket, old_low).assignee_id == agent
+
+def test_claim_next_gives_different_tickets(app, make_user, make_ticket, sector_ids):
+    first = make_user('first', sector_ids=[sector_ids[0]])
+    second = make_user('second', sector_ids=[sector_ids[0]])
+    tickets = {make_ticket(first, sector_id=sector_ids[0]) for _ in range(2)}
+
+    with app.app_context():
+        claimed = {claim_next(db.session.get(User, first)), claim_next(db.session.get(User, second))}
+        assert claimed == tickets
+        assert claim_next(db.session.get(User, second)) is None
+
+def test_claim_next_without_sectors(app, make_user, make_ticket, sector_ids):
+    make_ticket(make_user('creator', sector_ids=[sector_ids[0]]), sector_id=sector_ids[0])
+    lonely = make_user('lonely')
+    with app.app_context():
+        assert claim_next(db.session.get(User, lonely)) is None
@@ -0,0 +1,83 @@
+from sqlalchemy import select
+from app import db
+from app.models import Ticket
+from app.models import Priority
+from app.registry import registry, STATUS_IN_PROGRESS
+
+BULK_URL = '/tickets/tickets/bulk'
+
+def _priority_ids(app) -> list:
+    with app.app_context():
+        return db.session.scalars(select(Priority.id).order_by(Priority.id)).all()
+
+def _ticket(app, ticket_id: int) -> Ticket:
+    with app.app_context():
+        ticket = db.session.get(Ticket, ticket_id)
+        db.session.expunge(ticket)
+        return ticket
+
+def test_results_per_id_and_sector_access(app, make_user, make_ticket, sector_ids, login):
+    """Quem não é administrador só altera tickets dos próprios setores; os demais ids são relatados."""
+    member = make_user('member', sector_ids=[sector_ids[0]])
+    own = make_ticket(member, sector_id=sector_ids[0])
+    other = make_ticket(member, sector_id=sector_ids[1])
+    low, high = _priority_ids(app)[0], _priority_ids(app)[-1]
+
+    response = login('member').post(BULK_URL, json={
+        'ids': [own, other, 999999], 'action': 'priority', 'priority_id': high})
+
+    assert response.status_code == 200
+    assert response.json['updated'] == 1
+    assert response.json['results'] == {str(own): 'updated', str(other): 'forbidden', '999999': 'not_found'}
+    assert _ticket(app, own).priority_id == high
+    # o ticket do outro setor não foi alterado, mesmo tendo sido criado pelo próprio usuário
+    assert _ticket(app, other).priority_id == low
+
+def test_non_member_cannot_update_other_sector(app, make_user, make_ticket, sector_ids, login):
+    owner = make_user('owner', sector_ids=[sector_ids[0]])
+    outsider = make_user('outsider', sector_ids=[sector_ids[1]])
+    ticket_id = make_ticket(owner, sector_id=sector_ids[0])
+
+    response = login('outsider').post(BULK_URL, json={'ids': [ticket_id], 'action': 'assign', 'user_id': outsider})
+
+    assert response.json['results'] == {str(ticket_id): 'forbidden'}
+    ticket = _ticket(app, ticket_id)
+    assert ticket.assignee_id is None
+
+def test_assign_skips_tickets_with_assignee(app, make_user, make_ticket, sector_ids, login):
+    """`assign` só pega tickets sem responsável; `reassign` sobrescreve."""
+    agent = make_user('agent', sector_ids=[sector_ids[0]])
+    colleague = make_user('colleague', sector_ids=[sector_ids[0]])
+    free = make_ticket(agent, sector_id=sector_ids[0])
+    taken = make_ticket(agent, sector_id=sector_ids[0], status=STATUS_IN_PROGRESS, assignee_id=colleague)
+
+    client = login('agent')
+    response = client.post(BULK_URL, json={'ids': [free, taken], 'action': 'assign', 'user_id': agent})
+    assert response.json['results'] == {str(free): 'updated', str(taken): 'skipped'}
+    assert _ticket(app, taken).assignee_id == colleague
+
+    response = client.post(BULK_URL, json={'ids': [taken], 'action': 'reassign', 'user_id': agent})
+    assert response.json['results'] == {str(taken): 'updated'}
+    with app.app_context():
+        assert _ticket(app, taken).assignee_id == agent
+        assert _ticket(app, free).status_id == registry.status_id(STATUS_IN_PROGRESS)
+
+def test_assignee_must_be_member_of_the_ticket_sector(app, make_user, make_ticket, sector_ids, login):
+    make_user('admin2', admin=True)
+    outsider = make_user('outsider', sector_ids=[sector_ids[1]])
+    ticket_id = make_ticket(outsider, sector_id=sector_ids[0])
+
+    response = login('admin2').post(BULK_URL, json={'ids': [ticket_id], 'action': 'assign', 'user_id': outsider})
+
+    assert response.json['results'] == {str(ticket_id): 'skipped'}
+
+def test_invalid_requests(app, make_user, sector_ids, login):
+    make_user('member', sector_ids=[sector_ids[0]])
+    client = login('member')
+
+    assert client.post(BULK_URL, json={'ids': [1], 'action': 'delete'}).status_code == 400
+    assert client.post(BULK_URL, json={'ids': [], 'action': 'priority', 'priority_id': 1}).status_code == 400
+    assert client.post(BULK_URL, json={'ids': ['1'], 'action': 'priority', 'priority_id': 1}).status_code == 400
+    # mover para um setor do qual não é membro
+    response = client.post(BULK_URL, json={'ids': [1], 'action': 'move', 'sector_id': sector_ids[1]})
+    assert response.status_code == 400
@@ -0,0 +1,79 @@
+from sqlalchemy import insert, select
+from app import db
+from app.models import Ticket
+from app.models import ReferenceVersion
+from app.registry import registry, STATUS_OPEN, STATUS_IN_PROGRESS
+from app.counters import ticket_counters, COUNTERS_VERSION_ID
+
+def test_status_change_invalidates_only_the_ticket_keys(app, make_user, make_ticket, sector_ids):
+    """Mudar o status de um ticket invalida o criador e o setor, não o usuário cujo id coincide com o status."""
+    with app.app_context():
+        in_progress = registry.status_id(STATUS_IN_PROGRESS)
+    # usuários até que exista um com o mesmo id do novo status
+    users = [make_user(f'user{index}') for index in range(in_progress)]
+    creator = users[0]
+    bystander = in_progress
+    assert bystander in users and bystander != creator
+
+    ticket_id = make_ticket(creator, sector_id=sector_ids[0], status=STATUS_OPEN)
+
+    with app.app_context():
+        ticket_counters.clear()
+        ticket_counters.user_counts(creator)
+        ticket_counters.user_counts(bystander)
+        ticket_counters.sector_count([sector_ids[0]])
+
+        db.session.get(Ticket, ticket_id).status_id = in_progress
+        db.session.commit()
+
+        assert ticket_counters._get(('user', bystander)) is not None
+        assert ticket_counters._get(('user', creator)) is None
+        assert ticket_counters._get(('sector', sector_ids[0])) is None
+
+def test_move_invalidates_both_sectors(app, make_user, make_ticket, sector_ids):
+    creator = make_user('creator')
+    ticket_id = make_ticket(creator, sector_id=sector_ids[0])
+
+    with app.app_context():
+        ticket_counters.sector_count(sector_ids[:3])
+
+        ticket = db.session.get(Ticket, ticket_id)
+        ticket.sector_id = sector_ids[1]
+        ticket.subject_id = registry.subjects_for_sector(sector_ids[1])[0].id
+        db.session.commit()
+
+        assert ticket_counters._get(('sector', sector_ids[0])) is None
+        assert ticket_counters._get(('sector', sector_ids[1])) is None
+        assert ticket_counters._get(('sector', sector_ids[2])) is not None
+
+def test_version_bump_from_another_process_clears_the_cache(app, make_user, make_ticket, monkeypatch):
+    """Quando outro processo incrementa a versão dos contadores (ex.: `flask import-tickets`), este esvazia o cache."""
+    creator = make_user('creator')
+    ticket_id = make_ticket(creator)
+    monkeypatch.setattr(ticket_counters, 'check_interval', 0)
+
+    with app.app_context():
+        assert ticket_counters.user_counts(creator)['open'] == 1
+
+        # cópia do ticket inserida em lote, sem passar pelos eventos da sessão: o cache continua com 1
+        columns = [column for column in Ticket.__table__.c if column.name != 'id']
+        db.session.execute(insert(Ticket).from_select(columns, select(*columns).where(Ticket.id == ticket_id)))
+        db.session.commit()
+        assert ticket_counters.user_counts(creator)['open'] == 1
+
+        # o outro processo incrementa a versão numa conexão própria
+        with db.engine.begin() as connection:
+            connection.execute(insert(ReferenceVersion).values(id=COUNTERS_VERSION_ID, version=1))
+        assert ticket_counters.user_counts(creator)['open'] == 2
+
+def test_invalidate_everywhere_clears_this_process_on_commit(app, make_user, make_ticket):
+    creator = make_user('creator')
+    make_ticket(creator)
+
+    with app.app_context():
+        ticket_counters.user_counts(creator)
+        ticket_counters.invalidate_everywhere(db.session)
+        assert ticket_counters._get(('user', creator)) is not None
+        db.session.commit()
+        assert ticket_counters._get(('user', creator)) is None
+        assert db.session.get(ReferenceVersion, COUNTERS_VERSION_ID).version == 1
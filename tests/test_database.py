@@ -0,0 +1,22 @@
+import logging
+import pytest
+from psycopg2 import extensions
+from app.database import green_psycopg2
+
+@pytest.fixture
+def wait_callback():
+    previous = extensions.get_wait_callback()
+    extensions.set_wait_callback(None)
+    yield
+    extensions.set_wait_callback(previous)
+
+def test_green_psycopg2_without_monkey_patch(wait_callback, caplog):
+    """Com o eventlet como modo assíncrono o psycopg2 fica cooperativo mesmo sem o monkey patch, com um aviso."""
+    with caplog.at_level(logging.WARNING, logger='app.database'):
+        assert green_psycopg2('eventlet')
+    assert extensions.get_wait_callback() is not None
+    assert 'monkey patch' in caplog.text
+
+def test_green_psycopg2_other_async_modes(wait_callback):
+    assert not green_psycopg2('threading')
+    assert extensions.get_wait_callback() is None
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event, insert, select
+from app import db
+from app.models import Ticket
+from app.models import User
+from app.models import Sector
+from app.models import Priority
+from app.registry import registry
+from app.counters import ticket_counters, SECTOR_OPEN_STATUSES
+from app.queries import TICKET_LIST
+
+# consultas de uma página das listagens com os caches frios, qualquer que seja o
+# número de tickets: usuário da sessão e setores (2), recarga do registry (6),
+# versão e valores dos contadores (2) e a própria página (1)
+MAX_QUERIES = 11
+
+TICKET_COUNTS = (10, 500)
+
+LIST_ENDPOINTS = ('/dashboard/user_tickets', '/dashboard/sector_user_tickets')
+
+def _seed_tickets(count: int) -> None:
+    """Cria `count` tickets do admin, distribuídos pelos setores dele, com status e prioridades variados."""
+    admin = db.session.scalar(select(User).where(User.username == 'admin'))
+    admin.sectors = [sector for sector in db.session.scalars(select(Sector).order_by(Sector.id)).all()
+                     if sector.subjects][:3]
+    db.session.commit()
+
+    statuses = registry.status_ids(SECTOR_OPEN_STATUSES)
+    priorities = db.session.scalars(select(Priority.id)).all()
+    created_at = datetime(2026, 1, 1)
+    rows = []
+    for index in range(count):
+        sector = admin.sectors[index % len(admin.sectors)]
+        rows.append({
+            'title': f'Ticket {index}',
+            'description': 'descrição',
+            'created_at': created_at + timedelta(minutes=index),
+            'updated_at': created_at + timedelta(minutes=index),
+            'creator_id': admin.id,
+            'assignee_id': admin.id if index % 2 else None,
+            'sector_id': sector.id,
+            'subject_id': sector.subjects[index % len(sector.subjects)].id,
+            'status_id': statuses[index % len(statuses)],
+            'priority_id': priorities[index % len(priorities)],
+        })
+    db.session.execute(insert(Ticket), rows)
+    db.session.commit()
+
+def _count_queries(app, client, url: str) -> int:
+    """Executa um GET e retorna quantas instruções SQL ele enviou ao banco."""
+    # caches frios: o pior caso inclui recarregar as referências e recalcular os contadores
+    registry.invalidate()
+    ticket_counters.clear()
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert response.status_code == 200, response.status_code
+    return len(statements)
+
+@pytest.fixture
+def list_client(make_app):
+    """Cria uma aplicação com `size` tickets do admin e retorna (app, cliente já autenticado como admin)."""
+    def make(size: int):
+        app = make_app()
+        with app.app_context():
+            _seed_tickets(size)
+        client = app.test_client()
+        response = client.post('/auth/login', data={'username': 'admin', 'password': 'admin'})
+        assert response.status_code == 302
+        return app, client
+    return make
+
+@pytest.mark.parametrize('size', TICKET_COUNTS)
+@pytest.mark.parametrize('endpoint', LIST_ENDPOINTS)
+@pytest.mark.parametrize('sort_by', sorted(TICKET_LIST.sorts))
+def test_list_query_count_is_bounded(list_client, size, endpoint, sort_by):
+    """O número de consultas das listagens não cresce com o número de tickets (sem N+1)."""
+    app, client = list_client(size)
+    assert _count_queries(app, client, f'{endpoint}?sort_by={sort_by}') <= MAX_QUERIES
+
+def test_list_query_count_does_not_depend_on_size(list_client):
+    """As duas listagens fazem exatamente as mesmas consultas com 10 e com 500 tickets."""
+    counts = {}
+    for size in TICKET_COUNTS:
+        app, client = list_client(size)
+        counts[size] = [_count_queries(app, client, endpoint) for endpoint in LIST_ENDPOINTS]
+
+    assert counts[TICKET_COUNTS[0]] == counts[TICKET_COUNTS[-1]]
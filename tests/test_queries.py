@@ -0,0 +1,24 @@
+import pytest
+from app.queries import TICKET_LIST
+
+def _keyset_ids(keys, per_page: int) -> list:
+    """Ids de todas as páginas keyset, em sequência."""
+    ids, cursor = [], None
+    while True:
+        page = TICKET_LIST.page(keys=keys, after=cursor, per_page=per_page)
+        ids += [ticket.id for ticket in page]
+        if not page.has_next:
+            return ids
+        cursor = page.next_cursor
+
+@pytest.mark.parametrize('keys', [[('status', 'asc')], [('status', 'desc')], [('title', 'desc'), ('status', 'asc')]])
+def test_keyset_and_offset_break_ties_the_same_way(app, make_user, make_ticket, keys):
+    """Com valores empatados, a paginação keyset e a ordenação por ORDER BY (OFFSET) dão a mesma sequência."""
+    creator = make_user('creator')
+    for _ in range(7):
+        make_ticket(creator)
+
+    with app.app_context():
+        ordered = [ticket.id for ticket in TICKET_LIST.all(keys=keys)]
+        assert len(ordered) == 7
+        assert _keyset_ids(keys, per_page=2) == ordered
@@ -0,0 +1,152 @@
+from datetime import datetime
+import pytest
+from app import db
+from app.models import Ticket
+from app.models import Sector
+from app.models import User
+from app.registry import registry, STATUS_OPEN, STATUS_IN_PROGRESS, STATUS_RESOLVED
+from app.routing import routing
+
+@pytest.fixture
+def strategy(monkeypatch):
+    """Ativa uma estratégia de roteamento durante o teste (com o estado em memória zerado)."""
+    def use(name: str) -> None:
+        monkeypatch.setattr(routing, 'strategy', name)
+        monkeypatch.setattr(routing, 'resync_interval', 3600)
+        routing.invalidate()
+    return use
+
+def _priorities(app) -> tuple:
+    """A prioridade menos urgente e a mais urgente."""
+    with app.app_context():
+        priorities = registry.priorities()
+        return priorities[0].id, priorities[-1].id
+
+def _route(sector_id: int, creator_id: int, priority_id: int = None) -> int:
+    """Cria um ticket novo pelo roteamento (como em tickets.add) e retorna o responsável escolhido."""
+    sector = db.session.get(Sector, sector_id)
+    ticket = Ticket(title='Ticket', description='descrição', creator_id=creator_id, sector_id=sector_id,
+                    subject_id=sector.subjects[0].id, status_id=registry.status_id(STATUS_OPEN),
+                    priority_id=priority_id or registry.priorities()[0].id, created_at=datetime.utcnow())
+    routing.route(ticket)
+    db.session.add(ticket)
+    db.session.commit()
+    return ticket.assignee_id
+
+def _assert_in_sync() -> None:
+    """A carga mantida pelos eventos da sessão é a mesma de uma recarga completa do banco."""
+    incremental = {user_id: load for user_id, load in routing._state['load'].items() if load}
+    routing.invalidate()
+    routing._data()
+    assert incremental == {user_id: load for user_id, load in routing._state['load'].items() if load}
+
+def test_disabled_by_default(app, make_user, sector_ids):
+    """Sem ROUTING_STRATEGY o ticket nasce sem responsável."""
+    member = make_user('member', sector_ids=[sector_ids[0]])
+    with app.app_context():
+        assert _route(sector_ids[0], member) is None
+
+def test_round_robin(app, make_user, sector_ids, strategy):
+    """Os membros do setor se alternam em ordem de id."""
+    strategy('round_robin')
+    members = [make_user(f'agent{index}', sector_ids=[sector_ids[0]]) for index in range(3)]
+    outsider = make_user('outsider', sector_ids=[sector_ids[1]])
+
+    with app.app_context():
+        assert [_route(sector_ids[0], outsider) for _ in range(6)] == members + members
+        assert _route(sector_ids[1], outsider) == outsider
+        # setor sem membros: o ticket fica sem responsável
+        assert _route(sector_ids[2], outsider) is None
+
+def test_least_open(app, make_user, make_ticket, sector_ids, strategy):
+    """O ticket vai para quem tem menos tickets abertos."""
+    strategy('least_open')
+    busy, idle, other = (make_user(name, sector_ids=[sector_ids[0]]) for name in ('busy', 'idle', 'other'))
+    for assignee, count in ((busy, 2), (other, 1)):
+        for _ in range(count):
+            make_ticket(busy, sector_id=sector_ids[0], status=STATUS_IN_PROGRESS, assignee_id=assignee)
+    # tickets resolvidos não contam na carga
+    make_ticket(busy, sector_id=sector_ids[0], status=STATUS_RESOLVED, assignee_id=idle)
+
+    with app.app_context():
+        # o menos ocupado primeiro; nos empates, o menor id
+        assert [_route(sector_ids[0], busy) for _ in range(3)] == [idle, idle, other]
+        assert routing._state['load'] == {busy: 2, idle: 2, other: 2}
+        _assert_in_sync()
+
+def test_priority_weighted(app, make_user, make_ticket, sector_ids, strategy):
+    """A carga é somada pelo peso da prioridade, não pelo número de tickets."""
+    strategy('priority_weighted')
+    low, urgent = _priorities(app)
+    first = make_user('first', sector_ids=[sector_ids[0]])
+    second = make_user('second', sector_ids=[sector_ids[0]])
+    # um ticket urgente pesa mais que dois de prioridade baixa
+    make_ticket(first, sector_id=sector_ids[0], status=STATUS_IN_PROGRESS, assignee_id=first, priority_id=urgent)
+    for _ in range(2):
+        make_ticket(first, sector_id=sector_ids[0], status=STATUS_IN_PROGRESS, assignee_id=second, priority_id=low)
+
+    with app.app_context():
+        assert _route(sector_ids[0], first, priority_id=urgent) == second
+        assert _route(sector_ids[0], first, priority_id=low) == first
+        _assert_in_sync()
+
+def test_reassignment_and_closing_update_the_heap(app, make_user, sector_ids, strategy):
+    """Reatribuir ou resolver um ticket atualiza a carga e o heap do setor no commit."""
+    strategy('least_open')
+    first = make_user('first', sector_ids=[sector_ids[0]])
+    second = make_user('second', sector_ids=[sector_ids[0]])
+
+    with app.app_context():
+        assert _route(sector_ids[0], first) == first
+        assert _route(sector_ids[0], first) == second
+        ticket_ids = db.session.scalars(db.select(Ticket.id).where(Ticket.assignee_id == second)).all()
+
+        # o ticket do segundo passa para o primeiro: o segundo fica livre
+        db.session.get(Ticket, ticket_ids[0]).assignee_id = first
+        db.session.commit()
+        assert routing._state['load'][first] == 2
+        assert _route(sector_ids[0], first) == second
+
+        # o primeiro resolve os seus dois tickets e volta a ser o menos ocupado
+        for ticket in db.session.scalars(db.select(Ticket).where(Ticket.assignee_id == first)):
+            ticket.status_id = registry.status_id(STATUS_RESOLVED)
+        db.session.commit()
+        assert _route(sector_ids[0], first) == first
+        _assert_in_sync()
+
+def test_rollback_does_not_change_the_load(app, make_user, sector_ids, strategy):
+    """Mudanças descartadas por rollback não chegam à carga em memória."""
+    strategy('least_open')
+    first = make_user('first', sector_ids=[sector_ids[0]])
+    second = make_user('second', sector_ids=[sector_ids[0]])
+
+    with app.app_context():
+        assert _route(sector_ids[0], first) == first
+        before = dict(routing._state['load'])
+
+        sector = db.session.get(Sector, sector_ids[0])
+        ticket = Ticket(title='Ticket', description='descrição', creator_id=first, sector_id=sector.id,
+                        subject_id=sector.subjects[0].id, status_id=registry.status_id(STATUS_OPEN),
+                        priority_id=registry.priorities()[0].id, created_at=datetime.utcnow())
+        assert routing.route(ticket) == second
+        db.session.add(ticket)
+        db.session.flush()
+        db.session.rollback()
+
+        assert routing._state['load'] == before
+        # o segundo continua sendo o próximo
+        assert _route(sector_ids[0], first) == second
+        _assert_in_sync()
+
+def test_sector_membership_change_reloads(app, make_user, sector_ids, strategy):
+    """Um novo membro no setor entra no rodízio depois do commit."""
+    strategy('round_robin')
+    first = make_user('first', sector_ids=[sector_ids[0]])
+    newcomer = make_user('newcomer', sector_ids=[sector_ids[1]])
+
+    with app.app_context():
+        assert _route(sector_ids[0], first) == first
+        user = db.session.get(User, newcomer)
+        user.sectors.append(db.session.get(Sector, sector_ids[0]))
+        db.session.commit()
+        assert {_route(sector_ids[0], first) for _ in range(2)} == {first, newcomer}